@@ -0,0 +1,203 @@
+"""
+Runs the benchmark corpus on every engine and tracks regressions.
+
+The corpus in benchmarks/corpus holds each program in both word formats
+(name4.txt and name6.txt):
+
+    count       counts down from 9999 to zero
+    multiply    multiplies 99 by 99 with repeated addition
+    bubblesort  sorts 20 words in memory, rewriting its own LOAD and STORE
+                operands to index the array, then writes them in order
+    factorial   computes 7! with MULTIPLY, 500 times over
+    echo        writes back every value it reads until it reads 0
+                (inputs from echo.in)
+
+For every program and engine, the runner reports the best instructions per
+second over the timed runs, the time to load the file and the peak memory
+allocated while loading and running it. Results can be saved as JSON and
+compared with an earlier file; the runner exits with status 1 when any
+program runs slower than the baseline by more than the threshold.
+
+Run from the ProjectMilestone5 folder:
+    python benchmarks/bench_corpus.py --output results.json
+    python benchmarks/bench_corpus.py --baseline results.json --threshold 0.1
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from uvsim import UVSim
+from uvsim.channels import IteratorInput, ListOutput
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), 'corpus')
+PROGRAMS = ('count', 'multiply', 'bubblesort', 'factorial', 'echo')
+
+
+def corpus_files(names=PROGRAMS):
+    """
+    Returns (name, program path, input path or None) for every program in
+    both word formats.
+    """
+    files = []
+    for name in names:
+        inputs = os.path.join(CORPUS_DIR, f"{name}.in")
+        for digits in (4, 6):
+            files.append((f"{name}{digits}", os.path.join(CORPUS_DIR, f"{name}{digits}.txt"),
+                          inputs if os.path.exists(inputs) else None))
+    return files
+
+
+def read_inputs(path):
+    if path is None:
+        return []
+    with open(path) as file:
+        return [int(line) for line in file if line.strip()]
+
+
+def run_once(engine, program, inputs):
+    """
+    Loads and runs a program once. Returns the simulator, the output sink
+    and the load and run times in seconds.
+    """
+    sink = ListOutput()
+    simulator = UVSim(engine=engine, input_source=IteratorInput(inputs), output_sink=sink)
+    start = time.perf_counter()
+    if not simulator.load_program_fast(program):
+        raise RuntimeError(f"Error - could not load {program}: {' '.join(sink.messages)}")
+    loaded = time.perf_counter()
+    simulator.execute()
+    finished = time.perf_counter()
+    return simulator, sink, loaded - start, finished - loaded
+
+
+def peak_memory(engine, program, inputs):
+    """
+    Returns the peak number of bytes allocated while loading and running a
+    program. Measured in a separate run, since tracing slows it down.
+    """
+    tracemalloc.start()
+    try:
+        run_once(engine, program, inputs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(engine, name, program, input_file, repeats=5, min_time=0.2):
+    """
+    Times a program on one engine. Each of the repeats runs the program
+    at least once and until min_time seconds of execution have passed, and
+    the best rate wins.
+    """
+    inputs = read_inputs(input_file)
+    best_rate = 0.0
+    best_load = None
+    for _ in range(repeats):
+        instructions = 0
+        elapsed = 0.0
+        while True:
+            simulator, sink, load_time, run_time = run_once(engine, program, inputs)
+            if simulator.halt_reason != 'halt':
+                raise RuntimeError(f"Error - {name} stopped with '{simulator.halt_reason}' on the {engine} engine.")
+            instructions += simulator.instruction_count
+            elapsed += run_time
+            best_load = load_time if best_load is None else min(best_load, load_time)
+            if elapsed >= min_time:
+                break
+        best_rate = max(best_rate, instructions / elapsed)
+    return {
+        'program': name,
+        'file_format': simulator.file_format,
+        'engine': engine,
+        'instructions': simulator.instruction_count,
+        'outputs': len(sink.values),
+        'instructions_per_sec': best_rate,
+        'load_seconds': best_load,
+        'peak_memory_bytes': peak_memory(engine, program, inputs),
+    }
+
+
+def run_suite(engines=UVSim.ENGINES, names=PROGRAMS, repeats=5, min_time=0.2):
+    """
+    Runs every corpus program on every engine and returns the results
+    document that --output saves.
+    """
+    results = []
+    for name, program, input_file in corpus_files(names):
+        for engine in engines:
+            results.append(measure(engine, name, program, input_file, repeats, min_time))
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=0.1):
+    """
+    Returns a message for every program and engine that runs more than
+    threshold (a fraction) slower than in the baseline document. Pairs
+    missing from either document are skipped.
+    """
+    before = {(result['program'], result['engine']): result['instructions_per_sec']
+              for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        old_rate = before.get((result['program'], result['engine']))
+        if not old_rate:
+            continue
+        change = result['instructions_per_sec'] / old_rate - 1
+        if change < -threshold:
+            regressions.append(f"Regression - {result['program']} on the {result['engine']} engine: "
+                               f"{result['instructions_per_sec']:,.0f} instructions/sec, "
+                               f"{-change:.0%} below the baseline of {old_rate:,.0f}.")
+    return regressions
+
+
+def format_table(document):
+    lines = [f"{'program':<12} {'engine':<10} {'instructions/sec':>17} {'load ms':>8} {'peak KiB':>9}"]
+    for result in document['results']:
+        lines.append(f"{result['program']:<12} {result['engine']:<10} {result['instructions_per_sec']:>17,.0f} "
+                     f"{result['load_seconds'] * 1000:>8.3f} {result['peak_memory_bytes'] / 1024:>9.1f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the BasicML benchmark corpus on every UVSim engine.")
+    parser.add_argument("--engine", action="append", choices=UVSim.ENGINES,
+                        help="engine to measure (repeat for several, default: all)")
+    parser.add_argument("--program", action="append", choices=PROGRAMS,
+                        help="corpus program to run (repeat for several, default: all)")
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per program and engine")
+    parser.add_argument("--min-time", type=float, default=0.2, help="least seconds of execution per timed run")
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with the results in this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="largest allowed slowdown against the baseline, as a fraction (default 0.1)")
+    args = parser.parse_args(argv)
+
+    document = run_suite(args.engine or UVSim.ENGINES, args.program or PROGRAMS, args.repeats, args.min_time)
+    print(format_table(document))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(document, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(json.load(file), document, args.threshold)
+        for message in regressions:
+            print(message)
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} of {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""
+Compares instructions per second for the table and reference engines.
+
+Run from the ProjectMilestone5 folder:
+    python benchmarks/bench_dispatch.py
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from uvsim import UVSim
+
+# Counts down from the value at 20 to zero, then halts.
+COUNTDOWN = [
+    2020,  # 00 LOAD 20
+    3121,  # 01 SUBTRACT 21
+    2120,  # 02 STORE 20
+    4205,  # 03 BRANCHZERO 05
+    4001,  # 04 BRANCH 01
+    4300,  # 05 HALT
+]
+
+
+def run_once(engine, start_value):
+    simulator = UVSim(engine=engine)
+    simulator.file_format = 'old'
+    simulator.load_words(COUNTDOWN)
+    simulator.memory[20] = start_value
+    simulator.memory[21] = 1
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        simulator.execute()
+        elapsed = time.perf_counter() - start
+    return simulator.instruction_count, elapsed
+
+
+def main(repeats=20, start_value=9999):
+    for engine in UVSim.ENGINES:
+        total_instructions = 0
+        total_time = 0.0
+        for _ in range(repeats):
+            count, elapsed = run_once(engine, start_value)
+            total_instructions += count
+            total_time += elapsed
+        print(f"{engine:>10}: {total_instructions / total_time:,.0f} instructions/sec "
+              f"({total_instructions:,} instructions in {total_time:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
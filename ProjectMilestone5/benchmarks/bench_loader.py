@@ -0,0 +1,48 @@
+"""
+Compares the line-by-line loader with the bulk loader on large files.
+
+Run from the ProjectMilestone5 folder:
+    python benchmarks/bench_loader.py [lines]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from uvsim import UVSim
+from uvsim.channels import ListOutput
+
+
+def write_program(path, lines, digits):
+    limit = 9999 if digits == 4 else 99999
+    with open(path, 'w') as file:
+        for _ in range(lines):
+            file.write(f"{random.randint(0, limit):0{digits}d}\n")
+
+
+def time_load(method_name, path, lines):
+    simulator = UVSim(output_sink=ListOutput(), memory_size=lines)
+    start = time.perf_counter()
+    loaded = getattr(simulator, method_name)(path)
+    elapsed = time.perf_counter() - start
+    if not loaded:
+        raise RuntimeError(f"{method_name} rejected {path}")
+    return elapsed
+
+
+def main(lines=1_000_000):
+    with tempfile.TemporaryDirectory() as folder:
+        for digits in (4, 6):
+            path = os.path.join(folder, f"program{digits}.txt")
+            write_program(path, lines, digits)
+            time_load('load_program_fast', path, lines)  # Untimed, so NumPy's import is not measured
+            line_by_line = time_load('load_program_from_file', path, lines)
+            bulk = time_load('load_program_fast', path, lines)
+            print(f"{lines:,} {digits}-digit lines: line-by-line {line_by_line:.3f}s, "
+                  f"bulk {bulk:.3f}s ({line_by_line / bulk:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -1,23 +1,34 @@
+import os
+
 from setuptools import setup, find_packages
 
+here = os.path.dirname(os.path.abspath(__file__))
+with open(os.path.join(here, 'docs', 'README.md')) as readme:  # Listed in MANIFEST.in so sdists carry it
+    long_description = readme.read()
+
 setup(
     name="uvsim",  # Name of your package
     version="0.1",  # Version of your package
     packages=find_packages(where="src"),  # Finds all packages inside 'src' directory
     package_dir={"": "src"},  # Specify where the source code is located
-    install_requires=[  # Dependencies your project needs to run
-        "tk",  # Tkinter for GUI
-    ],
+    install_requires=[],  # Tkinter ships with Python; the headless modules need nothing else
+    extras_require={  # Optional dependencies
+        "vector": ["numpy"],  # NumPy lockstep engine (vectorized.py)
+    },
     entry_points={  # This section defines command line scripts to run the app
         "console_scripts": [
             "uvsim=uvsim.gui:main",  # Runs the main() function in gui.py
+            "uvsim-run=uvsim.cli:main",  # Runs one program from the terminal without loading Tkinter
+            "uvsim-batch=uvsim.batch:main",  # Runs program files in parallel, one JSON record each
+            "uvsim-convert=uvsim.image:main",  # Converts programs between text and binary images
+            "uvsim-server=uvsim.server:main",  # Serves program runs over HTTP on localhost
         ],
     },
     # Optional: Add metadata
     author="Your Name",  
     author_email="your.email@example.com",
     description="A BasicML Simulator with GUI",
-    long_description=open('README.md').read(),  # If you have a README file
+    long_description=long_description,  # If you have a README file
     long_description_content_type="text/markdown",  # If it's a markdown file
     url="https://github.com/yourusername/uvsim",  # Project URL
     classifiers=[  # Classifiers help people find your package
@@ -25,5 +36,5 @@ setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    python_requires='>=3.6',  # Minimum Python version required
+    python_requires='>=3.7',  # Lazy package attributes need module __getattr__
 )
@@ -0,0 +1,25 @@
+"""
+UVSim, a BasicML simulator.
+
+The core engine and its tools never import tkinter; only the GUI does:
+
+    uvsim.core      the simulator (the UVSim class) and its engines
+    uvsim.cli       uvsim-run, runs one program from the command line
+    uvsim.batch     uvsim-batch, runs many programs on worker processes
+    uvsim.server    uvsim-server, runs programs over HTTP on localhost
+    uvsim.image     uvsim-convert, binary program images
+    uvsim.gui       uvsim, the Tk interface
+
+Importing the package loads nothing else. UVSim is imported from
+uvsim.core on first use:
+
+    from uvsim import UVSim
+"""
+__version__ = "0.1"
+
+
+def __getattr__(name):
+    if name == 'UVSim':
+        from .core import UVSim
+        return UVSim
+    raise AttributeError(f"module 'uvsim' has no attribute '{name}'")
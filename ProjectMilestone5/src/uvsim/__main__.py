@@ -0,0 +1,8 @@
+"""
+Runs uvsim-run, so `python -m uvsim program.txt` works without installing.
+"""
+import sys
+
+from .cli import main
+
+sys.exit(main())
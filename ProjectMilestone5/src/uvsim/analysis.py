@@ -0,0 +1,250 @@
+"""
+Static analysis of loaded BasicML programs.
+
+analyze() follows every path from the entry point of a memory image and
+builds a control-flow graph of basic blocks, split at the branches (40,
+41, 42) and HALT (43). From it, it reports which cells are code and which
+are data, code that can never run, STORE and READ instructions that write
+into code (self-modifying programs), and the loops with their nesting.
+
+The analysis looks at the image as loaded. A program that rewrites its own
+code may run differently; self_modifying lists the places where it could.
+
+Results are cached per image, so repeated calls for the same program are
+free. Treat a returned ProgramAnalysis as read-only:
+
+    result = analyze(simulator.memory, simulator.file_format)
+    print(result.format_text())
+"""
+import functools
+from array import array
+
+from .blockcompiler import split_word
+
+BRANCHES = (40, 41, 42)
+DATA_OPCODES = (10, 11, 20, 21, 30, 31, 32, 33)
+KNOWN_OPCODES = DATA_OPCODES + BRANCHES + (43,)
+
+
+class BasicBlock:
+    def __init__(self, start):
+        self.start = start
+        self.end = start         # Last address in the block
+        self.successors = []     # Start addresses of the blocks that can run next
+        self.predecessors = []
+
+    def addresses(self):
+        return range(self.start, self.end + 1)
+
+
+class Loop:
+    def __init__(self, header):
+        self.header = header     # Start of the block every pass goes through
+        self.body = set()        # Start addresses of the blocks in the loop
+        self.latches = []        # Blocks that branch back to the header
+        self.parent = None       # Header of the innermost enclosing loop
+        self.depth = 1
+
+
+class ProgramAnalysis:
+    def __init__(self, file_format, memory_size, entry_point):
+        self.file_format = file_format
+        self.memory_size = memory_size
+        self.entry_point = entry_point
+        self.blocks = {}             # Start address -> BasicBlock
+        self.code = []               # Addresses that can run, in order
+        self.data = []               # Addresses read or written by reachable instructions and never run
+        self.unreachable = []        # Non-zero cells that are neither code nor data
+        self.self_modifying = []     # (instruction address, code address it writes) pairs
+        self.loops = []              # Loops, outermost first
+        self.falls_off_end = False   # Whether a path runs past the last address
+
+    def block_of(self, address):
+        """
+        Returns the block holding an address, or None when it is not code.
+        """
+        for block in self.blocks.values():
+            if block.start <= address <= block.end:
+                return block
+        return None
+
+    def report(self):
+        return {
+            'file_format': self.file_format,
+            'entry_point': self.entry_point,
+            'blocks': [{'start': block.start, 'end': block.end, 'successors': block.successors}
+                       for block in self.blocks.values()],
+            'code': self.code,
+            'data': self.data,
+            'unreachable': self.unreachable,
+            'self_modifying': [{'address': address, 'target': target} for address, target in self.self_modifying],
+            'loops': [{'header': loop.header, 'body': sorted(loop.body), 'latches': loop.latches,
+                       'depth': loop.depth, 'parent': loop.parent} for loop in self.loops],
+            'falls_off_end': self.falls_off_end,
+        }
+
+    def format_text(self):
+        """
+        Returns a short, human-readable summary.
+        """
+        lines = [f"Basic blocks: {len(self.blocks)}"]
+        for block in self.blocks.values():
+            successors = ", ".join(f"{start:03d}" for start in block.successors) or "end"
+            lines.append(f"  {block.start:03d}-{block.end:03d} -> {successors}")
+        lines.append(f"Code cells: {len(self.code)}, data cells: {len(self.data)}")
+        if self.unreachable:
+            lines.append("Unreachable: " + ", ".join(f"{address:03d}" for address in self.unreachable))
+        for address, target in self.self_modifying:
+            lines.append(f"Warning - {address:03d} writes into code at {target:03d}.")
+        for loop in self.loops:
+            lines.append(f"{'  ' * loop.depth}Loop at {loop.header:03d}: "
+                         f"{len(loop.body)} block(s), depth {loop.depth}")
+        if self.falls_off_end:
+            lines.append("Warning - a path runs past the end of memory without HALT.")
+        return "\n".join(lines)
+
+
+def analyze(memory, file_format, entry_point=0):
+    """
+    Analyzes a memory image (array, list or other sequence of words) in the
+    given file format, starting at entry_point.
+    """
+    return analyze_image(file_format, array('i', memory).tobytes(), entry_point)
+
+
+@functools.lru_cache(maxsize=64)
+def analyze_image(file_format, image, entry_point):
+    words = array('i')
+    words.frombytes(image)
+    size = len(words)
+    result = ProgramAnalysis(file_format, size, entry_point)
+    decoded = [split_word(word, file_format) for word in words]
+
+    def successors(address):
+        opcode, operand = decoded[address]
+        if opcode not in KNOWN_OPCODES or operand >= size or opcode == 43:
+            return []  # The machine stops here
+        if opcode == 40:
+            return [operand]
+        if opcode in BRANCHES:
+            return [address + 1, operand]
+        return [address + 1]
+
+    # Every address some path can reach
+    reachable = set()
+    pending = [entry_point] if entry_point < size else []
+    while pending:
+        address = pending.pop()
+        if address in reachable:
+            continue
+        reachable.add(address)
+        for target in successors(address):
+            if target >= size:
+                result.falls_off_end = True
+            elif target not in reachable:
+                pending.append(target)
+    result.code = sorted(reachable)
+
+    # Blocks start at the entry, at branch targets and after branches
+    leaders = {entry_point} & reachable
+    for address in result.code:
+        opcode = decoded[address][0]
+        if opcode in BRANCHES or opcode == 43:
+            leaders.update(target for target in successors(address) if target in reachable)
+    for start in sorted(leaders):
+        block = BasicBlock(start)
+        address = start
+        while True:
+            following = successors(address)
+            if following != [address + 1] or address + 1 not in reachable or address + 1 in leaders:
+                break
+            address += 1
+        block.end = address
+        block.successors = [target for target in following if target in reachable]
+        result.blocks[start] = block
+    for block in result.blocks.values():
+        for target in block.successors:
+            result.blocks[target].predecessors.append(block.start)
+
+    # Cells that reachable instructions read or write
+    data = set()
+    for address in result.code:
+        opcode, operand = decoded[address]
+        if opcode in DATA_OPCODES and operand < size:
+            if operand in reachable:
+                if opcode == 10 or opcode == 21:
+                    result.self_modifying.append((address, operand))
+            else:
+                data.add(operand)
+    result.data = sorted(data)
+    result.unreachable = [address for address in range(size)
+                          if words[address] and address not in reachable and address not in data]
+
+    result.loops = find_loops(result.blocks, entry_point if entry_point in result.blocks else None)
+    return result
+
+
+def find_loops(blocks, entry):
+    """
+    Finds the natural loops of a control-flow graph: every edge to a block
+    that dominates its source closes a loop. Loops sharing a header are
+    merged. Returns them outermost first with their nesting filled in.
+    """
+    if entry is None:
+        return []
+    order = reverse_postorder(blocks, entry)
+    everything = set(order)
+    dominators = {start: set(everything) for start in order}
+    dominators[entry] = {entry}
+    changed = True
+    while changed:
+        changed = False
+        for start in order[1:]:
+            incoming = [dominators[source] for source in blocks[start].predecessors if source in dominators]
+            new = set.intersection(*incoming) | {start} if incoming else {start}
+            if new != dominators[start]:
+                dominators[start] = new
+                changed = True
+
+    loops = {}
+    for start in order:
+        for target in blocks[start].successors:
+            if target in dominators[start]:
+                loop = loops.setdefault(target, Loop(target))
+                loop.latches.append(start)
+                loop.body.add(target)
+                pending = [start]
+                while pending:
+                    member = pending.pop()
+                    if member not in loop.body:
+                        loop.body.add(member)
+                        pending.extend(blocks[member].predecessors)
+
+    # The parent is the smallest other loop that holds the header
+    ordered = sorted(loops.values(), key=lambda loop: -len(loop.body))
+    for loop in ordered:
+        enclosing = [other for other in ordered if other is not loop and loop.header in other.body
+                     and len(other.body) > len(loop.body)]
+        if enclosing:
+            parent = min(enclosing, key=lambda other: len(other.body))
+            loop.parent = parent.header
+            loop.depth = len(enclosing) + 1
+    return ordered
+
+
+def reverse_postorder(blocks, entry):
+    seen = {entry}
+    order = []
+    stack = [(entry, iter(blocks[entry].successors))]
+    while stack:
+        start, following = stack[-1]
+        for target in following:
+            if target not in seen:
+                seen.add(target)
+                stack.append((target, iter(blocks[target].successors)))
+                break
+        else:
+            stack.pop()
+            order.append(start)
+    order.reverse()
+    return order
@@ -0,0 +1,123 @@
+"""
+Asyncio execution for UVSim.
+
+An AsyncSession runs a simulator on the event loop instead of a thread. A
+READ with no value waiting suspends the session until send() supplies one,
+and WRITE values arrive as an async stream. Long stretches without input
+are run in slices of slice_steps instructions so other sessions get a
+turn, which lets one loop serve many simulations at once:
+
+    session = AsyncSession(simulator)
+    task = asyncio.create_task(session.run())
+    await session.send(5)
+    async for value in session.outputs():
+        print(value)
+    halt_reason = await task
+"""
+import asyncio
+
+from .channels import OutputSink, PendingInput
+
+
+class AsyncOutput(OutputSink):
+    """
+    Puts WRITE values on an asyncio.Queue as they are flushed. Messages are
+    kept in the messages list. close() ends the stream.
+    """
+
+    END = object()
+
+    def __init__(self, threshold=256):
+        super().__init__(threshold)
+        self.queue = asyncio.Queue()
+        self.messages = []
+
+    def emit(self, entries):
+        for kind, item in entries:
+            if kind == 'value':
+                self.queue.put_nowait(item)
+            else:
+                self.messages.append(item)
+
+    def close(self):
+        super().close()
+        self.queue.put_nowait(self.END)
+
+
+class AsyncSession:
+    def __init__(self, simulator, slice_steps=1000):
+        self.simulator = simulator
+        self.slice_steps = slice_steps
+        self.pending = PendingInput()
+        self.output = AsyncOutput()
+        self.inputs = asyncio.Queue()
+        self.waiting = False  # True while a READ is waiting for send()
+        simulator.input_source = self.pending
+        simulator.output_sink = self.output
+
+    async def send(self, value):
+        """
+        Supplies the next READ value. Sending None ends the input, so a
+        later READ stops the program as invalid input.
+        """
+        await self.inputs.put(value)
+
+    def send_nowait(self, value):
+        self.inputs.put_nowait(value)
+
+    async def run(self):
+        """
+        Runs the loaded program to the end and returns its halt reason.
+        Invalid input raises ValueError, as execute() does.
+        """
+        simulator = self.simulator
+        try:
+            if not simulator.start():
+                return simulator.halt_reason
+            while True:
+                state = simulator.run_slice(self.slice_steps)
+                if state == 'stopped':
+                    break
+                self.output.flush()
+                if state == 'input':
+                    self.waiting = True
+                    self.pending.feed(await self.inputs.get())
+                    self.waiting = False
+                else:
+                    await asyncio.sleep(0)  # Let other sessions run
+        finally:
+            self.output.close()
+        return simulator.halt_reason
+
+    async def outputs(self):
+        """
+        Yields WRITE values as the program produces them, until it stops.
+        """
+        while True:
+            value = await self.output.queue.get()
+            if value is AsyncOutput.END:
+                return
+            yield value
+
+
+async def run_program(simulator, inputs=(), slice_steps=1000):
+    """
+    Runs a loaded simulator with the given inputs and returns
+    (halt reason, WRITE values).
+    """
+    session = AsyncSession(simulator, slice_steps)
+    for value in inputs:
+        session.send_nowait(value)
+    session.send_nowait(None)
+    values = []
+
+    async def collect():
+        async for value in session.outputs():
+            values.append(value)
+
+    collector = asyncio.ensure_future(collect())
+    try:
+        halt_reason = await session.run()
+    finally:
+        await collector
+    return halt_reason, values
@@ -0,0 +1,120 @@
+"""
+Background execution for UVSim.
+
+A BackgroundRun runs a loaded simulator on a worker thread so a GUI stays
+responsive. The worker reports back through an event queue that the GUI
+drains with poll(), typically from a Tk after() callback:
+
+    ('output', values, messages)   WRITE values and messages since the last event
+    ('state', accumulator, program_counter, instruction_count)
+    ('input', address)             a READ into address is waiting for send()
+    ('break', address)             a breakpoint or watchpoint stopped the run
+                                   before address; it is paused until resume()
+    ('paused',)                    the run is paused
+    ('error', text)                the run stopped on invalid input
+    ('done', halt_reason)          the run is over; always the last event
+
+The program runs in slices of slice_steps instructions. Stop and pause
+requests take effect between slices.
+"""
+import queue
+import threading
+
+from .channels import CallbackOutput, PendingInput
+
+STOP = object()
+
+
+class BackgroundRun:
+    def __init__(self, simulator, slice_steps=10000):
+        self.simulator = simulator
+        self.slice_steps = slice_steps
+        self.events = queue.Queue()
+        self.inputs = queue.Queue()
+        self.pending = PendingInput()
+        self.output = CallbackOutput(self.post_output, threshold=4096)
+        self.stop_requested = threading.Event()
+        self.unpaused = threading.Event()
+        self.unpaused.set()
+        simulator.input_source = self.pending
+        simulator.output_sink = self.output
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def post_output(self, values, messages):
+        self.events.put(('output', values, messages))
+
+    def post_state(self):
+        simulator = self.simulator
+        self.events.put(('state', simulator.accumulator, simulator.program_counter, simulator.instruction_count))
+
+    def send(self, value):
+        """
+        Supplies the value for a waiting READ.
+        """
+        self.inputs.put(value)
+
+    def pause(self):
+        self.unpaused.clear()
+
+    def resume(self):
+        self.unpaused.set()
+
+    @property
+    def paused(self):
+        return not self.unpaused.is_set()
+
+    def stop(self):
+        self.stop_requested.set()
+        self.inputs.put(STOP)
+        self.unpaused.set()
+
+    def is_alive(self):
+        return self.thread.is_alive()
+
+    def poll(self):
+        """
+        Returns every event posted since the last poll, without waiting.
+        """
+        events = []
+        try:
+            while True:
+                events.append(self.events.get_nowait())
+        except queue.Empty:
+            return events
+
+    def run(self):
+        simulator = self.simulator
+        try:
+            if not simulator.start():
+                return
+            while not self.stop_requested.is_set():
+                if self.paused:
+                    self.events.put(('paused',))
+                    self.unpaused.wait()
+                    continue
+                state = simulator.run_slice(self.slice_steps)
+                self.output.flush()
+                self.post_state()
+                if state == 'stopped':
+                    return
+                if state == 'break':
+                    self.unpaused.clear()
+                    self.events.put(('break', simulator.program_counter))
+                if state == 'input':
+                    self.events.put(('input', simulator.decode(simulator.program_counter)[1]))
+                    value = self.inputs.get()
+                    if value is STOP:
+                        break
+                    self.pending.feed(value)
+            simulator.running = False
+            simulator.halt_reason = 'stopped'
+            self.output.message("*** Program stopped by user ***")
+        except ValueError as e:
+            self.events.put(('error', str(e)))
+        finally:
+            self.output.flush()
+            self.post_state()
+            self.events.put(('done', simulator.halt_reason))
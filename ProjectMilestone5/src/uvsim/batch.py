@@ -0,0 +1,226 @@
+"""
+Headless batch runner for UVSim.
+
+Runs every program file matched by the given directories, globs or paths on
+a pool of worker processes and prints one JSON record per program:
+
+    uvsim-batch programs/ --inputs inputs/ --timeout 5
+
+Programs may be text files or binary images (see image.py). The input for
+a program is read from a file with the same name and the input suffix
+(default .in), one value per line, found in the --inputs folder or next to
+the program.
+"""
+import argparse
+import collections
+import concurrent.futures
+import glob
+import hashlib
+import json
+import os
+import signal
+import sys
+import time
+
+from .core import UVSim
+from .channels import ListOutput
+from .cycledetector import CycleDetector
+from .image import is_image
+from .memo import result_key, shared_result_cache
+from .programcache import shared_cache
+from .tracer import Tracer
+
+
+# One program to run. Besides the program and its input file a job may
+# name a cache folder, shared by all workers, for parsed programs, ask to
+# stop programs which loop forever (see cycledetector.py), give an SQLite
+# file of earlier results to reuse (see memo.py), and give a folder to save
+# the last instructions of every run that does not halt normally (see
+# tracer.py).
+Job = collections.namedtuple(
+    'Job', ['program', 'input_file', 'engine', 'timeout', 'cache_dir', 'detect_loops', 'results_db', 'trace_dir'],
+    defaults=(None, 'table', None, None, False, None, None))
+
+
+class JobTimeout(Exception):
+    pass
+
+
+def raise_timeout(signum, frame):
+    raise JobTimeout()
+
+
+def find_programs(patterns, extension):
+    """
+    Expands directories, glob patterns and plain paths into a sorted list
+    of program files.
+    """
+    programs = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            programs.extend(glob.glob(os.path.join(pattern, f"*{extension}")))
+        else:
+            programs.extend(glob.glob(pattern) or [pattern])
+    return sorted(set(programs))
+
+
+def find_input_file(program, input_dir, input_suffix):
+    stem = os.path.splitext(os.path.basename(program))[0]
+    folder = input_dir if input_dir else os.path.dirname(program)
+    path = os.path.join(folder, stem + input_suffix)
+    return path if os.path.isfile(path) else None
+
+
+def read_inputs(input_file):
+    if input_file is None:
+        return []
+    with open(input_file, 'r') as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+def trace_name(program):
+    """
+    Returns the name of a program's trace file: the program's name and a
+    short hash of its full path, so that programs with the same name in
+    different folders keep separate traces.
+    """
+    stem = os.path.splitext(os.path.basename(program))[0]
+    digest = hashlib.sha256(os.path.abspath(program).encode()).hexdigest()[:8]
+    return f"{stem}-{digest}.trace"
+
+
+def run_job(job):
+    """
+    Loads and runs one Job in a worker process and returns its record.
+    Running out of input stops the program as invalid input.
+    """
+    job = Job(*job)  # A plain tuple works too, in field order
+    program = job.program
+    record = {
+        'program': program,
+        'input': job.input_file,
+        'halt_reason': None,
+        'accumulator': 0,
+        'outputs': [],
+        'instruction_count': 0,
+        'program_counter': 0,
+        'error': None,
+        'elapsed': 0.0,
+        'cached': False,
+        'trace': None,
+    }
+    try:
+        inputs = read_inputs(job.input_file)
+    except OSError as e:
+        record['halt_reason'] = 'load_error'
+        record['error'] = str(e)
+        return record
+
+    sink = ListOutput()
+    simulator = UVSim(engine=job.engine, input_source=inputs, output_sink=sink)
+    if is_image(program):
+        loaded = simulator.load_image(program)
+    else:
+        loaded = simulator.load_program_fast(program, cache=shared_cache(job.cache_dir))
+    if not loaded:
+        record['halt_reason'] = 'load_error'
+        record['error'] = sink.messages[-1] if sink.messages else "Could not load program."
+        return record
+    if job.detect_loops:
+        simulator.attach(CycleDetector())
+
+    if job.results_db:
+        results = shared_result_cache(job.results_db)
+        key = result_key(simulator.memory, simulator.file_format, inputs, simulator.program_counter,
+                         simulator.accumulator, ['detect_loops'] if job.detect_loops else [])
+        result = results.get(key)
+        # A run that did not halt normally is run again when a trace is asked for
+        if result is not None and not (job.trace_dir and result['halt_reason'] != 'halt'):
+            for field in ('halt_reason', 'accumulator', 'outputs', 'instruction_count', 'program_counter', 'error'):
+                record[field] = result[field]
+            record['cached'] = True
+            return record
+    if job.trace_dir:
+        tracer = Tracer()
+        simulator.attach(tracer)
+
+    use_alarm = job.timeout and hasattr(signal, 'SIGALRM')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, job.timeout)
+    start = time.perf_counter()
+    try:
+        simulator.execute()
+    except ValueError as e:
+        record['error'] = str(e)
+    except JobTimeout:
+        simulator.halt_reason = 'timeout'
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    record['elapsed'] = round(time.perf_counter() - start, 6)
+
+    record['halt_reason'] = simulator.halt_reason
+    record['accumulator'] = simulator.accumulator
+    record['outputs'] = sink.values
+    record['instruction_count'] = simulator.instruction_count
+    record['program_counter'] = simulator.program_counter
+    if job.trace_dir and simulator.halt_reason != 'halt':
+        record['trace'] = os.path.join(job.trace_dir, trace_name(program))
+        tracer.dump(record['trace'])
+    if job.results_db:
+        results.put(key, {field: record[field] for field in
+                          ('halt_reason', 'accumulator', 'outputs', 'instruction_count', 'program_counter', 'error')})
+    return record
+
+
+def run_batch(jobs, workers=None, chunksize=None):
+    """
+    Runs the jobs on a process pool and yields their records in job order.
+    """
+    workers = workers or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, len(jobs) // (workers * 4))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(run_job, jobs, chunksize=chunksize)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="uvsim-batch", description="Run BasicML program files in parallel.")
+    parser.add_argument("programs", nargs="+", help="program files, directories or glob patterns")
+    parser.add_argument("--inputs", help="folder holding the input files (default: next to each program)")
+    parser.add_argument("--input-suffix", default=".in", help="suffix of input files (default: .in)")
+    parser.add_argument("--extension", default=".txt", help="program extension used for directories (default: .txt)")
+    parser.add_argument("--engine", default="table", choices=UVSim.ENGINES)
+    parser.add_argument("--timeout", type=float, default=None, help="seconds allowed per program")
+    parser.add_argument("--detect-loops", action="store_true",
+                        help="stop programs that repeat a machine state without reading input")
+    parser.add_argument("--results-db", help="reuse results of identical earlier runs stored in this SQLite file")
+    parser.add_argument("--trace-dir", help="save the last instructions of runs that stop with an error in this folder")
+    parser.add_argument("--cache-dir", help="keep parsed programs in this folder for later runs")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--output", help="write the JSON records to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    programs = find_programs(args.programs, args.extension)
+    if not programs:
+        print("Error - No program files found.", file=sys.stderr)
+        return 1
+    if args.trace_dir:
+        os.makedirs(args.trace_dir, exist_ok=True)
+    jobs = [Job(program, find_input_file(program, args.inputs, args.input_suffix), engine=args.engine,
+                timeout=args.timeout, cache_dir=args.cache_dir, detect_loops=args.detect_loops,
+                results_db=args.results_db, trace_dir=args.trace_dir) for program in programs]
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        for record in run_batch(jobs, workers=args.workers):
+            output.write(json.dumps(record) + "\n")
+    finally:
+        if args.output:
+            output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
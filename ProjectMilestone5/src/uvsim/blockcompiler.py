@@ -0,0 +1,218 @@
+"""
+Basic-block compiler for UVSim.
+
+Splits a loaded program into straight-line blocks that end at a branch
+(40, 41, 42) or HALT (43), turns each block into a generated Python
+function with compile(), and runs the program by jumping from block to
+block. Addresses that the program writes after they were compiled are
+run by the interpreter from then on.
+"""
+import functools
+
+TERMINATORS = (40, 41, 42, 43)
+KNOWN_OPCODES = (10, 11, 20, 21, 30, 31, 32, 33, 40, 41, 42, 43)
+ARITHMETIC = {30: ('+=', 'ADD'), 31: ('-=', 'SUBTRACT'), 33: ('*=', 'MULTIPLY')}
+
+
+def split_word(word, file_format):
+    """
+    Splits a memory word into an (opcode, operand) pair the same way
+    UVSim.decode does.
+    """
+    instruction = abs(word)
+    if file_format == 'old':
+        return instruction // 100, instruction % 100
+    return instruction // 1000, instruction % 1000
+
+
+def generate_source(file_format, start, words, memory_size=250):
+    """
+    Generates the source of a function that runs the block of words found
+    at the start address of a memory with memory_size words. The function
+    takes the simulator, its memory, the block ownership table and the
+    write callback, and returns the address of the next instruction.
+    """
+    limit = 9999 if file_format == 'old' else 99999
+    lines = ["def block(sim, memory, owners, note_write):",
+             "    acc = sim.accumulator"]
+    counted = 0  # Instructions already added to sim.instruction_count
+
+    def leave(executed, next_pc, indent, reason=None):
+        out = [f"{indent}sim.accumulator = acc"]
+        if executed > counted:
+            out.append(f"{indent}sim.instruction_count += {executed - counted}")
+        if reason:
+            out.append(f"{indent}sim.running = False")
+            out.append(f"{indent}sim.halt_reason = '{reason}'")
+        out.append(f"{indent}return {next_pc}")
+        return out
+
+    for offset, word in enumerate(words):
+        address = start + offset
+        executed = offset + 1
+        opcode, operand = split_word(word, file_format)
+        lines.append(f"    # {address:03d}: {word}")
+
+        if operand >= memory_size:
+            lines.append("    sim.accumulator = acc")
+            if offset > counted:
+                lines.append(f"    sim.instruction_count += {offset - counted}")
+            lines.append(f"    sim.output_sink.message('Error - Invalid memory address {operand}. Must be between 000 and {memory_size - 1:03d}.')")
+            lines.append("    sim.running = False")
+            lines.append("    sim.halt_reason = 'invalid_address'")
+            lines.append(f"    return {address}")
+            return "\n".join(lines) + "\n"
+
+        if opcode == 10:  # READ
+            # Bring the machine up to date first, input errors propagate out of execute()
+            lines.append("    sim.accumulator = acc")
+            lines.append(f"    sim.program_counter = {address + 1}")
+            lines.append(f"    sim.instruction_count += {executed - counted}")
+            counted = executed
+            lines.append(f"    sim.op_read({operand})")
+            lines.append(f"    if owners[{operand}]:")
+            lines.append(f"        note_write({operand})")
+        elif opcode == 11:  # WRITE
+            lines.append(f"    sim.op_write({operand})")
+        elif opcode == 20:  # LOAD
+            lines.append(f"    acc = memory[{operand}]")
+        elif opcode == 21:  # STORE
+            lines.append(f"    memory[{operand}] = acc")
+            lines.append(f"    if owners[{operand}]:")
+            lines.append(f"        note_write({operand})")
+        elif opcode in ARITHMETIC:  # ADD, SUBTRACT, MULTIPLY
+            symbol, name = ARITHMETIC[opcode]
+            lines.append(f"    acc {symbol} memory[{operand}]")
+            lines.append(f"    if not {-limit} <= acc <= {limit}:")
+            lines.append(f"        sim.output_sink.message('Overflow error in {name} operation.')")
+            lines.extend(leave(executed, address + 1, "        ", reason='overflow'))
+        elif opcode == 32:  # DIVIDE
+            lines.append(f"    if memory[{operand}] == 0:")
+            lines.append("        sim.output_sink.message('Error: Division by zero.')")
+            lines.extend(leave(executed, address + 1, "        ", reason='divide_by_zero'))
+            lines.append(f"    acc //= memory[{operand}]")
+        elif opcode == 40:  # BRANCH
+            lines.extend(leave(executed, operand, "    "))
+        elif opcode == 41 or opcode == 42:  # BRANCHNEG, BRANCHZERO
+            condition = "acc < 0" if opcode == 41 else "acc == 0"
+            lines.append(f"    if {condition}:")
+            lines.extend(leave(executed, operand, "        "))
+            lines.extend(leave(executed, address + 1, "    "))
+        elif opcode == 43:  # HALT
+            lines.append("    sim.output_sink.message('*** Program terminated normally ***')")
+            lines.extend(leave(executed, address + 1, "    ", reason='halt'))
+        else:
+            lines.append(f"    sim.output_sink.message('Error - Invalid opcode {opcode}.')")
+            lines.extend(leave(executed, address + 1, "    ", reason='invalid_opcode'))
+
+        if opcode in TERMINATORS or opcode not in KNOWN_OPCODES:
+            return "\n".join(lines) + "\n"
+
+    # The block fell through to the next address
+    lines.extend(leave(len(words), start + len(words), "    "))
+    return "\n".join(lines) + "\n"
+
+
+@functools.lru_cache(maxsize=4096)
+def compile_block(file_format, start, words, memory_size=250):
+    """
+    Compiles a block into a Python function. Blocks are cached by their
+    format, start address, contents and memory size, so reloading or
+    re-running the same program reuses the functions that were already built.
+    """
+    namespace = {}
+    code = compile(generate_source(file_format, start, words, memory_size), f"<uvsim block {start:03d}>", "exec")
+    exec(code, namespace)
+    return namespace["block"]
+
+
+class BlockCompiler:
+    """
+    Runs a UVSim program block by block. One instance is used per execute()
+    call, because memory may be edited directly between runs.
+    """
+
+    def __init__(self, simulator):
+        self.simulator = simulator
+        self.blocks = {}                                  # start address -> compiled block
+        self.extents = {}                                 # start address -> end address
+        self.owners = [[] for _ in simulator.memory]      # address -> starts of blocks covering it
+        self.written = set()                              # code addresses written after compiling
+
+    def find_block(self, start):
+        """
+        Returns the words of the block that begins at the start address.
+        A block stops after a terminator, before an address that has been
+        written, and after a READ or STORE that writes further into itself.
+        """
+        memory = self.simulator.memory
+        file_format = self.simulator.file_format
+        size = self.simulator.memory_size
+        end = start
+        while end < size:
+            if end != start and end in self.written:
+                break
+            opcode, operand = split_word(memory[end], file_format)
+            end += 1
+            if operand >= size or opcode in TERMINATORS or opcode not in KNOWN_OPCODES:
+                break
+
+        for address in range(start, end):
+            opcode, operand = split_word(memory[address], file_format)
+            if (opcode == 10 or opcode == 21) and address < operand < end:
+                end = address + 1
+                break
+        return tuple(memory[start:end])
+
+    def compile_at(self, start):
+        words = self.find_block(start)
+        block = compile_block(self.simulator.file_format, start, words, self.simulator.memory_size)
+        end = start + len(words)
+        self.blocks[start] = block
+        self.extents[start] = end
+        for address in range(start, end):
+            self.owners[address].append(start)
+        return block
+
+    def note_write(self, address):
+        """
+        Drops every compiled block that covers a written address. The address
+        is interpreted from then on.
+        """
+        self.written.add(address)
+        for start in self.owners[address][:]:
+            del self.blocks[start]
+            for covered in range(start, self.extents.pop(start)):
+                self.owners[covered].remove(start)
+
+    def step(self, address):
+        """
+        Interprets a single instruction with the simulator's own handlers.
+        """
+        simulator = self.simulator
+        opcode, operand = simulator.decode(address)
+        simulator.program_counter = address + 1
+        simulator.instruction_count += 1
+        if operand < 0 or operand >= simulator.memory_size:
+            simulator.op_invalid_address(operand)
+            return
+        simulator.handler_for(opcode)(operand)
+        if (opcode == 10 or opcode == 21) and self.owners[operand]:
+            self.note_write(operand)
+
+    def run(self):
+        simulator = self.simulator
+        memory = simulator.memory
+        blocks = self.blocks
+        owners = self.owners
+        note_write = self.note_write
+        size = simulator.memory_size
+        while simulator.running and simulator.program_counter < size:
+            address = simulator.program_counter
+            block = blocks.get(address)
+            if block is None:
+                if address in self.written:
+                    self.step(address)
+                    continue
+                block = self.compile_at(address)
+            simulator.program_counter = block(simulator, memory, owners, note_write)
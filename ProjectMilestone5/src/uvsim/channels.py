@@ -0,0 +1,255 @@
+"""
+Input sources and output sinks for UVSim.
+
+An input source hands READ one raw value at a time through read(). An
+output sink receives WRITE values through write() and status messages
+through message(). Sinks buffer what they receive and pass it on when
+flush() is called or when the buffer reaches its threshold. The simulator
+flushes its sink before every READ and when a run stops.
+"""
+import collections
+import sys
+
+
+class InputPending(Exception):
+    """
+    Raised by an input source that has no value yet. UVSim.run_slice stops
+    before the READ and runs it again once a value has been supplied.
+    """
+
+
+class InputSource:
+    def read(self):
+        raise NotImplementedError
+
+
+class ConsoleInput(InputSource):
+    """
+    Prompts for each value on the console.
+    """
+
+    def read(self):
+        return input("Enter a number: ")
+
+
+class IteratorInput(InputSource):
+    """
+    Takes values from any iterable, e.g. a list of numbers.
+    """
+
+    def __init__(self, values):
+        self.values = iter(values)
+
+    def read(self):
+        try:
+            return next(self.values)
+        except StopIteration:
+            raise ValueError("Invalid input - no more input available.")
+
+
+class FileInput(InputSource):
+    """
+    Reads one value per line from an open file or a file name. Blank lines
+    are skipped.
+    """
+
+    def __init__(self, file):
+        self.file = open(file, 'r') if isinstance(file, str) else file
+
+    def read(self):
+        for line in self.file:
+            line = line.strip()
+            if line:
+                return line
+        raise ValueError("Invalid input - no more input available.")
+
+
+class QueueInput(InputSource):
+    """
+    Waits for values on a queue.Queue. Putting None on the queue, or nothing
+    arriving within the timeout, ends the input.
+    """
+
+    def __init__(self, values, timeout=None):
+        import queue  # Imported on use, so a plain run does not load threading
+        self.values = values
+        self.timeout = timeout
+        self.empty = queue.Empty
+
+    def read(self):
+        try:
+            value = self.values.get(timeout=self.timeout)
+        except self.empty:
+            value = None
+        if value is None:
+            raise ValueError("Invalid input - no more input available.")
+        return value
+
+
+class PendingInput(InputSource):
+    """
+    Holds values supplied with feed(). Reading with nothing fed raises
+    InputPending instead of waiting. Feeding None ends the input.
+    """
+
+    def __init__(self):
+        self.values = collections.deque()
+
+    def feed(self, value):
+        self.values.append(value)
+
+    def read(self):
+        if not self.values:
+            raise InputPending()
+        value = self.values.popleft()
+        if value is None:
+            raise ValueError("Invalid input - no more input available.")
+        return value
+
+
+class OutputSink:
+    """
+    Base sink. Collects WRITE values and messages in a buffer and hands
+    them to emit() in batches of up to threshold entries. Each buffered
+    entry is a (kind, item) pair, kind being 'value' or 'message'.
+    """
+
+    def __init__(self, threshold=256):
+        self.threshold = threshold
+        self.buffer = []
+
+    def write(self, value):
+        self.buffer.append(('value', value))
+        if len(self.buffer) >= self.threshold:
+            self.flush()
+
+    def message(self, text):
+        self.buffer.append(('message', text))
+        if len(self.buffer) >= self.threshold:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            entries = self.buffer
+            self.buffer = []
+            self.emit(entries)
+
+    def emit(self, entries):
+        raise NotImplementedError
+
+    def close(self):
+        self.flush()
+
+
+class ConsoleOutput(OutputSink):
+    """
+    Prints values and messages the way the simulator always has. Output
+    goes to whatever sys.stdout is when the buffer is flushed.
+    """
+
+    def emit(self, entries):
+        lines = [f"Output: {item}" if kind == 'value' else item for kind, item in entries]
+        sys.stdout.write("\n".join(lines) + "\n")
+
+
+class ListOutput(OutputSink):
+    """
+    Keeps WRITE values in a list (values) and messages in another
+    (messages). Nothing is buffered, so both lists are always current.
+    """
+
+    def __init__(self, values=None):
+        super().__init__(threshold=1)
+        self.values = values if values is not None else []
+        self.messages = []
+
+    def write(self, value):
+        self.values.append(value)
+
+    def message(self, text):
+        self.messages.append(text)
+
+    def emit(self, entries):
+        pass
+
+
+class FileOutput(OutputSink):
+    """
+    Writes one WRITE value per line to an open file or a file name.
+    Messages are kept in the messages list and written only when
+    include_messages is set.
+    """
+
+    def __init__(self, file, threshold=4096, include_messages=False):
+        super().__init__(threshold)
+        self.owns_file = isinstance(file, str)
+        self.file = open(file, 'w') if self.owns_file else file
+        self.include_messages = include_messages
+        self.messages = []
+
+    def emit(self, entries):
+        lines = []
+        for kind, item in entries:
+            if kind == 'value':
+                lines.append(f"{item}\n")
+            else:
+                self.messages.append(item)
+                if self.include_messages:
+                    lines.append(f"{item}\n")
+        self.file.write("".join(lines))
+        self.file.flush()
+
+    def close(self):
+        super().close()
+        if self.owns_file:
+            self.file.close()
+
+
+class CallbackOutput(OutputSink):
+    """
+    Calls callback(values, messages) with each flushed batch.
+    """
+
+    def __init__(self, callback, threshold=256):
+        super().__init__(threshold)
+        self.callback = callback
+
+    def emit(self, entries):
+        values = [item for kind, item in entries if kind == 'value']
+        messages = [item for kind, item in entries if kind == 'message']
+        self.callback(values, messages)
+
+
+def make_input(source):
+    """
+    Wraps an iterable, open file, file name or queue in the matching input
+    source. None means the console.
+    """
+    if source is None:
+        return ConsoleInput()
+    if isinstance(source, InputSource):
+        return source
+    queue = sys.modules.get('queue')  # A queue.Queue can only exist once queue is imported
+    if queue is not None and isinstance(source, queue.Queue):
+        return QueueInput(source)
+    if isinstance(source, str) or hasattr(source, 'readline'):
+        return FileInput(source)
+    return IteratorInput(source)
+
+
+def make_output(sink):
+    """
+    Wraps a list, open file or callable in the matching output sink. None
+    means the console.
+    """
+    if sink is None:
+        return ConsoleOutput()
+    if isinstance(sink, OutputSink):
+        return sink
+    if isinstance(sink, list):
+        return ListOutput(sink)
+    if hasattr(sink, 'write'):
+        return FileOutput(sink)
+    if callable(sink):
+        return CallbackOutput(sink)
+    raise ValueError(f"Unsupported output sink {sink!r}.")
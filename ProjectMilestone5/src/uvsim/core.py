@@ -0,0 +1,632 @@
+import sys
+from array import array
+
+from .channels import InputPending, make_input, make_output
+from .debugger import ExecutionBreak
+
+
+class UVSim:
+    ENGINES = ('table', 'reference', 'compiled', 'fused')
+
+    def __init__(self, engine='table', input_source=None, output_sink=None, memory_size=250):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine '{engine}'. Choose one of: {', '.join(self.ENGINES)}.")
+        if memory_size < 1:
+            raise ValueError("Memory size must be at least 1 word.")
+        self.memory_size = memory_size
+        self.memory = array('i', bytes(4 * memory_size))  # 32-bit words, zero-filled
+        self.accumulator = 0     
+        self.program_counter = 0 
+        self.running = True      
+        self.file_format = None  
+        self.decoded = [None] * memory_size  # Cache of decoded instructions per address
+        self.engine = engine
+        self.word_limit = 9999
+        self.instruction_count = 0
+        self.halt_reason = None  # Why the last run stopped, e.g. 'halt' or 'overflow'
+        self.input_source = make_input(input_source)   # Where READ gets its values (console by default)
+        self.output_sink = make_output(output_sink)    # Where WRITE values and messages go (console by default)
+        self.observers = []  # Profilers and other per-step observers, see attach()
+        self.dispatch_table = self.build_dispatch_table()
+
+    def load_program_from_file(self, filename):
+        """
+        Loads a program from a file into memory.
+        Supports both old (4-digit) and new (6-digit) formats.
+        Ensures that the file does not exceed the memory size and that every
+        instruction uses the same number of digits.
+        """
+        try:
+            instruction_count = 0
+            detected_format = None  # This will be either 'old' or 'new'
+            with open(filename, 'r') as file:
+                for line in file:
+                    line = line.strip()
+                    if not line:
+                        continue
+
+                    # Check for a termination code (adjust as needed)
+                    if line == "-99999" or line == "-9999":
+                        break
+
+                    # Determine file format from the first valid line
+                    if detected_format is None:
+                        if len(line) == 4:
+                            detected_format = 'old'
+                        elif len(line) == 6:
+                            detected_format = 'new'
+                        else:
+                            self.output_sink.message("Error - word length. Use either 4-digit or 6-digit code.")
+                            return False
+                        self.file_format = detected_format 
+
+                    # Enforce uniform word format across the entire file
+                    expected_length = 4 if detected_format == 'old' else 6
+                    if len(line) != expected_length:
+                        self.output_sink.message("Error - mixed word formats detected. File must consist of only 4-digit or 6-digit code.")
+                        return False
+
+                    # Prevent files from having more commands than memory can hold
+                    if instruction_count >= self.memory_size:
+                        self.output_sink.message(f"Error - File exceeds the maximum program size of {self.memory_size} lines.")
+                        return False
+
+                    try:
+                        # Convert the instruction from the file to an integer
+                        word = int(line)
+                        # Validate the numerical value depending on file format:
+                        if detected_format == 'old':
+                            if not -9999 <= word <= 9999:
+                                self.output_sink.message(f"Warning - Invalid number {word} at line {instruction_count+1}. Must be between -9999 and 9999.")
+                                continue
+                        else:  # new format
+                            if not -99999 <= word <= 99999:
+                                self.output_sink.message(f"Warning - Invalid number {word} at line {instruction_count+1}. Must be between -99999 and 99999.")
+                                continue
+
+                        self.memory[instruction_count] = word
+                        instruction_count += 1
+                    except ValueError:
+                        self.output_sink.message(f"Error - Invalid instruction format at line {instruction_count + 1}.")
+                        return False
+
+            self.invalidate_decoded()
+            self.output_sink.message(f"Loaded {instruction_count} instructions successfully ({detected_format} format).")
+            return True
+
+        except FileNotFoundError:
+            self.output_sink.message(f"Error - Could not find file '{filename}'")
+            return False
+        except Exception as e:
+            self.output_sink.message(f"Error loading file - {str(e)}")
+            return False
+        finally:
+            self.output_sink.flush()
+
+    def load_program_fast(self, filename, cache=None):
+        """
+        Loads a program with the bulk loader in loader.py, which reads the
+        whole file at once and reports every warning and error instead of
+        stopping at the first. With a ProgramCache (see programcache.py), a
+        file that was parsed before is not parsed again. Returns the
+        LoadResult, which is false when the file was rejected.
+        """
+        if cache is not None:
+            result = cache.load(filename, self.memory_size)
+        else:
+            from .loader import load_program
+            result = load_program(filename, self.memory_size)
+        for message in result.messages():
+            self.output_sink.message(message)
+        if result.ok:
+            self.memory[:len(result.words)] = result.words
+            if result.file_format is not None:
+                self.file_format = result.file_format
+            self.invalidate_decoded()
+            self.output_sink.message(f"Loaded {len(result.words)} instructions successfully ({result.file_format} format).")
+        self.output_sink.flush()
+        return result
+
+    def load_image(self, filename):
+        """
+        Loads a binary program image (see image.py). The file is memory-mapped
+        and its words are copied into memory as one block, without parsing.
+        Memory is resized to the image's memory size and the program counter
+        starts at the image's entry point.
+        """
+        from .image import HEADER, ImageError, map_image
+        try:
+            header, mapping = map_image(filename)
+        except (OSError, ImageError) as e:
+            self.output_sink.message(f"Error loading image - {str(e)}")
+            self.output_sink.flush()
+            return False
+
+        count = header.word_count
+        if header.memory_size != self.memory_size:
+            self.resize_memory(header.memory_size)
+        else:
+            self.memory[count:] = array('i', bytes(4 * (self.memory_size - count)))
+        with mapping, memoryview(mapping) as view:
+            memoryview(self.memory).cast('B')[:4 * count] = view[HEADER.size:HEADER.size + 4 * count]
+        if sys.byteorder != 'little':
+            words = self.memory[:count]
+            words.byteswap()
+            self.memory[:count] = words
+
+        limit = 9999 if header.file_format == 'old' else 99999
+        if count and (min(self.memory[:count]) < -limit or max(self.memory[:count]) > limit):
+            self.memory[:count] = array('i', bytes(4 * count))
+            self.output_sink.message(f"Error loading image - words must be between {-limit} and {limit}.")
+            self.output_sink.flush()
+            return False
+
+        self.file_format = header.file_format
+        self.program_counter = header.entry_point
+        self.invalidate_decoded()
+        self.output_sink.message(f"Loaded {count} instructions successfully ({header.file_format} format).")
+        self.output_sink.flush()
+        return True
+
+    def resize_memory(self, memory_size):
+        """
+        Replaces memory with a zero-filled memory of a new size.
+        """
+        self.memory_size = memory_size
+        self.memory = array('i', bytes(4 * memory_size))
+        self.invalidate_decoded()
+
+    def load_words(self, words, start=0):
+        """
+        Copies a sequence of words into memory starting at the given address.
+        """
+        self.memory[start:start + len(words)] = array('i', words)
+        self.invalidate_decoded()
+
+    def snapshot_memory(self):
+        """
+        Returns a copy of memory. Copying an array is a single buffer copy.
+        """
+        return self.memory[:]
+
+    def restore_memory(self, snapshot):
+        """
+        Puts back a copy made by snapshot_memory().
+        """
+        self.memory[:] = snapshot
+        self.invalidate_decoded()
+
+    def get_input(self):
+        """
+        Function for input that can be overridden in tests for easier mock inputs.
+        Reads from the input source given to the constructor (the console by default).
+        """
+        return self.input_source.read()
+
+    def invalidate_decoded(self):
+        """
+        Clears the decoded-program cache so every address is decoded again
+        on its next fetch.
+        """
+        self.decoded = [None] * len(self.memory)
+
+    def decode(self, address):
+        """
+        Decodes the word at the given address into an (opcode, operand) pair
+        based on file digit size (4 or 6 digits).
+        """
+        instruction = abs(self.memory[address])
+        if self.file_format == 'old':
+            return instruction // 100, instruction % 100    # 2-digit opcode and operand
+        return instruction // 1000, instruction % 1000      # 3-digit opcode (e.g., 010 becomes 10) and operand
+
+    def decode_handler(self, address):
+        """
+        Decodes the word at the given address into a (handler, operand) pair
+        for the table engine and caches the result.
+        """
+        opcode, operand = self.decode(address)
+        if operand < 0 or operand >= self.memory_size:
+            entry = (self.op_invalid_address, operand)
+        else:
+            entry = (self.handler_for(opcode), operand)
+        self.decoded[address] = entry
+        return entry
+
+    def handler_for(self, opcode):
+        """
+        Returns the table handler for the opcode. A 6-digit word can hold
+        opcodes up to 999, past the end of the table; those report the
+        invalid opcode like any unused one.
+        """
+        if 0 <= opcode < len(self.dispatch_table):
+            return self.dispatch_table[opcode]
+        return self.invalid_handler(opcode)
+
+    def build_dispatch_table(self):
+        """
+        Builds the handler table indexed by opcode. Every unused opcode maps
+        to a handler that reports the invalid opcode.
+        """
+        table = [self.invalid_handler(opcode) for opcode in range(100)]
+        table[10] = self.op_read
+        table[11] = self.op_write
+        table[20] = self.op_load
+        table[21] = self.op_store
+        table[30] = self.op_add
+        table[31] = self.op_subtract
+        table[32] = self.op_divide
+        table[33] = self.op_multiply
+        table[40] = self.op_branch
+        table[41] = self.op_branchneg
+        table[42] = self.op_branchzero
+        table[43] = self.op_halt
+        return table
+
+    def invalid_handler(self, opcode):
+        # A closure rather than functools.partial, which would add to startup time
+        def handler(operand):
+            self.op_invalid(opcode, operand)
+        return handler
+
+    def execute(self):
+        if not self.start():
+            return
+        try:
+            if self.observers:
+                self.run_observed()
+            elif self.engine == 'reference':
+                self.run_reference()
+            elif self.engine == 'compiled':
+                self.run_compiled()
+            elif self.engine == 'fused':
+                self.run_fused()
+            else:
+                self.run_table()
+            self.finish()
+        except ExecutionBreak as e:
+            # Stopped before an instruction by a breakpoint or watchpoint (see debugger.py)
+            self.output_sink.message(str(e))
+            self.halt_reason = 'breakpoint'
+        finally:
+            self.output_sink.flush()
+
+    def start(self):
+        """
+        Prepares a run. Returns False, after reporting why, when the loaded
+        program cannot be executed.
+        """
+        self.output_sink.message("\n*** Program execution begins ***")
+        if self.file_format != 'old' and self.file_format != 'new':
+            if self.running and self.program_counter < self.memory_size:
+                self.output_sink.message("Error - File format not recognized. Cannot execute program.")
+                self.halt_reason = 'unknown_format'
+            self.output_sink.message(f"Final Accumulator Value - {self.accumulator}")
+            self.output_sink.flush()
+            return False
+
+        # Memory may have been edited directly since the last run (GUI, tests),
+        # so start from an empty cache and decode each address on first fetch.
+        self.invalidate_decoded()
+        self.word_limit = 9999 if self.file_format == 'old' else 99999
+        self.instruction_count = 0
+        return True
+
+    def finish(self):
+        if self.running and self.program_counter >= self.memory_size:
+            self.halt_reason = 'end_of_memory'
+        self.output_sink.message(f"Final Accumulator Value - {self.accumulator}")
+
+    def run_slice(self, max_steps=None):
+        """
+        Resumable version of execute(), for use after start(). Runs at most
+        max_steps instructions with the table engine's handlers and returns
+        'input' when a READ finds no value yet (see channels.PendingInput),
+        'break' when a breakpoint or watchpoint stopped it (see debugger.py),
+        'paused' when the steps ran out, or 'stopped' once the program has
+        ended and finish() has run. Call again to carry on. Attached
+        observers are called as in execute(); a READ that has to wait gets
+        before_step again, but no after_step, until its value arrives.
+        """
+        decoded = self.decoded
+        decode_handler = self.decode_handler
+        size = self.memory_size
+        limit = max_steps if max_steps is not None else float('inf')
+        count = 0
+        try:
+            if self.observers:
+                self.run_observed(max_steps)
+            else:
+                while self.running and self.program_counter < size and count < limit:
+                    handler, operand = decoded[self.program_counter] or decode_handler(self.program_counter)
+                    self.program_counter += 1
+                    count += 1
+                    handler(operand)
+        except InputPending:
+            # Step back so the READ runs again once its value arrives
+            self.program_counter -= 1
+            count -= 1
+            return 'input'
+        except ExecutionBreak as e:
+            self.output_sink.message(str(e))
+            return 'break'
+        finally:
+            self.instruction_count += count
+        if self.running and self.program_counter < size:
+            return 'paused'
+        self.finish()
+        self.output_sink.flush()
+        return 'stopped'
+
+    def run_table(self):
+        """
+        Runs the loaded program with the table engine. Each cached entry holds
+        the handler for its opcode, so a cycle is one lookup and one call.
+        """
+        decoded = self.decoded
+        decode_handler = self.decode_handler
+        size = self.memory_size
+        count = 0
+        try:
+            while self.running and self.program_counter < size:
+                handler, operand = decoded[self.program_counter] or decode_handler(self.program_counter)
+                self.program_counter += 1
+                count += 1
+                handler(operand)
+        finally:
+            self.instruction_count += count
+
+    def run_compiled(self):
+        """
+        Runs the loaded program as compiled basic blocks (see blockcompiler.py).
+        """
+        from .blockcompiler import BlockCompiler
+        BlockCompiler(self).run()
+
+    def run_fused(self):
+        """
+        Runs the loaded program with common instruction sequences fused into
+        single superinstructions (see peephole.py).
+        """
+        from .peephole import FusedEngine
+        FusedEngine(self).run()
+
+    def attach(self, observer):
+        """
+        Attaches an observer such as a profiler.Profiler. While any observer
+        is attached, execute() runs the observed loop, which calls
+        observer.before_step and observer.after_step with
+        (simulator, address, opcode, operand) around every instruction.
+        """
+        self.observers.append(observer)
+
+    def detach(self, observer):
+        self.observers.remove(observer)
+
+    def run_observed(self, max_steps=None):
+        """
+        Runs the loaded program with the table engine's handlers, calling the
+        attached observers around each instruction. Used in place of the
+        selected engine so the other loops carry no observer checks. Runs at
+        most max_steps instructions when given.
+        """
+        decoded = self.decoded
+        decode_handler = self.decode_handler
+        decode = self.decode
+        observers = list(self.observers)
+        size = self.memory_size
+        limit = max_steps if max_steps is not None else float('inf')
+        count = 0
+        try:
+            while self.running and self.program_counter < size and count < limit:
+                address = self.program_counter
+                handler, operand = decoded[address] or decode_handler(address)
+                opcode = decode(address)[0]
+                for observer in observers:
+                    observer.before_step(self, address, opcode, operand)
+                self.program_counter += 1
+                count += 1
+                handler(operand)
+                for observer in observers:
+                    observer.after_step(self, address, opcode, operand)
+        finally:
+            self.instruction_count += count
+
+    def op_read(self, operand):
+        try:
+            self.output_sink.flush()  # Show pending output before asking for input
+            value = int(self.get_input())
+            if not -self.word_limit <= value <= self.word_limit:
+                if self.file_format == 'old':
+                    raise ValueError("Invalid input - must be a 4-digit number.")
+                raise ValueError("Invalid input - must be a 6-digit number.")
+            self.memory[operand] = value
+            self.decoded[operand] = None  # The cell may hold code, decode it again
+        except ValueError as e:
+            self.halt_reason = 'invalid_input'
+            raise ValueError(str(e))
+
+    def op_write(self, operand):
+        self.output_sink.write(self.memory[operand])
+
+    def op_load(self, operand):
+        self.accumulator = self.memory[operand]
+
+    def op_store(self, operand):
+        self.memory[operand] = self.accumulator
+        self.decoded[operand] = None  # The cell may hold code, decode it again
+
+    def op_add(self, operand):
+        self.accumulator += self.memory[operand]
+        # Check for overflow
+        if not -self.word_limit <= self.accumulator <= self.word_limit:
+            self.output_sink.message("Overflow error in ADD operation.")
+            self.running = False
+            self.halt_reason = 'overflow'
+
+    def op_subtract(self, operand):
+        self.accumulator -= self.memory[operand]
+        if not -self.word_limit <= self.accumulator <= self.word_limit:
+            self.output_sink.message("Overflow error in SUBTRACT operation.")
+            self.running = False
+            self.halt_reason = 'overflow'
+
+    def op_divide(self, operand):
+        if self.memory[operand] != 0:
+            self.accumulator //= self.memory[operand]
+        else:
+            self.output_sink.message("Error: Division by zero.")
+            self.running = False
+            self.halt_reason = 'divide_by_zero'
+
+    def op_multiply(self, operand):
+        self.accumulator *= self.memory[operand]
+        if not -self.word_limit <= self.accumulator <= self.word_limit:
+            self.output_sink.message("Overflow error in MULTIPLY operation.")
+            self.running = False
+            self.halt_reason = 'overflow'
+
+    def op_branch(self, operand):
+        self.program_counter = operand
+
+    def op_branchneg(self, operand):
+        if self.accumulator < 0:
+            self.program_counter = operand
+
+    def op_branchzero(self, operand):
+        if self.accumulator == 0:
+            self.program_counter = operand
+
+    def op_halt(self, operand):
+        self.output_sink.message("*** Program terminated normally ***")
+        self.running = False
+        self.halt_reason = 'halt'
+
+    def op_invalid(self, opcode, operand):
+        self.output_sink.message(f"Error - Invalid opcode {opcode}.")
+        self.running = False
+        self.halt_reason = 'invalid_opcode'
+
+    def op_invalid_address(self, operand):
+        # The address is checked before the program counter moves on
+        self.program_counter -= 1
+        self.instruction_count -= 1
+        self.output_sink.message(f"Error - Invalid memory address {operand}. Must be between 000 and {self.memory_size - 1:03d}.")
+        self.running = False
+        self.halt_reason = 'invalid_address'
+
+    def run_reference(self):
+        """
+        Runs the loaded program with the reference engine, which walks the
+        opcode chain on every cycle. Kept for cross-checking the table engine.
+        """
+        decoded = self.decoded
+        word_limit = self.word_limit
+        size = self.memory_size
+        count = 0
+        try:
+            while self.running and self.program_counter < size:
+                entry = decoded[self.program_counter]
+                if entry is None:
+                    entry = decoded[self.program_counter] = self.decode(self.program_counter)
+                opcode, operand = entry
+
+                # Validate operand (memory address should be within memory or send error)
+                if operand < 0 or operand >= size:
+                    self.output_sink.message(f"Error - Invalid memory address {operand}. Must be between 000 and {size - 1:03d}.")
+                    self.running = False
+                    self.halt_reason = 'invalid_address'
+                    break
+
+                self.program_counter += 1
+                count += 1
+
+                # Process instructions based on opcode
+                if opcode == 10:   # READ
+                    try:
+                        self.output_sink.flush()  # Show pending output before asking for input
+                        value = int(self.get_input())
+                        if not -word_limit <= value <= word_limit:
+                            if self.file_format == 'old':
+                                raise ValueError("Invalid input - must be a 4-digit number.")
+                            raise ValueError("Invalid input - must be a 6-digit number.")
+                        self.memory[operand] = value
+                        decoded[operand] = None  # The cell may hold code, decode it again
+                    except ValueError as e:
+                        self.halt_reason = 'invalid_input'
+                        raise ValueError(str(e))
+
+                elif opcode == 11:  # WRITE
+                    self.output_sink.write(self.memory[operand])
+
+                elif opcode == 20:  # LOAD
+                    self.accumulator = self.memory[operand]
+
+                elif opcode == 21:  # STORE
+                    self.memory[operand] = self.accumulator
+                    decoded[operand] = None  # The cell may hold code, decode it again
+
+                elif opcode == 30:  # ADD
+                    self.accumulator += self.memory[operand]
+                    # Check for overflow
+                    if not -word_limit <= self.accumulator <= word_limit:
+                        self.output_sink.message("Overflow error in ADD operation.")
+                        self.running = False
+                        self.halt_reason = 'overflow'
+
+                elif opcode == 31:  # SUBTRACT
+                    self.accumulator -= self.memory[operand]
+                    if not -word_limit <= self.accumulator <= word_limit:
+                        self.output_sink.message("Overflow error in SUBTRACT operation.")
+                        self.running = False
+                        self.halt_reason = 'overflow'
+
+                elif opcode == 32:  # DIVIDE
+                    if self.memory[operand] != 0:
+                        self.accumulator //= self.memory[operand]
+                    else:
+                        self.output_sink.message("Error: Division by zero.")
+                        self.running = False
+                        self.halt_reason = 'divide_by_zero'
+
+                elif opcode == 33:  # MULTIPLY
+                    self.accumulator *= self.memory[operand]
+                    if not -word_limit <= self.accumulator <= word_limit:
+                        self.output_sink.message("Overflow error in MULTIPLY operation.")
+                        self.running = False
+                        self.halt_reason = 'overflow'
+
+                elif opcode == 40:  # BRANCH
+                    self.program_counter = operand
+
+                elif opcode == 41:  # BRANCHNEG
+                    if self.accumulator < 0:
+                        self.program_counter = operand
+
+                elif opcode == 42:  # BRANCHZERO
+                    if self.accumulator == 0:
+                        self.program_counter = operand
+
+                elif opcode == 43:  # HALT
+                    self.output_sink.message("*** Program terminated normally ***")
+                    self.running = False
+                    self.halt_reason = 'halt'
+
+                else:
+                    self.output_sink.message(f"Error - Invalid opcode {opcode}.")
+                    self.running = False
+                    self.halt_reason = 'invalid_opcode'
+        finally:
+            self.instruction_count += count
+
+def main():
+    while True:
+        simulator = UVSim()
+        print("Welcome to UVSim!")
+        filename = input("Enter the name of the input file: ")
+
+        if simulator.load_program_from_file(filename):
+            simulator.execute()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Non-termination detection for UVSim.
+
+Without input, a BasicML program is deterministic: if the machine ever
+returns to a state it was in before (same program counter, accumulator and
+memory), it will repeat the same steps forever. CycleDetector watches the
+machine state with Brent's cycle-finding algorithm and stops such a
+program with the halt reason 'non_terminating' instead of letting it spin:
+
+    simulator.attach(CycleDetector())
+    simulator.execute()
+
+Memory is fingerprinted with a hash that is updated on every READ and
+STORE rather than recomputed, so each step costs a few integer operations.
+A matching fingerprint is confirmed against a saved copy of memory, so a
+hash collision can never stop a program by mistake. A READ starts the
+search over, since the input can break the loop.
+"""
+import random
+from array import array
+
+MASK = (1 << 64) - 1
+
+
+class CycleDetector:
+    def __init__(self, seed=2450):
+        self.seed = seed
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets the watched program. Call between runs of the same simulator.
+        """
+        self.keys = None       # Random 64-bit key per address for the memory hash
+        self.memory_hash = 0
+        self.old_value = 0     # Value of the cell the current STORE or READ overwrites
+        self.restart()
+
+    def restart(self):
+        self.saved = None      # (program counter, accumulator, memory hash) being looked for
+        self.saved_memory = None
+        self.power = 1
+        self.length = 0        # Steps since the state was saved
+
+    def start(self, simulator):
+        generator = random.Random(self.seed)
+        self.keys = array('Q', (generator.getrandbits(64) for _ in range(len(simulator.memory))))
+        self.memory_hash = sum(key * word for key, word in zip(self.keys, simulator.memory)) & MASK
+
+    def before_step(self, simulator, address, opcode, operand):
+        if self.keys is None:
+            self.start(simulator)
+        if (opcode == 21 or opcode == 10) and operand < len(self.keys):
+            self.old_value = simulator.memory[operand]
+
+    def after_step(self, simulator, address, opcode, operand):
+        if (opcode == 21 or opcode == 10) and operand < len(self.keys):
+            change = simulator.memory[operand] - self.old_value
+            if change:
+                self.memory_hash = (self.memory_hash + self.keys[operand] * change) & MASK
+            if opcode == 10:
+                self.restart()
+                return
+        if not simulator.running:
+            return
+
+        state = (simulator.program_counter, simulator.accumulator, self.memory_hash)
+        self.length += 1
+        if state == self.saved and simulator.memory == self.saved_memory:
+            simulator.output_sink.message(f"Error - Program does not terminate. It repeats the same "
+                                          f"{self.length} instructions forever.")
+            simulator.running = False
+            simulator.halt_reason = 'non_terminating'
+            return
+        if self.length == self.power:
+            # Brent's algorithm: move the saved state up and double the distance
+            self.saved = state
+            self.saved_memory = simulator.memory[:]
+            self.power *= 2
+            self.length = 0
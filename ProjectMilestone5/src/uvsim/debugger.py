@@ -0,0 +1,170 @@
+"""
+Breakpoints and watchpoints for UVSim.
+
+A Debugger stops a run at program counter breakpoints, optionally only
+when a condition on the accumulator holds, and after instructions that
+read or write watched memory cells:
+
+    debugger = Debugger(simulator)
+    debugger.add_breakpoint(5)
+    debugger.add_breakpoint(12, "< 0")       # Only while the accumulator is negative
+    debugger.add_watchpoint(40, 'write')     # 'read', 'write' or 'access'
+    state = simulator.run_slice()            # 'break' when one of them was hit
+
+The debugger is an observer (see UVSim.attach) and attaches itself only
+while at least one breakpoint or watchpoint is set. With none set, the
+simulator runs its normal unhooked loop, so debugging support costs
+nothing. Changes take effect at the next run_slice().
+
+A breakpoint stops before its instruction runs; a watchpoint stops after
+the instruction that touched the cell, before the next one. Running on
+from a stop executes the instruction it stopped at.
+"""
+import operator
+
+READ_OPCODES = (11, 20, 30, 31, 32, 33)   # Opcodes that read the cell at their operand
+WRITE_OPCODES = (10, 21)                  # Opcodes that write it
+WATCH_MODES = ('read', 'write', 'access')
+COMPARISONS = {'==': operator.eq, '!=': operator.ne, '<=': operator.le,
+               '>=': operator.ge, '<': operator.lt, '>': operator.gt}
+
+
+class ExecutionBreak(Exception):
+    """
+    Raised by an observer's before_step to stop a run before that
+    instruction executes. UVSim.run_slice returns 'break' and execute()
+    returns with the program counter at the instruction.
+    """
+
+
+class Condition:
+    """
+    A comparison of the accumulator with a number, written like "< 0",
+    ">= 100" or "== 7".
+    """
+
+    def __init__(self, text):
+        text = text.strip()
+        for symbol in sorted(COMPARISONS, key=len, reverse=True):
+            if text.startswith(symbol):
+                try:
+                    self.value = int(text[len(symbol):])
+                except ValueError:
+                    break
+                self.symbol = symbol
+                self.compare = COMPARISONS[symbol]
+                return
+        raise ValueError(f"Invalid condition '{text}'. Use a comparison and a number, e.g. '< 0' or '== 7'.")
+
+    def __call__(self, accumulator):
+        return self.compare(accumulator, self.value)
+
+    def __str__(self):
+        return f"accumulator {self.symbol} {self.value}"
+
+
+class Debugger:
+    def __init__(self, simulator):
+        self.simulator = simulator
+        self.breakpoints = {}   # Address -> Condition, or None to always stop
+        self.watchpoints = {}   # Address -> 'read', 'write' or 'access'
+        self.hits = []          # Message of every stop so far
+        self.old_value = 0      # Value of the watched cell before the current instruction
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets where the last run stopped. Call before starting a new run.
+        """
+        self.resume_address = None  # Address a stop left off at; its breakpoint does not fire again
+        self.pending = None         # Message of a watchpoint hit, raised before the next instruction
+
+    @property
+    def active(self):
+        return bool(self.breakpoints or self.watchpoints)
+
+    def update(self):
+        """
+        Attaches the debugger while anything is set and detaches it otherwise.
+        """
+        attached = self in self.simulator.observers
+        if self.active and not attached:
+            self.simulator.attach(self)
+        elif not self.active and attached:
+            self.simulator.detach(self)
+            self.pending = None
+
+    def add_breakpoint(self, address, condition=None):
+        """
+        Stops before the instruction at address runs, or only when the
+        accumulator then satisfies condition (a Condition or its text).
+        """
+        self.check_address(address)
+        if isinstance(condition, str):
+            condition = Condition(condition) if condition.strip() else None
+        self.breakpoints[address] = condition
+        self.update()
+
+    def remove_breakpoint(self, address):
+        self.breakpoints.pop(address, None)
+        self.update()
+
+    def add_watchpoint(self, address, mode='write'):
+        """
+        Stops after any instruction that reads, writes or accesses (either)
+        the cell at address.
+        """
+        self.check_address(address)
+        if mode not in WATCH_MODES:
+            raise ValueError(f"Unknown watch mode '{mode}'. Choose one of: {', '.join(WATCH_MODES)}.")
+        self.watchpoints[address] = mode
+        self.update()
+
+    def remove_watchpoint(self, address):
+        self.watchpoints.pop(address, None)
+        self.update()
+
+    def clear(self):
+        self.breakpoints.clear()
+        self.watchpoints.clear()
+        self.update()
+
+    def check_address(self, address):
+        if not 0 <= address < self.simulator.memory_size:
+            raise ValueError(f"Invalid memory address {address}. "
+                             f"Must be between 000 and {self.simulator.memory_size - 1:03d}.")
+
+    def stop(self, address, message):
+        self.resume_address = address
+        self.hits.append(message)
+        raise ExecutionBreak(message)
+
+    def before_step(self, simulator, address, opcode, operand):
+        if self.pending is not None:
+            message, self.pending = self.pending, None
+            self.stop(address, message)
+        if address == self.resume_address:
+            self.resume_address = None
+        else:
+            self.resume_address = None
+            if address in self.breakpoints:
+                condition = self.breakpoints[address]
+                if condition is None:
+                    self.stop(address, f"Breakpoint at {address:03d}.")
+                if condition(simulator.accumulator):
+                    self.stop(address, f"Breakpoint at {address:03d} ({condition}).")
+        if operand in self.watchpoints:
+            self.old_value = simulator.memory[operand]
+
+    def after_step(self, simulator, address, opcode, operand):
+        if operand not in self.watchpoints:
+            return
+        mode = self.watchpoints[operand]
+        if opcode in WRITE_OPCODES and mode != 'read':
+            self.pending = (f"Watchpoint - {operand:03d} written by {address:03d}: "
+                            f"{self.old_value} -> {simulator.memory[operand]}.")
+        elif opcode in READ_OPCODES and mode != 'write':
+            self.pending = f"Watchpoint - {operand:03d} read by {address:03d}."
+        if self.pending is not None and not simulator.running:
+            self.hits.append(self.pending)  # The program is over; there is nothing to stop before
+            self.pending = None
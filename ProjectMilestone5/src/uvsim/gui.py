@@ -0,0 +1,585 @@
+import tkinter as tk
+from tkinter import ttk, scrolledtext, messagebox, filedialog, colorchooser, simpledialog
+from .core import UVSim as UVSimBackend
+from .analysis import analyze
+from .background import BackgroundRun
+from .debugger import Debugger
+from .memorygrid import MemoryGrid
+from .outputpane import OutputPane
+from .programcache import shared_cache
+from .timetravel import History
+
+class UVSimTab(ttk.Frame):
+    def __init__(self, parent):
+        super().__init__(parent)
+        
+        self.background_frame = tk.Frame(self, bg="#4C721D")
+        self.background_frame.pack(fill=tk.BOTH, expand=True)
+        
+        self.simulator = UVSimBackend()
+        self.memory = []
+        self.accumulator = 0
+        self.instruction_counter = 0
+        self.last_directory = ""
+        self.file_format = None
+        self.clipboard = None
+        self.primary_color = "#4C721D"
+        self.off_color = "#FFFFFF"
+        self.run = None  # BackgroundRun of the program being executed
+        self.memory_before_run = None  # Memory as it was when the current run started
+        self.history = History()  # Recording of the last run, for the Back and Forward buttons
+        self.recording = False    # Whether runs are recorded; an attached History slows every step
+        self.run_paused = False   # Whether the worker has stopped at a pause, so the history can be used
+        self.debugger = Debugger(self.simulator)  # Hooks into runs only while something is set
+        self.poll_interval = 16  # Milliseconds between checks on a running program (about 60 fps)
+        
+        self.create_widgets()
+
+    def create_widgets(self):
+        
+        # Instruction Input
+        self.instruction_label = tk.Label(self.background_frame, text="Enter a BasicML Command:", 
+                                         bg=self.primary_color, fg="white")
+        self.instruction_label.pack()
+
+        self.command_input = tk.Entry(self.background_frame, width=50, bg=self.off_color, fg="black")
+        self.command_input.pack(pady=5)
+
+        self.add_command_button = tk.Button(self.background_frame, text="Add to Memory", 
+                                           command=self.add_command, bg=self.off_color)
+        self.add_command_button.pack()
+
+        # File Format Indicator
+        self.format_label = tk.Label(self.background_frame, text="File Format: None", 
+                                    bg=self.primary_color, fg="white")
+        self.format_label.pack()
+
+        # Memory Display
+        self.memory_label = tk.Label(self.background_frame, text="Memory:", 
+                                    bg=self.primary_color, fg="white")
+        self.memory_label.pack()
+
+        self.memory_grid = MemoryGrid(self.background_frame, height=10, bg=self.off_color, fg="black")
+        self.memory_grid.pack(fill=tk.X, padx=10, pady=5)
+
+        # Control Buttons
+        self.button_frame = tk.Frame(self.background_frame, bg=self.primary_color)
+        self.button_frame.pack(pady=5)
+
+        buttons = [
+            ("Load Program", self.load_program),
+            ("Execute", self.execute_program),
+            ("Pause", self.pause_program),
+            ("Stop", self.stop_program),
+            ("Record", self.toggle_recording),
+            ("Back", self.step_back),
+            ("Forward", self.step_forward),
+            ("Breakpoint", self.toggle_breakpoint),
+            ("Watch", self.toggle_watchpoint),
+            ("Load from File", self.load_from_file),
+            ("Delete Command", self.delete_command),
+            ("Modify Command", self.modify_command),
+            ("Cut", self.cut_command),
+            ("Copy", self.copy_command),
+            ("Paste", self.paste_command),
+            ("Help", self.show_help),
+        ]
+        
+        for text, command in buttons:
+            button = tk.Button(self.button_frame, text=text, command=command, bg=self.off_color)
+            button.pack(side=tk.LEFT, padx=5)
+            if text == "Pause":
+                self.pause_button = button
+            elif text == "Record":
+                self.record_button = button
+
+        # Status Display
+        self.status_frame = tk.Frame(self.background_frame, bg=self.primary_color)
+        self.status_frame.pack(pady=5)
+
+        self.accumulator_label = tk.Label(self.status_frame, text=f"Accumulator: {self.accumulator}", 
+                                        bg=self.primary_color, fg="white")
+        self.accumulator_label.pack(side=tk.LEFT, padx=10)
+
+        self.instruction_counter_label = tk.Label(self.status_frame,
+                                                text=f"Instruction Counter: {self.instruction_counter}", 
+                                                bg=self.primary_color, fg="white")
+        self.instruction_counter_label.pack(side=tk.LEFT, padx=10)
+
+        # Output Display
+        self.output_label = tk.Label(self.background_frame, text="Output:", bg=self.primary_color, fg="white")
+        self.output_label.pack()
+
+        self.output_text = scrolledtext.ScrolledText(self.background_frame, height=10, state=tk.DISABLED,
+                                                     bg=self.off_color, fg="black")
+        self.output_text.pack(fill=tk.X, padx=10, pady=5)
+        self.output = OutputPane(self.output_text)  # Batches lines into the output pane
+        
+        bottom_buttons_frame = tk.Frame(self.background_frame, bg=self.primary_color)
+        bottom_buttons_frame.pack(pady=10)
+
+        self.change_colors_button = tk.Button(bottom_buttons_frame, text="Change Colors", 
+                                             command=self.change_colors, bg=self.off_color)
+        self.change_colors_button.pack(side=tk.LEFT)
+
+        self.analyze_button = tk.Button(bottom_buttons_frame, text="Analyze",
+                                        command=self.analyze_program, bg=self.off_color)
+        self.analyze_button.pack(side=tk.LEFT, padx=5)
+
+    def validate_command(self, command):
+        """Validates command format based on file_format."""
+        try:
+            instruction = int(command)
+            if not self.file_format:
+                if not -2**31 <= instruction < 2**31:  # Memory holds 32-bit words
+                    messagebox.showerror("Error", "Command must fit in a 32-bit memory word.")
+                    return False
+            elif self.file_format == 'old':
+                if not (len(command) == 4 and -9999 <= instruction <= 9999):
+                    messagebox.showerror("Error", "Command must be a 4-digit number (-9999 to 9999).")
+                    return False
+            else:
+                if not (len(command) == 6 and -99999 <= instruction <= 99999):
+                    messagebox.showerror("Error", "Command must be a 6-digit number (-99999 to 99999).")
+                    return False
+            return True
+        except ValueError:
+            messagebox.showerror("Error", "Invalid command. Must be an integer.")
+            return False
+
+    def check_memory_limit(self):
+        if len(self.memory) >= self.simulator.memory_size:
+            messagebox.showerror("Error", f"Memory limit of {self.simulator.memory_size} instructions reached.")
+            return False
+        return True
+
+    def add_command(self):
+        command = self.command_input.get().strip()
+        if command and self.validate_command(command) and self.check_memory_limit():
+            try:
+                instruction = int(command)
+                index = len(self.memory)
+                self.memory.append(instruction)
+                self.memory_grid.set_values(self.memory)
+                self.memory_grid.see(index)
+                self.command_input.delete(0, tk.END)
+                self.simulator.memory[index] = instruction
+            except ValueError:
+                messagebox.showerror("Error", "Invalid command. Must be an integer.")
+
+    def load_program(self):
+        if not self.memory:
+            messagebox.showerror("Error", "No commands in memory to load.")
+            return
+        self.output.write("Program loaded into memory.")
+
+    def execute_program(self):
+        if not self.memory:
+            messagebox.showerror("Error", "No program loaded. Add commands first.")
+            return
+        if self.run and self.run.is_alive():
+            messagebox.showerror("Error", "A program is already running. Stop it first.")
+            return
+        self.simulator.load_words(self.memory)
+        self.simulator.file_format = self.file_format
+        self.simulator.accumulator = 0
+        self.simulator.program_counter = 0
+        self.simulator.running = True
+        self.memory_before_run = self.simulator.snapshot_memory()
+        self.history.reset()
+        self.debugger.reset()
+        self.update_recording()
+        self.output.write("Executing program...")
+
+        # The program runs on a worker thread; poll_program picks up its output
+        self.run = BackgroundRun(self.simulator)
+        self.pause_button.config(text="Pause")
+        self.run_paused = False
+        self.run.start()
+        self.after(self.poll_interval, self.poll_program)
+
+    def poll_program(self):
+        """
+        Applies everything the running program reported since the last poll
+        and schedules the next poll until the run is over.
+        """
+        run = self.run
+        if run is None:
+            return
+        lines = []
+        state = None
+        done = False
+        for event in run.poll():
+            kind = event[0]
+            if kind == 'output':
+                lines.extend(f"Output: {value}" for value in event[1])
+                lines.extend(event[2])
+            elif kind == 'state':
+                state = event[1:]  # Only the latest registers are shown
+            elif kind == 'error':
+                lines.append(f"Execution error: {event[1]}")
+            elif kind == 'paused':
+                lines.append("Execution paused.")
+                self.run_paused = True
+            elif kind == 'break':
+                self.pause_button.config(text="Resume")
+                self.memory_grid.see(event[1])
+            elif kind == 'input':
+                self.show_output(lines)
+                lines = []
+                self.ask_input(run, event[1])
+            elif kind == 'done':
+                done = True
+        if state:
+            self.accumulator, self.instruction_counter, _ = state
+            self.accumulator_label.config(text=f"Accumulator: {self.accumulator}")
+            self.instruction_counter_label.config(text=f"Instruction Counter: {self.instruction_counter}")
+        if done:
+            lines.append(f"Execution complete.\nAccumulator: {self.accumulator}")
+            self.run = None
+            self.run_paused = False
+            self.pause_button.config(text="Pause")
+            self.show_memory_after_run()
+        self.show_output(lines)
+        if not done:
+            self.after(self.poll_interval, self.poll_program)
+
+    def show_output(self, lines):
+        if lines:
+            self.output.write("\n".join(lines))
+
+    def show_memory_after_run(self):
+        """
+        Shows the whole simulator memory with the cells the run changed
+        highlighted. The next edit goes back to showing the program.
+        """
+        memory, before = self.simulator.memory, self.memory_before_run
+        changed = [] if memory == before else [i for i in range(len(memory)) if memory[i] != before[i]]
+        self.memory_grid.set_values(memory, changed)
+        if changed:
+            self.memory_grid.see(changed[0])
+
+    def ask_input(self, run, address):
+        value = simpledialog.askstring("Input", f"Enter a number for address {address:03d}:", parent=self)
+        if value is None:
+            run.stop()
+        else:
+            run.send(value)
+
+    def pause_program(self):
+        if not self.run:
+            return
+        if self.run.paused:
+            self.run_paused = False
+            self.run.resume()
+            self.pause_button.config(text="Pause")
+        else:
+            self.run.pause()
+            self.pause_button.config(text="Resume")
+
+    def stop_program(self):
+        if self.run:
+            self.run.stop()
+
+    def toggle_recording(self):
+        """
+        Turns recording of runs on or off. It takes effect when the next
+        run starts, so a run is recorded from its first step or not at all.
+        """
+        self.recording = not self.recording
+        self.record_button.config(text="Stop Recording" if self.recording else "Record")
+        if self.recording:
+            self.output.write("Recording on - the next run can be stepped back through.")
+        else:
+            self.output.write("Recording off.")
+            if not self.run:
+                self.update_recording()
+
+    def update_recording(self):
+        """
+        Attaches the history while recording is on and detaches and clears
+        it otherwise.
+        """
+        attached = self.history in self.simulator.observers
+        if self.recording and not attached:
+            self.simulator.attach(self.history)
+        elif not self.recording and attached:
+            self.simulator.detach(self.history)
+            self.history.reset()
+
+    def step_back(self):
+        self.travel(self.history.back, "Already at the first recorded step.")
+
+    def step_forward(self):
+        self.travel(self.history.forward, "Already at the last recorded step.")
+
+    def travel(self, move, limit_message):
+        """
+        Moves the simulator one step through the recorded run, which is
+        only safe while the worker is paused or gone.
+        """
+        if self.run and not self.run_paused:
+            messagebox.showerror("Error", "Pause the program before stepping through it.")
+            return
+        if not self.history.end:
+            messagebox.showerror("Error", "No recorded run. Turn on Record and execute a program first.")
+            return
+        if not move(self.simulator):
+            self.output.write(limit_message)
+            return
+        simulator = self.simulator
+        self.accumulator = simulator.accumulator
+        self.instruction_counter = simulator.program_counter
+        self.accumulator_label.config(text=f"Accumulator: {self.accumulator}")
+        self.instruction_counter_label.config(text=f"Instruction Counter: {self.instruction_counter}")
+        self.show_memory_after_run()
+        self.memory_grid.see(simulator.program_counter)
+        self.output.write(f"Step {simulator.instruction_count} - next instruction at {simulator.program_counter:03d}.")
+
+    def toggle_breakpoint(self):
+        """
+        Sets or removes a breakpoint at the selected memory cell. A new
+        breakpoint can be limited to an accumulator condition such as "< 0".
+        """
+        try:
+            address = self.memory_grid.curselection()[0]
+        except IndexError:
+            messagebox.showerror("Error", "Select a memory cell for the breakpoint.")
+            return
+        if address in self.debugger.breakpoints:
+            self.debugger.remove_breakpoint(address)
+            self.output.write(f"Breakpoint at {address:03d} removed.")
+            return
+        condition = simpledialog.askstring("Breakpoint", f"Stop at {address:03d} only when the accumulator is "
+                                           "(e.g. < 0)?\nLeave empty to always stop.", parent=self)
+        if condition is None:
+            return
+        try:
+            self.debugger.add_breakpoint(address, condition)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.output.write(f"Breakpoint set at {address:03d}.")
+
+    def toggle_watchpoint(self):
+        """
+        Sets or removes a watchpoint on the selected memory cell.
+        """
+        try:
+            address = self.memory_grid.curselection()[0]
+        except IndexError:
+            messagebox.showerror("Error", "Select a memory cell to watch.")
+            return
+        if address in self.debugger.watchpoints:
+            self.debugger.remove_watchpoint(address)
+            self.output.write(f"Watchpoint on {address:03d} removed.")
+            return
+        mode = simpledialog.askstring("Watchpoint", f"Stop when {address:03d} is read, written or either "
+                                      "(read, write or access)?", initialvalue="write", parent=self)
+        if mode is None:
+            return
+        try:
+            self.debugger.add_watchpoint(address, mode.strip().lower())
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.output.write(f"Watching {address:03d} ({mode.strip().lower()}).")
+
+    def analyze_program(self):
+        if not self.memory:
+            messagebox.showerror("Error", "No program loaded. Add commands first.")
+            return
+        result = analyze(self.memory, self.file_format or 'old')
+        self.output.write(result.format_text())
+
+    def load_from_file(self):
+        file_path = filedialog.askopenfilename(
+            initialdir=self.last_directory,
+            title="Select Program File",
+            filetypes=(("Text files", "*.txt"), ("All files", "*.*"))
+        )
+        if file_path:
+            self.last_directory = file_path.rsplit('/', 1)[0]
+            result = self.simulator.load_program_fast(file_path, cache=shared_cache())
+            if result:
+                self.file_format = self.simulator.file_format
+                self.memory = list(self.simulator.memory[:len(result.words)])
+                self.memory_grid.set_values(self.memory)
+                self.format_label.config(text=f"File Format: {self.file_format or 'None'}")
+                self.output.write(f"Loaded program from {file_path} ({self.file_format} format)")
+
+    def save_to_file(self):
+        if not self.memory:
+            messagebox.showerror("Error", "No program in memory to save.")
+            return
+        file_path = filedialog.asksaveasfilename(
+            initialdir=self.last_directory,
+            title="Save Program As",
+            defaultextension=".txt",
+            filetypes=(("Text files", "*.txt"), ("All files", "*.*"))
+        )
+        if file_path:
+            self.last_directory = file_path.rsplit('/', 1)[0]
+            try:
+                with open(file_path, 'w') as file:
+                    for instruction in self.memory:
+                        if self.file_format == 'old':
+                            file.write(f"{instruction:04d}\n")
+                        else:
+                            file.write(f"{instruction:06d}\n")
+                self.output.write(f"Program saved to {file_path}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to save file: {str(e)}")
+
+    def show_help(self):
+        messagebox.showinfo("Help", "BasicML Commands:\n"
+                                  "10xxx - Read Input\n"
+                                  "11xxx - Write Output\n"
+                                  "20xxx - Load into Accumulator\n"
+                                  "21xxx - Store from Accumulator\n"
+                                  "30xxx - Add\n"
+                                  "31xxx - Subtract\n"
+                                  "32xxx - Divide\n"
+                                  "33xxx - Multiply\n"
+                                  "40xxx - Branch\n"
+                                  "41xxx - Branch if Negative\n"
+                                  "42xxx - Branch if Zero\n"
+                                  "43xxx - Halt\n"
+                                  "xxx is memory address (000-249)")
+
+    def change_colors(self):
+        primary_color = colorchooser.askcolor(title="Choose Primary Color")[1]
+        if primary_color:
+            self.primary_color = primary_color
+
+        off_color = colorchooser.askcolor(title="Choose Off Color")[1]
+        if off_color:
+            self.off_color = off_color
+
+        self.apply_colors()
+
+    def apply_colors(self):
+        # Update background frame color
+        self.background_frame.config(bg=self.primary_color)
+        
+        # Update labels and frames with primary color
+        for widget in [self.instruction_label,
+                    self.format_label,
+                    self.memory_label,
+                    self.output_label,
+                    *self.status_frame.winfo_children()]:
+            widget.config(bg=self.primary_color)
+        
+        for frame in [self.button_frame,
+                    self.status_frame]:
+            frame.config(bg=self.primary_color)
+        
+        for button in [self.add_command_button, 
+                    self.change_colors_button,
+                    self.analyze_button,
+                    *[child for child in self.button_frame.winfo_children() if isinstance(child, tk.Button)]]:
+            button.config(bg=self.off_color)
+        
+        for widget in [self.command_input,
+                    self.output_text]:
+            widget.config(bg=self.off_color)
+        self.memory_grid.set_colors(self.off_color)
+
+    def delete_command(self):
+        try:
+            index = self.memory_grid.curselection()[0]
+            self.memory.pop(index)
+            self.simulator.memory[index] = 0
+            self.memory_grid.set_values(self.memory)
+        except IndexError:
+            messagebox.showerror("Error", "Select a command to delete.")
+
+    def modify_command(self):
+        try:
+            index = self.memory_grid.curselection()[0]
+            command = self.command_input.get().strip()
+            if command and self.validate_command(command):
+                instruction = int(command)
+                self.memory[index] = instruction
+                self.simulator.memory[index] = instruction
+                if self.memory_grid.values is self.memory:
+                    self.memory_grid.update_rows([index])
+                else:
+                    self.memory_grid.set_values(self.memory)
+                self.command_input.delete(0, tk.END)
+        except (IndexError, ValueError):
+            messagebox.showerror("Error", "Invalid selection or command")
+
+    def copy_command(self):
+        try:
+            index = self.memory_grid.curselection()[0]
+            self.clipboard = str(self.memory[index])
+        except IndexError:
+            messagebox.showerror("Error", "Select a command to copy")
+
+    def cut_command(self):
+        try:
+            index = self.memory_grid.curselection()[0]
+            self.clipboard = str(self.memory[index])
+            self.memory.pop(index)
+            self.simulator.memory[index] = 0
+            self.memory_grid.set_values(self.memory)
+        except IndexError:
+            messagebox.showerror("Error", "Select a command to cut")
+
+    def paste_command(self):
+        if self.clipboard and self.check_memory_limit():
+            if self.validate_command(self.clipboard):
+                try:
+                    instruction = int(self.clipboard)
+                    index = len(self.memory)
+                    self.memory.append(instruction)
+                    self.simulator.memory[index] = instruction
+                    self.memory_grid.set_values(self.memory)
+                    self.memory_grid.see(index)
+                except ValueError:
+                    messagebox.showerror("Error", "Invalid command")
+            else:
+                messagebox.showerror("Error", "Invalid format for pasted command")
+        else:
+            messagebox.showerror("Error", "Nothing to paste or memory full")
+
+class UVSimApp(tk.Tk):
+    def __init__(self):
+        super().__init__()
+        self.title("UVSim - BasicML Simulator")
+        self.geometry("700x630")
+        
+        # Create Notebook
+        self.notebook = ttk.Notebook(self)
+        self.notebook.pack(expand=True, fill="both")
+        
+        # Add first tab
+        self.add_tab()
+        
+        # Menu for tabs
+        menubar = tk.Menu(self)
+        self.config(menu=menubar)
+        file_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="File", menu=file_menu)
+        file_menu.add_command(label="New Tab", command=self.add_tab)
+        file_menu.add_command(label="Close Tab", command=self.close_tab)
+        file_menu.add_separator()
+        file_menu.add_command(label="Exit", command=self.destroy)
+
+    def add_tab(self):
+        new_tab = UVSimTab(self.notebook)
+        self.notebook.add(new_tab, text=f"Tab {self.notebook.index('end')+1}")
+
+    def close_tab(self):
+        if self.notebook.index("end") > 1:
+            tab = self.nametowidget(self.notebook.select())
+            tab.stop_program()
+            self.notebook.forget(tab)
+
+def main():
+    app = UVSimApp()
+    app.mainloop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Binary program images for UVSim.
+
+An image is a 24-byte header followed by the program's words as packed
+little-endian 32-bit integers, so it can be copied straight into a
+simulator's memory without parsing:
+
+    offset  size  field
+    0       4     magic, b"UVSI"
+    4       2     format version (1)
+    6       1     word digits, 4 (old format) or 6 (new format)
+    7       1     reserved, 0
+    8       4     memory size in words
+    12      4     entry point (first program counter)
+    16      4     number of words stored
+    20      4     reserved, 0
+
+Convert between text programs and images from the command line:
+
+    uvsim-convert program.txt program.uvsi
+    uvsim-convert program.uvsi program.txt
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+MAGIC = b"UVSI"
+VERSION = 1
+HEADER = struct.Struct("<4sHBBIIII")
+DIGITS_OF_FORMAT = {'old': 4, 'new': 6}
+FORMAT_OF_DIGITS = {4: 'old', 6: 'new'}
+MAX_MEMORY_SIZE = 1 << 20  # Words; a larger size is taken as a damaged header
+
+
+class ImageError(ValueError):
+    pass
+
+
+class ImageHeader:
+    def __init__(self, file_format, memory_size, entry_point, word_count, version=VERSION):
+        self.file_format = file_format
+        self.memory_size = memory_size
+        self.entry_point = entry_point
+        self.word_count = word_count
+        self.version = version
+
+    def pack(self):
+        return HEADER.pack(MAGIC, self.version, DIGITS_OF_FORMAT[self.file_format], 0,
+                           self.memory_size, self.entry_point, self.word_count, 0)
+
+    @classmethod
+    def unpack(cls, data):
+        """
+        Reads and checks the header at the start of data (bytes, mmap or
+        memoryview).
+        """
+        if len(data) < HEADER.size:
+            raise ImageError("Image is too short to hold a header.")
+        magic, version, digits, _, memory_size, entry_point, word_count, _ = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ImageError("Not a UVSim program image.")
+        if version != VERSION:
+            raise ImageError(f"Unsupported image version {version}.")
+        if digits not in FORMAT_OF_DIGITS:
+            raise ImageError(f"Invalid word format of {digits} digits.")
+        if memory_size > MAX_MEMORY_SIZE:
+            raise ImageError(f"Image memory size of {memory_size} words is larger than {MAX_MEMORY_SIZE}.")
+        if word_count > memory_size or entry_point >= memory_size:
+            raise ImageError("Image words or entry point do not fit its memory size.")
+        if len(data) < HEADER.size + 4 * word_count:
+            raise ImageError("Image is shorter than its header says.")
+        return cls(FORMAT_OF_DIGITS[digits], memory_size, entry_point, word_count, version)
+
+
+def is_image(filename):
+    """
+    Tells whether a file starts with the image magic number.
+    """
+    try:
+        with open(filename, 'rb') as file:
+            return file.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def write_image(filename, words, file_format, memory_size=None, entry_point=0):
+    """
+    Writes the words (any sequence of ints) as an image.
+    """
+    words = array('i', words)
+    header = ImageHeader(file_format, memory_size or max(len(words), 250), entry_point, len(words))
+    if sys.byteorder != 'little':
+        words.byteswap()
+    with open(filename, 'wb') as file:
+        file.write(header.pack())
+        file.write(words.tobytes())
+
+
+def map_image(filename):
+    """
+    Memory-maps an image and returns (header, mapping). The words start at
+    byte HEADER.size of the mapping. Close the mapping when done.
+    """
+    with open(filename, 'rb') as file:
+        if os.fstat(file.fileno()).st_size < HEADER.size:
+            raise ImageError("Image is too short to hold a header.")
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return ImageHeader.unpack(mapping), mapping
+    except ImageError:
+        mapping.close()
+        raise
+
+
+def read_image(filename):
+    """
+    Returns (header, words) with the words as an array('i').
+    """
+    header, mapping = map_image(filename)
+    with mapping:
+        return parse_image(mapping)
+
+
+def parse_image(data):
+    """
+    Returns (header, words) for an image held in memory (bytes or mmap).
+    """
+    header = ImageHeader.unpack(data)
+    words = array('i')
+    words.frombytes(data[HEADER.size:HEADER.size + 4 * header.word_count])
+    if sys.byteorder != 'little':
+        words.byteswap()
+    return header, words
+
+
+def text_to_image(text_filename, image_filename, memory_size=250):
+    """
+    Converts a text program accepted by UVSim.load_program_from_file into
+    an image. Returns the loader's result; nothing is written when it failed.
+    """
+    from .loader import load_program
+    result = load_program(text_filename, memory_size)
+    if result.ok:
+        write_image(image_filename, result.words, result.file_format or 'old', memory_size)
+    return result
+
+
+def image_to_text(image_filename, text_filename):
+    """
+    Writes an image back out as a text program, one word per line. Text
+    words are a fixed number of characters with the sign counted among
+    them, so a negative word's magnitude is padded to one digit less, as
+    in -007. Raises ImageError for a word no such line can hold.
+    """
+    header, words = read_image(image_filename)
+    width = DIGITS_OF_FORMAT[header.file_format]
+    lines = []
+    for word in words:
+        if word >= 0:
+            lines.append(f"{word:0{width}d}\n")
+        elif word > -10 ** (width - 1):
+            lines.append(f"-{-word:0{width - 1}d}\n")
+        else:
+            raise ImageError(f"Word {word} does not fit in a {width}-character text line.")
+    with open(text_filename, 'w') as file:
+        file.write("".join(lines))
+
+
+def main(argv=None):
+    import argparse  # Only the converter needs it; loading an image should stay light
+    parser = argparse.ArgumentParser(prog="uvsim-convert",
+                                     description="Convert BasicML programs between text and binary images.")
+    parser.add_argument("source", help="text program or image to convert")
+    parser.add_argument("destination", help="file to write")
+    parser.add_argument("--memory-size", type=int, default=250, help="memory size stored in new images (default: 250)")
+    args = parser.parse_args(argv)
+
+    try:
+        if is_image(args.source):
+            image_to_text(args.source, args.destination)
+        else:
+            result = text_to_image(args.source, args.destination, args.memory_size)
+            if not result.ok:
+                for message in result.messages():
+                    print(message, file=sys.stderr)
+                return 1
+    except (OSError, ImageError) as e:
+        print(f"Error - {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
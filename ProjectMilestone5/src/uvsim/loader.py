@@ -0,0 +1,174 @@
+"""
+Fast program loader for UVSim.
+
+Reads a program file in one go and checks and converts every line in a
+single pass instead of one line at a time. It accepts the same files as
+UVSim.load_program_from_file: 4-digit (old) or 6-digit (new) words, one
+per line, optionally ended by -9999 or -99999, with no mixing of formats.
+Instead of stopping at the first problem it collects every error and
+warning, with the file line number, in a LoadResult.
+
+Large files made only of unsigned words of one width are converted with
+NumPy when it is installed.
+"""
+from array import array
+
+TERMINATORS = (b"-99999", b"-9999")
+NUMPY_THRESHOLD = 1 << 16  # Bytes; smaller files are not worth importing NumPy for
+
+
+class LoadResult:
+    def __init__(self, filename):
+        self.filename = filename
+        self.words = array('i')
+        self.file_format = None
+        self.errors = []    # (line number, message) pairs that make the file unusable
+        self.warnings = []  # (line number, message) pairs for words that were skipped
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def __bool__(self):
+        return self.ok
+
+    def messages(self):
+        """
+        Returns the warnings and errors as readable lines, in file order.
+        """
+        entries = sorted(self.warnings + self.errors, key=lambda entry: entry[0])
+        return [f"Line {line}: {message}" if line else message for line, message in entries]
+
+
+def parse_fixed_width(data):
+    """
+    Converts a file that is nothing but unsigned 4- or 6-digit words, each
+    followed by a newline, in one NumPy operation. Returns the file format
+    and the words as an array('i'), or None when the file does not have
+    that shape or NumPy is not available.
+    """
+    width = data.find(b"\n")
+    if width not in (4, 6) or len(data) % (width + 1) or data.translate(None, b"0123456789\n"):
+        return None
+    if data[width::width + 1].count(b"\n") != len(data) // (width + 1):
+        return None
+    try:
+        import numpy
+    except ImportError:
+        return None
+    digits = numpy.frombuffer(data, dtype=numpy.uint8).reshape(-1, width + 1)[:, :width] - 48
+    values = digits.astype(numpy.int64) @ (10 ** numpy.arange(width - 1, -1, -1, dtype=numpy.int64))
+    if width == 6 and values.max() > 99999:
+        return None  # Leave the warnings to the general path
+    words = array('i')
+    words.frombytes(values.astype(numpy.intc).tobytes())
+    return ('old' if width == 4 else 'new'), words
+
+
+def load_program(filename, memory_size=250):
+    """
+    Loads and validates a program file. Returns a LoadResult whose words
+    are ready to be copied into memory when result.ok is true.
+    """
+    result = LoadResult(filename)
+    try:
+        with open(filename, 'rb') as file:
+            data = file.read()
+    except FileNotFoundError:
+        result.errors.append((0, f"Error - Could not find file '{filename}'"))
+        return result
+    except OSError as e:
+        result.errors.append((0, f"Error loading file - {str(e)}"))
+        return result
+    return parse_program(data, filename, memory_size)
+
+
+def parse_program(data, filename=None, memory_size=250):
+    """
+    Validates and converts the bytes of a program file. Returns a LoadResult
+    like load_program does.
+    """
+    result = LoadResult(filename)
+    if len(data) >= NUMPY_THRESHOLD:
+        parsed = parse_fixed_width(data)
+        if parsed is not None:
+            result.file_format, words = parsed
+            if len(words) > memory_size:
+                result.errors.append((memory_size + 1, f"Error - File exceeds the maximum program size of {memory_size} lines."))
+            else:
+                result.words = words
+            return result
+
+    # Line numbers and text of every non-blank line before the terminator
+    if data.translate(None, b"0123456789+-\n"):
+        stripped = list(map(bytes.strip, data.splitlines()))
+    else:
+        # Only digits, signs and newlines: there is nothing to strip
+        stripped = data.split(b"\n")
+        if stripped[-1] == b"":
+            stripped.pop()
+    end = len(stripped)
+    for terminator in TERMINATORS:
+        if terminator in stripped:
+            end = min(end, stripped.index(terminator))
+    lines = stripped[:end]
+    numbers = range(end)
+    if b"" in lines:
+        numbers = [number for number in numbers if lines[number]]
+        lines = [lines[number] for number in numbers]
+    if not lines:
+        return result
+
+    # Word format comes from the first line, every other line must match it
+    lengths = list(map(len, lines))
+    if lengths[0] == 4:
+        result.file_format = 'old'
+    elif lengths[0] == 6:
+        result.file_format = 'new'
+    else:
+        result.errors.append((numbers[0] + 1, "Error - word length. Use either 4-digit or 6-digit code."))
+        return result
+    expected = lengths[0]
+    if lengths.count(expected) != len(lengths):
+        for index, length in enumerate(lengths):
+            if length != expected:
+                result.errors.append((numbers[index] + 1, "Error - mixed word formats detected. "
+                                                          "File must consist of only 4-digit or 6-digit code."))
+
+    # Convert everything at once, and only look line by line if that fails
+    try:
+        words = array('i', map(int, lines))
+    except (ValueError, OverflowError):
+        words = []
+        for index, line in enumerate(lines):
+            try:
+                words.append(int(line))
+            except ValueError:
+                words.append(0)
+                result.errors.append((numbers[index] + 1, "Error - Invalid instruction format."))
+
+    limit = 9999 if result.file_format == 'old' else 99999
+    if result.errors:
+        out_of_range = min(words) < -limit or max(words) > limit
+    elif result.file_format == 'old':
+        out_of_range = False  # Four characters always fit in -9999..9999
+    else:
+        out_of_range = max(words) > limit  # Six characters can reach 999999, never below -99999
+    kept = range(len(words))
+    if out_of_range:
+        kept = [index for index, word in enumerate(words) if -limit <= word <= limit]
+        for index, word in enumerate(words):
+            if not -limit <= word <= limit and lengths[index] == expected:
+                result.warnings.append((numbers[index] + 1, f"Warning - Invalid number {word}. "
+                                                             f"Must be between {-limit} and {limit}."))
+        words = array('i', [words[index] for index in kept])
+
+    # Like the line-by-line loader, any line after memory is full is an error
+    if len(kept) >= memory_size and kept[memory_size - 1] < len(lines) - 1:
+        result.errors.append((numbers[kept[memory_size - 1] + 1] + 1,
+                              f"Error - File exceeds the maximum program size of {memory_size} lines."))
+
+    result.errors.sort()
+    if result.ok:
+        result.words = array('i', words) if isinstance(words, list) else words
+    return result
@@ -0,0 +1,208 @@
+"""
+Result memoization for UVSim.
+
+Without randomness, a BasicML run is decided by the memory image, the
+word format, the starting program counter and accumulator, the input
+values and any run options that can stop it early (such as loop
+detection). A ResultCache keys finished runs by a SHA-256 hash of exactly
+those and hands back the outputs, final accumulator and halt reason of an
+identical earlier run without executing it again:
+
+    cache = ResultCache(db_path="results.sqlite")
+    result = cache.run(simulator, inputs=[3, 4])
+
+Results live in a bounded in-memory LRU and, with a db_path, in an SQLite
+database that any number of processes can share. The database is trimmed
+to max_db_bytes of stored results and, with max_age, to results used in
+the last max_age seconds. Runs that were cut short by a time budget are
+never stored, since they depend on the machine rather than the program.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from array import array
+from collections import OrderedDict
+
+from .channels import IteratorInput, ListOutput
+
+UNCACHEABLE = ('timeout',)
+
+
+def result_key(memory, file_format, inputs, program_counter=0, accumulator=0, options=()):
+    """
+    Returns the hex SHA-256 of everything that decides a run. options names
+    the run options that change its result, such as 'detect_loops'.
+    """
+    words = array('i', memory)
+    if sys.byteorder != 'little':
+        words.byteswap()
+    digest = hashlib.sha256()
+    digest.update(f"uvsim-result-2|{file_format}|{program_counter}|{accumulator}|"
+                  f"{','.join(sorted(options))}|{len(words)}|".encode())
+    digest.update(words.tobytes())
+    digest.update(json.dumps([str(value).strip() for value in inputs]).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, max_entries=1024, db_path=None, max_db_bytes=64 << 20, max_age=None):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.max_db_bytes = max_db_bytes
+        self.max_age = max_age
+        self.entries = OrderedDict()  # Key -> result dictionary, least recently used first
+        self.connection = None
+        self.connection_pid = None
+        self.hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def connect(self):
+        """
+        Returns this process's database connection. A connection is never
+        shared across a fork; each worker opens its own.
+        """
+        if self.connection is None or self.connection_pid != os.getpid():
+            self.connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            self.connection.execute("PRAGMA journal_mode=WAL")  # Readers and one writer at a time
+            self.connection.execute("CREATE TABLE IF NOT EXISTS results ("
+                                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                                    "created REAL NOT NULL, used REAL NOT NULL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+            self.connection_pid = os.getpid()
+        return self.connection
+
+    def get(self, key):
+        """
+        Returns the stored result for a key, or None.
+        """
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        if self.db_path:
+            connection = self.connect()
+            row = connection.execute("SELECT value, used FROM results WHERE key = ?", (key,)).fetchone()
+            if row and (self.max_age is None or row[1] >= time.time() - self.max_age):
+                connection.execute("UPDATE results SET used = ? WHERE key = ?", (time.time(), key))
+                self.db_hits += 1
+                result = json.loads(row[0])
+                self.remember(key, result)
+                return result
+        self.misses += 1
+        return None
+
+    def put(self, key, result):
+        if result.get('halt_reason') in UNCACHEABLE:
+            return
+        self.remember(key, result)
+        self.stores += 1
+        if self.db_path:
+            value = json.dumps(result)
+            now = time.time()
+            self.connect().execute("INSERT OR REPLACE INTO results (key, value, size, created, used) "
+                                   "VALUES (?, ?, ?, ?, ?)", (key, value, len(value), now, now))
+            if self.stores % 64 == 1:
+                self.trim()
+
+    def remember(self, key, result):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def trim(self):
+        """
+        Drops expired results and then the least recently used ones until
+        the database holds at most max_db_bytes of results.
+        """
+        connection = self.connect()
+        if self.max_age is not None:
+            connection.execute("DELETE FROM results WHERE used < ?", (time.time() - self.max_age,))
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_db_bytes:
+            return
+        excess = total - self.max_db_bytes
+        cutoff, freed = None, 0
+        for used, size in connection.execute("SELECT used, size FROM results ORDER BY used"):
+            freed += size
+            cutoff = used
+            if freed >= excess:
+                break
+        connection.execute("DELETE FROM results WHERE used <= ?", (cutoff,))
+
+    def run(self, simulator, inputs=()):
+        """
+        Runs a loaded simulator on the inputs, or returns the result of an
+        identical earlier run. The simulator's registers and halt reason are
+        set either way; its memory is only changed by a real run.
+        """
+        inputs = list(inputs)
+        key = result_key(simulator.memory, simulator.file_format, inputs, simulator.program_counter,
+                         simulator.accumulator)
+        result = self.get(key)
+        if result is None:
+            result = execute_for_result(simulator, inputs)
+            self.put(key, result)
+        else:
+            simulator.accumulator = result['accumulator']
+            simulator.program_counter = result['program_counter']
+            simulator.instruction_count = result['instruction_count']
+            simulator.halt_reason = result['halt_reason']
+            simulator.running = False
+        return result
+
+    def stats(self):
+        lookups = self.hits + self.db_hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'db_hits': self.db_hits,
+            'misses': self.misses,
+            'hit_ratio': (self.hits + self.db_hits) / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        if self.connection is not None and self.connection_pid == os.getpid():
+            self.connection.close()
+        self.connection = None
+
+
+def execute_for_result(simulator, inputs):
+    """
+    Runs a loaded simulator on the inputs and returns its result dictionary.
+    """
+    sink = ListOutput()
+    simulator.input_source = IteratorInput(inputs)
+    simulator.output_sink = sink
+    error = None
+    try:
+        simulator.execute()
+    except ValueError as e:
+        error = str(e)
+    return {
+        'outputs': sink.values,
+        'messages': sink.messages,
+        'accumulator': simulator.accumulator,
+        'program_counter': simulator.program_counter,
+        'instruction_count': simulator.instruction_count,
+        'halt_reason': simulator.halt_reason,
+        'error': error,
+    }
+
+
+shared_caches = {}
+
+
+def shared_result_cache(db_path=None):
+    """
+    Returns this process's result cache for the given database, creating it
+    on first use.
+    """
+    if db_path not in shared_caches:
+        shared_caches[db_path] = ResultCache(db_path=db_path)
+    return shared_caches[db_path]
@@ -0,0 +1,243 @@
+"""
+Virtualized memory view for the UVSim GUI.
+
+MemoryGrid shows a sequence of words as "address: word" rows, like a
+Listbox, but only draws the rows that fit in the window. Scrolling and
+edits reconfigure that fixed set of canvas items instead of inserting a
+widget row per word, so a memory of hundreds of thousands of words costs
+the same to show as a short program. Rows listed as changed are
+highlighted. The bookkeeping that needs no display, such as which rows
+are on screen, selected or highlighted, lives in MemoryWindow.
+"""
+import tkinter as tk
+import tkinter.font as tkfont
+
+
+class MemoryWindow:
+    """
+    The rows of a sequence of words that a MemoryGrid shows, with the
+    selected and changed rows. Methods that can move the window return
+    whether it moved, so the grid only redraws when it has to.
+    """
+
+    def __init__(self):
+        self.values = []
+        self.changed = set()
+        self.selected = None
+        self.top = 0            # First row shown
+        self.visible_rows = 0
+
+    def clamp(self, top):
+        return max(0, min(top, len(self.values) - self.visible_rows))
+
+    def set_values(self, values, changed=()):
+        self.values = values
+        self.changed = set(changed)
+        if self.selected is not None and self.selected >= len(values):
+            self.selected = None
+        self.top = self.clamp(self.top)
+
+    def resize(self, rows):
+        self.visible_rows = rows
+        self.top = self.clamp(self.top)
+
+    def row(self, row):
+        """
+        Returns the text of a screen row and how it is marked: 'selected',
+        'changed' or None. Rows past the last word are empty.
+        """
+        index = self.top + row
+        if index >= len(self.values):
+            return "", None
+        if index == self.selected:
+            mark = 'selected'
+        elif index in self.changed:
+            mark = 'changed'
+        else:
+            mark = None
+        return f"{index}: {self.values[index]}", mark
+
+    def rows_of(self, indices):
+        """
+        Returns the screen rows of those indices that are on screen.
+        """
+        return [index - self.top for index in indices if self.top <= index < self.top + self.visible_rows]
+
+    def index_at(self, row):
+        """
+        Returns the index shown on a screen row, or None past the last word.
+        """
+        index = self.top + row
+        return index if index < len(self.values) else None
+
+    def scroll(self, amount, unit):
+        step = self.visible_rows if unit == 'pages' else 1
+        return self.scroll_to(self.top + amount * step)
+
+    def scroll_to(self, top):
+        top = self.clamp(top)
+        if top == self.top:
+            return False
+        self.top = top
+        return True
+
+    def see(self, index):
+        if index < self.top:
+            return self.scroll_to(index)
+        if index >= self.top + self.visible_rows:
+            return self.scroll_to(index - self.visible_rows + 1)
+        return False
+
+    def next_selection(self, step):
+        """
+        Returns the index step rows away from the selection, kept in range,
+        or None when there are no words.
+        """
+        if not self.values:
+            return None
+        current = self.selected if self.selected is not None else self.top - step
+        return max(0, min(current + step, len(self.values) - 1))
+
+    def scrollbar(self):
+        """
+        Returns the (first, last) fractions for a Tk scrollbar.
+        """
+        count = len(self.values)
+        if count <= self.visible_rows:
+            return 0.0, 1.0
+        return self.top / count, (self.top + self.visible_rows) / count
+
+
+class MemoryGrid(tk.Frame):
+    def __init__(self, parent, height=10, bg="#FFFFFF", fg="black", highlight="#FFE08A", select_color="#B5D5FF"):
+        super().__init__(parent, bg=bg)
+        self.font = tkfont.nametofont("TkFixedFont")
+        self.row_height = self.font.metrics("linespace") + 2
+        self.fg = fg
+        self.fills = {None: "", 'selected': select_color, 'changed': highlight}
+        self.window = MemoryWindow()
+        self.rows = []       # (background rectangle, text) canvas items, one per visible row
+
+        self.canvas = tk.Canvas(self, height=height * self.row_height, bg=bg, highlightthickness=0, takefocus=True)
+        self.scrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.canvas.bind("<Configure>", self.on_resize)
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<MouseWheel>", lambda event: self.scroll(-1 if event.delta > 0 else 1, 'units'))
+        self.canvas.bind("<Button-4>", lambda event: self.scroll(-1, 'units'))
+        self.canvas.bind("<Button-5>", lambda event: self.scroll(1, 'units'))
+        self.canvas.bind("<Up>", lambda event: self.move_selection(-1))
+        self.canvas.bind("<Down>", lambda event: self.move_selection(1))
+        self.canvas.bind("<Prior>", lambda event: self.scroll(-1, 'pages'))
+        self.canvas.bind("<Next>", lambda event: self.scroll(1, 'pages'))
+
+    @property
+    def values(self):
+        return self.window.values
+
+    def set_values(self, values, changed=()):
+        """
+        Shows a new sequence of words. The grid keeps a reference, so later
+        changes to it appear after update_rows() or refresh().
+        """
+        self.window.set_values(values, changed)
+        self.refresh()
+
+    def update_rows(self, indices, highlight=False):
+        """
+        Redraws the given rows after their words changed. Rows that are not
+        on screen cost nothing.
+        """
+        if highlight:
+            self.window.changed.update(indices)
+        for row in self.window.rows_of(indices):
+            self.draw_row(row)
+
+    def clear_highlights(self):
+        self.window.changed.clear()
+        self.refresh()
+
+    def refresh(self):
+        for row in range(len(self.rows)):
+            self.draw_row(row)
+        self.scrollbar.set(*self.window.scrollbar())
+
+    def draw_row(self, row):
+        background, text = self.rows[row]
+        line, mark = self.window.row(row)
+        self.canvas.itemconfigure(text, text=line)
+        self.canvas.itemconfigure(background, fill=self.fills[mark])
+
+    def on_resize(self, event):
+        """
+        Creates or removes canvas items so there is exactly one per row that
+        fits in the new height.
+        """
+        wanted = max(1, event.height // self.row_height)
+        while len(self.rows) < wanted:
+            y = len(self.rows) * self.row_height
+            background = self.canvas.create_rectangle(0, y, event.width, y + self.row_height, width=0, fill="")
+            text = self.canvas.create_text(4, y + 1, anchor=tk.NW, font=self.font, fill=self.fg)
+            self.rows.append((background, text))
+        while len(self.rows) > wanted:
+            for item in self.rows.pop():
+                self.canvas.delete(item)
+        for row, (background, _) in enumerate(self.rows):
+            y = row * self.row_height
+            self.canvas.coords(background, 0, y, event.width, y + self.row_height)
+        self.window.resize(len(self.rows))
+        self.refresh()
+
+    def yview(self, action, amount, unit=None):
+        """
+        Scrollbar command, following the Tk yview protocol.
+        """
+        if action == 'moveto':
+            self.scroll_to(int(float(amount) * len(self.values)))
+        else:
+            self.scroll(int(amount), unit)
+
+    def scroll(self, amount, unit):
+        if self.window.scroll(amount, unit):
+            self.refresh()
+
+    def scroll_to(self, top):
+        if self.window.scroll_to(top):
+            self.refresh()
+
+    def see(self, index):
+        if self.window.see(index):
+            self.refresh()
+
+    def on_click(self, event):
+        self.canvas.focus_set()
+        index = self.window.index_at(event.y // self.row_height)
+        if index is not None:
+            self.select(index)
+
+    def move_selection(self, step):
+        index = self.window.next_selection(step)
+        if index is not None:
+            self.select(index)
+
+    def select(self, index):
+        previous, self.window.selected = self.window.selected, index
+        if previous is not None:
+            self.update_rows([previous])
+        if index is not None:
+            self.see(index)
+            self.update_rows([index])
+
+    def curselection(self):
+        """
+        Returns the selected row as a one-item tuple, or an empty tuple,
+        like Listbox.curselection.
+        """
+        selected = self.window.selected
+        return (selected,) if selected is not None else ()
+
+    def set_colors(self, bg):
+        self.config(bg=bg)
+        self.canvas.config(bg=bg)
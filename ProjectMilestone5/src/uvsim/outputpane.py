@@ -0,0 +1,84 @@
+"""
+Coalesced output for the UVSim GUI.
+
+Inserting into a Tk Text widget once per line makes the widget the
+bottleneck when a program writes thousands of values. An OutputPane
+collects lines in an OutputBuffer and inserts them in one go at most every
+interval milliseconds. Both the lines waiting to be shown and the
+scrollback are ring buffers of max_lines, so a program that prints
+millions of lines keeps memory bounded and only its last lines are shown.
+"""
+from collections import deque
+
+
+class OutputBuffer:
+    def __init__(self, max_lines=10000):
+        self.max_lines = max_lines
+        self.lines = deque(maxlen=max_lines)    # Scrollback: the last max_lines lines written
+        self.pending = deque(maxlen=max_lines)  # Lines not yet handed out by take()
+        self.written = 0
+
+    def write(self, text):
+        """
+        Adds text, which may hold several lines separated by newlines.
+        """
+        lines = text.split("\n")
+        self.lines.extend(lines)
+        self.pending.extend(lines)
+        self.written += len(lines)
+
+    def take(self):
+        """
+        Returns the lines written since the last take() and forgets them.
+        """
+        lines = list(self.pending)
+        self.pending.clear()
+        return lines
+
+    def text(self):
+        return "\n".join(self.lines)
+
+    def clear(self):
+        self.lines.clear()
+        self.pending.clear()
+
+
+class OutputPane:
+    """
+    Shows an OutputBuffer in a read-only Text widget, such as a
+    ScrolledText created with state=DISABLED.
+    """
+
+    def __init__(self, widget, max_lines=10000, interval=50):
+        self.widget = widget
+        self.buffer = OutputBuffer(max_lines)
+        self.interval = interval
+        self.scheduled = None  # after() id of the pending flush
+        self.shown = 0         # Lines currently in the widget
+
+    def write(self, text):
+        self.buffer.write(text)
+        if self.scheduled is None:
+            self.scheduled = self.widget.after(self.interval, self.flush)
+
+    def flush(self):
+        self.scheduled = None
+        lines = self.buffer.take()
+        if not lines:
+            return
+        self.widget.config(state="normal")
+        self.widget.insert("end", "\n".join(lines) + "\n")
+        self.shown += len(lines)
+        excess = self.shown - self.buffer.max_lines
+        if excess > 0:
+            self.widget.delete("1.0", f"{excess + 1}.0")
+            self.shown -= excess
+        self.widget.see("end")
+        self.widget.config(state="disabled")
+
+    def clear(self):
+        self.buffer.clear()
+        self.widget.config(state="normal")
+        self.widget.delete("1.0", "end")
+        self.widget.config(state="disabled")
+        self.shown = 0
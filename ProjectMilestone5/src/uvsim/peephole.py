@@ -0,0 +1,181 @@
+"""
+Superinstruction engine for UVSim.
+
+Most BasicML programs spend their time in three short idioms:
+
+    LOAD x; ADD y (or SUBTRACT y); STORE z
+    LOAD x; SUBTRACT y (or ADD y); BRANCHNEG t
+    LOAD x; BRANCHZERO t (or BRANCHNEG t)
+
+When an address is first fetched, the engine checks whether one of these
+sequences starts there and, if so, caches a single fused handler that does
+the work of the whole sequence in one dispatch. Each address keeps its own
+cache entry, so a jump into the middle of a sequence runs from that
+address as usual. The fused handlers check for overflow after the
+arithmetic step exactly as ADD and SUBTRACT do. A STORE or READ
+into any cell of a cached sequence drops the entries that cover it and
+marks the cell written. Sequences over written cells are not fused again:
+self-modifying code would otherwise build new closures on every pass, so
+those cells run through the plain table handlers instead.
+"""
+ARITHMETIC = {30: (1, 'ADD'), 31: (-1, 'SUBTRACT')}  # Opcode -> (sign, name)
+
+
+class FusedEngine:
+    def __init__(self, simulator):
+        self.sim = simulator
+        self.decoded = [None] * simulator.memory_size
+        self.covered = bytearray(simulator.memory_size)  # Cells that some cached entry was decoded from
+        self.written = bytearray(simulator.memory_size)  # Covered cells written since; never fused again
+        self.table = list(simulator.dispatch_table)
+        self.table[10] = self.op_read
+        self.table[21] = self.op_store
+        self.fused = 0  # Sequences fused so far, for tests and tuning
+
+    def forget(self, address):
+        """
+        Drops the cached entries a write to address makes stale: its own and
+        those of the two sequences that may have started just before it.
+        Once written, the cell is never fused again, so later writes only
+        drop its own entry.
+        """
+        if self.written[address]:
+            self.decoded[address] = None
+            return
+        self.written[address] = 1
+        start = address - 2 if address >= 2 else 0
+        self.decoded[start:address + 1] = [None] * (address + 1 - start)
+
+    def op_read(self, operand):
+        self.sim.op_read(operand)
+        if self.covered[operand]:
+            self.forget(operand)
+
+    def op_store(self, operand):
+        self.sim.memory[operand] = self.sim.accumulator
+        if self.covered[operand]:
+            self.forget(operand)
+
+    def decode(self, address):
+        sim = self.sim
+        opcode, operand = sim.decode(address)
+        if operand >= sim.memory_size:
+            entry = (sim.op_invalid_address, operand)
+        else:
+            entry = opcode == 20 and self.fuse(address, opcode, operand)  # Every sequence starts with LOAD
+            if not entry:
+                handler = self.table[opcode] if opcode < len(self.table) else sim.invalid_handler(opcode)
+                entry = (handler, operand)
+        self.decoded[address] = entry
+        self.covered[address] = 1
+        return entry
+
+    def fuse(self, address, opcode, operand):
+        """
+        Returns a fused (handler, None) entry when a known sequence starts at
+        address, otherwise None.
+        """
+        sim = self.sim
+        size = sim.memory_size
+        written = self.written
+        if opcode != 20 or address + 1 >= size or written[address] or written[address + 1]:
+            return None
+        second, second_operand = sim.decode(address + 1)
+        if second_operand >= size:
+            return None
+        if second == 41 or second == 42:
+            handler = self.load_branch(operand, second == 41, second_operand, address + 2)
+            length = 2
+        else:
+            if second not in ARITHMETIC or address + 2 >= size or written[address + 2]:
+                return None
+            third, third_operand = sim.decode(address + 2)
+            if third_operand >= size or (third != 21 and third != 41):
+                return None
+            make = self.load_arithmetic_store if third == 21 else self.load_arithmetic_branchneg
+            handler = make(operand, second_operand, second, third_operand, address + 3)
+            length = 3
+        self.covered[address:address + length] = b"\x01" * length
+        self.fused += 1
+        return handler, None
+
+    def overflow(self, opcode, end):
+        """
+        Stops the machine the way ADD or SUBTRACT would, right after the
+        arithmetic step of a fused sequence ending before end.
+        """
+        sim = self.sim
+        sim.output_sink.message(f"Overflow error in {ARITHMETIC[opcode][1]} operation.")
+        sim.running = False
+        sim.halt_reason = 'overflow'
+        sim.program_counter = end - 1
+        sim.instruction_count += 1  # LOAD; the run loop counts the failed step
+
+    # Each fused handler is a closure over its operands, so running it costs
+    # one call and no argument unpacking.
+
+    def load_arithmetic_store(self, x, y, opcode, target, end):
+        sim = self.sim
+        memory = sim.memory
+        covered = self.covered
+        forget = self.forget
+        overflow = self.overflow
+        limit = sim.word_limit
+        sign = ARITHMETIC[opcode][0]
+
+        def handler(_):
+            accumulator = memory[x] + sign * memory[y]
+            sim.accumulator = accumulator
+            if -limit <= accumulator <= limit:
+                memory[target] = accumulator
+                if covered[target]:
+                    forget(target)
+                sim.program_counter = end
+                sim.instruction_count += 2
+            else:
+                overflow(opcode, end)
+        return handler
+
+    def load_arithmetic_branchneg(self, x, y, opcode, target, end):
+        sim = self.sim
+        memory = sim.memory
+        overflow = self.overflow
+        limit = sim.word_limit
+        sign = ARITHMETIC[opcode][0]
+
+        def handler(_):
+            accumulator = memory[x] + sign * memory[y]
+            sim.accumulator = accumulator
+            if -limit <= accumulator <= limit:
+                sim.program_counter = target if accumulator < 0 else end
+                sim.instruction_count += 2
+            else:
+                overflow(opcode, end)
+        return handler
+
+    def load_branch(self, x, negative, target, end):
+        sim = self.sim
+        memory = sim.memory
+
+        def handler(_):
+            accumulator = memory[x]
+            sim.accumulator = accumulator
+            taken = accumulator < 0 if negative else accumulator == 0
+            sim.program_counter = target if taken else end
+            sim.instruction_count += 1
+        return handler
+
+    def run(self):
+        sim = self.sim
+        decoded = self.decoded
+        decode = self.decode
+        size = sim.memory_size
+        count = 0
+        try:
+            while sim.running and sim.program_counter < size:
+                handler, operand = decoded[sim.program_counter] or decode(sim.program_counter)
+                sim.program_counter += 1
+                count += 1
+                handler(operand)
+        finally:
+            sim.instruction_count += count
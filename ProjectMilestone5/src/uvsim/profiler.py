@@ -0,0 +1,135 @@
+"""
+Execution profiler for UVSim.
+
+Counts how often each address and each opcode runs, how often each branch
+is taken, and how much wall time each class of opcode uses. Counters live
+in preallocated arrays, so profiling does not allocate while the program
+runs. Attach a profiler to turn it on; without one the simulator runs its
+normal loop untouched:
+
+    profiler = Profiler()
+    simulator.attach(profiler)
+    simulator.execute()
+    print(profiler.format_text())
+"""
+import json
+import time
+from array import array
+
+OPCODE_NAMES = {
+    10: 'READ', 11: 'WRITE', 20: 'LOAD', 21: 'STORE',
+    30: 'ADD', 31: 'SUBTRACT', 32: 'DIVIDE', 33: 'MULTIPLY',
+    40: 'BRANCH', 41: 'BRANCHNEG', 42: 'BRANCHZERO', 43: 'HALT',
+}
+CLASSES = ('io', 'load_store', 'arithmetic', 'control', 'invalid')
+OTHER_OPCODE = 100  # Bucket for opcodes outside 0-99, which a 6-digit word can hold
+CLASS_OF_OPCODE = [4] * (OTHER_OPCODE + 1)
+for _opcode, _class in ((10, 0), (11, 0), (20, 1), (21, 1), (30, 2), (31, 2), (32, 2), (33, 2),
+                        (40, 3), (41, 3), (42, 3), (43, 3)):
+    CLASS_OF_OPCODE[_opcode] = _class
+
+
+def opcode_name(opcode):
+    if opcode == OTHER_OPCODE:
+        return 'INVALID 100+'
+    return OPCODE_NAMES.get(opcode, f'INVALID {opcode}')
+
+
+class Profiler:
+    def __init__(self, memory_size=0):
+        self.memory_size = memory_size  # Grows to the profiled simulator's memory when it starts
+        self.reset()
+
+    def reset(self):
+        size = self.memory_size
+        self.address_counts = array('Q', bytes(8 * size))
+        self.branch_taken = array('Q', bytes(8 * size))
+        self.branch_not_taken = array('Q', bytes(8 * size))
+        self.opcode_counts = array('Q', bytes(8 * (OTHER_OPCODE + 1)))
+        self.class_counts = array('Q', bytes(8 * len(CLASSES)))
+        self.class_time = array('d', bytes(8 * len(CLASSES)))
+        self.started = 0.0
+
+    def start(self, simulator):
+        """
+        Grows the address counters to the simulator's memory, keeping the
+        counts so far.
+        """
+        extra = bytes(8 * (simulator.memory_size - self.memory_size))
+        for counts in (self.address_counts, self.branch_taken, self.branch_not_taken):
+            counts.frombytes(extra)
+        self.memory_size = simulator.memory_size
+
+    def before_step(self, simulator, address, opcode, operand):
+        if self.memory_size < simulator.memory_size:
+            self.start(simulator)
+        self.started = time.perf_counter()
+
+    def after_step(self, simulator, address, opcode, operand):
+        elapsed = time.perf_counter() - self.started
+        if not 0 <= opcode < OTHER_OPCODE:
+            opcode = OTHER_OPCODE
+        opcode_class = CLASS_OF_OPCODE[opcode]
+        self.address_counts[address] += 1
+        self.opcode_counts[opcode] += 1
+        self.class_counts[opcode_class] += 1
+        self.class_time[opcode_class] += elapsed
+        if opcode == 40:
+            self.branch_taken[address] += 1
+        elif opcode == 41 or opcode == 42:
+            if (simulator.accumulator < 0) if opcode == 41 else (simulator.accumulator == 0):
+                self.branch_taken[address] += 1
+            else:
+                self.branch_not_taken[address] += 1
+
+    def report(self):
+        """
+        Returns the collected counters as a dictionary. Only addresses and
+        opcodes that ran are included.
+        """
+        addresses = {}
+        for address in range(self.memory_size):
+            count = self.address_counts[address]
+            if count:
+                entry = {'count': count}
+                taken, not_taken = self.branch_taken[address], self.branch_not_taken[address]
+                if taken or not_taken:
+                    entry['taken'] = taken
+                    entry['not_taken'] = not_taken
+                    entry['taken_ratio'] = taken / (taken + not_taken)
+                addresses[address] = entry
+        return {
+            'instructions': sum(self.opcode_counts),
+            'opcodes': {opcode_name(opcode): count
+                        for opcode, count in enumerate(self.opcode_counts) if count},
+            'classes': {name: {'count': self.class_counts[index], 'seconds': self.class_time[index]}
+                        for index, name in enumerate(CLASSES) if self.class_counts[index]},
+            'addresses': addresses,
+        }
+
+    def to_json(self, filename):
+        with open(filename, 'w') as file:
+            json.dump(self.report(), file, indent=2)
+
+    def format_text(self):
+        """
+        Returns a flat, human-readable report.
+        """
+        report = self.report()
+        lines = [f"Instructions executed: {report['instructions']}", "", "Opcode        Count"]
+        for name, count in report['opcodes'].items():
+            lines.append(f"{name:<12} {count:>6}")
+        lines += ["", "Class         Count    Seconds"]
+        for name, entry in report['classes'].items():
+            lines.append(f"{name:<12} {entry['count']:>6} {entry['seconds']:>10.6f}")
+        lines += ["", "Address       Count    Taken  Not taken"]
+        for address, entry in report['addresses'].items():
+            line = f"{address:03d}          {entry['count']:>6}"
+            if 'taken' in entry:
+                line += f" {entry['taken']:>8} {entry['not_taken']:>10}"
+            lines.append(line)
+        return "\n".join(lines) + "\n"
+
+    def to_text(self, filename):
+        with open(filename, 'w') as file:
+            file.write(self.format_text())
@@ -0,0 +1,191 @@
+"""
+Cache of parsed program files for UVSim.
+
+Loading the same program again and again (reopening it in the GUI, running
+it in many batch jobs) only has to parse it once. Parsed programs are kept
+by the SHA-256 hash of the file's contents, so copies of a program share an
+entry and an edited file is parsed again. Before hashing, a file whose path,
+modification time and size have not changed is taken to be unchanged.
+
+The in-memory cache holds up to max_entries programs and drops the least
+recently used first. With a disk_dir, clean programs are also written there
+as binary images (see image.py) and kept up to disk_entries files, so other
+processes and later runs can skip parsing too:
+
+    cache = ProgramCache(max_entries=64, disk_dir=".uvsim-cache")
+    simulator.load_program_fast("program.txt", cache=cache)
+    print(cache.stats())
+"""
+import hashlib
+import os
+from collections import OrderedDict
+
+from .image import ImageError, read_image, write_image
+from .loader import LoadResult, load_program, parse_program
+
+
+class ProgramCache:
+    def __init__(self, max_entries=128, disk_dir=None, disk_entries=1024):
+        if max_entries < 1:
+            raise ValueError("The cache must hold at least 1 program.")
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.disk_entries = disk_entries
+        self.entries = OrderedDict()  # (content hash, memory size) -> LoadResult, least recently used first
+        self.stamps = OrderedDict()   # path -> (mtime, size, content hash) of the last read
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def load(self, filename, memory_size=250):
+        """
+        Returns the LoadResult for a program file, parsing it only when no
+        cache has it. The result's words are shared with the cache and must
+        not be changed.
+        """
+        try:
+            status = os.stat(filename)
+        except OSError:
+            return load_program(filename, memory_size)  # Reports the error the usual way
+        path = os.path.abspath(filename)
+
+        stamp = self.stamps.get(path)
+        if stamp and stamp[:2] == (status.st_mtime_ns, status.st_size):
+            key = (stamp[2], memory_size)
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.named(self.entries[key], filename)
+
+        try:
+            with open(filename, 'rb') as file:
+                data = file.read()
+        except OSError:
+            return load_program(filename, memory_size)
+        digest = hashlib.sha256(data).hexdigest()
+        self.stamps[path] = (status.st_mtime_ns, status.st_size, digest)
+        self.stamps.move_to_end(path)
+        if len(self.stamps) > 4 * self.max_entries:
+            self.stamps.popitem(last=False)
+
+        key = (digest, memory_size)
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.named(self.entries[key], filename)
+
+        result = self.read_disk(key)
+        if result is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            result = parse_program(data, filename, memory_size)
+            self.write_disk(key, result)
+        self.store(key, result)
+        return self.named(result, filename)
+
+    def store(self, key, result):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def named(self, result, filename):
+        """
+        Returns a copy of a cached result that reports the given file name.
+        """
+        copy = LoadResult(filename)
+        copy.words = result.words
+        copy.file_format = result.file_format
+        copy.errors = result.errors
+        copy.warnings = result.warnings
+        return copy
+
+    def disk_path(self, key):
+        digest, memory_size = key
+        return os.path.join(self.disk_dir, f"{digest}-{memory_size}.uvsi")
+
+    def read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self.disk_path(key)
+        try:
+            header, words = read_image(path)
+            os.utime(path)  # Mark it as recently used
+        except (OSError, ImageError):
+            return None
+        result = LoadResult(None)
+        result.words = words
+        result.file_format = header.file_format if len(words) else None
+        return result
+
+    def write_disk(self, key, result):
+        """
+        Saves a clean result as an image. Results with errors or warnings are
+        only kept in memory, since an image has no room for the messages.
+        """
+        if not self.disk_dir or result.errors or result.warnings:
+            return
+        path = self.disk_path(key)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        try:
+            write_image(temporary, result.words, result.file_format or 'old', key[1])
+            os.replace(temporary, path)  # Other processes never see a half-written image
+        except OSError:
+            return
+        self.trim_disk()
+
+    def trim_disk(self):
+        """
+        Removes the least recently used images beyond disk_entries.
+        """
+        try:
+            names = [name for name in os.listdir(self.disk_dir) if name.endswith(".uvsi")]
+            if len(names) <= self.disk_entries:
+                return
+            paths = sorted((os.path.join(self.disk_dir, name) for name in names), key=os.path.getmtime)
+            for path in paths[:len(paths) - self.disk_entries]:
+                os.remove(path)
+        except OSError:
+            pass  # Another process may be trimming at the same time
+
+    def stats(self):
+        """
+        Returns the hit and miss counters, for sizing the cache.
+        """
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        """
+        Empties the in-memory cache and resets the counters. Disk entries
+        are kept.
+        """
+        self.entries.clear()
+        self.stamps.clear()
+        self.hits = self.disk_hits = self.misses = self.evictions = 0
+
+
+shared_caches = {}
+
+
+def shared_cache(disk_dir=None):
+    """
+    Returns this process's cache for the given disk folder, creating it on
+    first use.
+    """
+    if disk_dir not in shared_caches:
+        shared_caches[disk_dir] = ProgramCache(disk_dir=disk_dir)
+    return shared_caches[disk_dir]
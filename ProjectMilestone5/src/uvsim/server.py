@@ -0,0 +1,315 @@
+"""
+Local simulation service for UVSim.
+
+A small HTTP/JSON server, bound to 127.0.0.1 only, that runs programs on a
+pool of worker processes started up front:
+
+    uvsim-server --port 8450 --workers 4
+
+POST /run with a JSON object holding either "program" (the text of a
+program file) or "image" (a binary image, base64-encoded), plus optional
+"inputs" (list of READ values), "max_instructions" and "timeout" (seconds).
+The reply holds the outputs, final accumulator, halt reason and
+instruction count. Budgets are capped by the server's own limits. When
+every worker is busy and the queue is full the server answers 503 with a
+Retry-After header instead of queueing more work.
+
+GET /health returns the pool size and request counters.
+"""
+import argparse
+import base64
+import binascii
+import json
+import math
+import multiprocessing
+import signal
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .core import UVSim
+from .batch import JobTimeout, raise_timeout
+from .channels import IteratorInput, ListOutput
+from .image import ImageError, parse_image
+from .loader import parse_program
+
+HOST = "127.0.0.1"
+MAX_BODY = 1 << 20  # Bytes
+MAX_MEMORY = 1 << 16  # Largest image memory size accepted, in words
+
+
+def warm_worker():
+    """
+    Runs once in each worker process. Ctrl+C is left to the server.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGALRM, raise_timeout)
+
+
+def load_request(request):
+    """
+    Builds a loaded simulator from a request, or raises ValueError.
+    """
+    sink = ListOutput()
+    if request.get('image') is not None:
+        try:
+            header, words = parse_image(base64.b64decode(request['image'], validate=True))
+        except (binascii.Error, ImageError) as e:
+            raise ValueError(f"Error loading image - {str(e)}")
+        if header.memory_size > MAX_MEMORY:
+            raise ValueError(f"Error loading image - memory size is larger than {MAX_MEMORY} words.")
+        limit = 9999 if header.file_format == 'old' else 99999
+        if len(words) and (min(words) < -limit or max(words) > limit):
+            raise ValueError(f"Error loading image - words must be between {-limit} and {limit}.")
+        simulator = UVSim(input_source=[], output_sink=sink, memory_size=header.memory_size)
+        simulator.load_words(words)
+        simulator.file_format = header.file_format
+        simulator.program_counter = header.entry_point
+    else:
+        result = parse_program(request['program'].encode(), None, 250)
+        if not result.ok:
+            raise ValueError(result.messages()[-1])
+        simulator = UVSim(input_source=[], output_sink=sink)
+        simulator.load_words(result.words)
+        simulator.file_format = result.file_format
+    return simulator
+
+
+def run_request(request):
+    """
+    Runs one request in a worker process and returns its reply.
+    """
+    reply = {
+        'halt_reason': None,
+        'accumulator': 0,
+        'outputs': [],
+        'instruction_count': 0,
+        'program_counter': 0,
+        'error': None,
+        'elapsed': 0.0,
+    }
+    try:
+        simulator = load_request(request)
+    except ValueError as e:
+        reply['halt_reason'] = 'load_error'
+        reply['error'] = str(e)
+        return reply
+
+    simulator.input_source = IteratorInput(request['inputs'])
+    start = time.perf_counter()
+    signal.setitimer(signal.ITIMER_REAL, request['timeout'])
+    try:
+        if simulator.start() and simulator.run_slice(request['max_instructions']) == 'paused':
+            simulator.halt_reason = 'step_limit'
+    except ValueError as e:
+        reply['error'] = str(e)
+    except JobTimeout:
+        simulator.halt_reason = 'timeout'
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+    reply['elapsed'] = round(time.perf_counter() - start, 6)
+
+    reply['halt_reason'] = simulator.halt_reason
+    reply['accumulator'] = simulator.accumulator
+    reply['outputs'] = simulator.output_sink.values
+    reply['instruction_count'] = simulator.instruction_count
+    reply['program_counter'] = simulator.program_counter
+    return reply
+
+
+class SimulationService:
+    def __init__(self, workers=None, queue_limit=64, max_instructions=10_000_000, max_seconds=10.0):
+        self.workers = workers or multiprocessing.cpu_count()
+        self.queue_limit = queue_limit
+        self.max_instructions = max_instructions
+        self.max_seconds = max_seconds
+        self.answer_margin = 5  # Seconds past a request's timeout to wait for its worker
+        self.pool = multiprocessing.Pool(self.workers, initializer=warm_worker)
+        self.slots = threading.BoundedSemaphore(self.workers + queue_limit)
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.instructions = 0
+
+    def check_request(self, request):
+        """
+        Fills in the budgets of a decoded request and returns it, or raises
+        ValueError describing what is wrong with it.
+        """
+        if not isinstance(request, dict):
+            raise ValueError("Request must be a JSON object.")
+        if not isinstance(request.get('program'), str) and not isinstance(request.get('image'), str):
+            raise ValueError("Request needs a 'program' text or a base64 'image'.")
+        inputs = request.get('inputs', [])
+        if not isinstance(inputs, list):
+            raise ValueError("'inputs' must be a list.")
+        if not all(isinstance(value, (int, str)) and not isinstance(value, bool) for value in inputs):
+            raise ValueError("'inputs' must hold only integers or strings.")
+        max_instructions = request.get('max_instructions', self.max_instructions)
+        timeout = request.get('timeout', self.max_seconds)
+        # bool is an int subclass and json.loads accepts NaN and Infinity
+        if not isinstance(max_instructions, int) or isinstance(max_instructions, bool) or max_instructions < 1:
+            raise ValueError("'max_instructions' must be a positive integer.")
+        if (not isinstance(timeout, (int, float)) or isinstance(timeout, bool)
+                or not math.isfinite(timeout) or timeout <= 0):
+            raise ValueError("'timeout' must be a positive number of seconds.")
+        return {
+            'program': request.get('program'),
+            'image': request.get('image'),
+            'inputs': inputs,
+            'max_instructions': min(max_instructions, self.max_instructions),
+            'timeout': min(timeout, self.max_seconds),
+        }
+
+    def submit(self, request):
+        """
+        Runs a checked request on the pool. Returns (HTTP status, reply).
+        """
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            return 503, {'error': "Server busy - try again later."}
+        with self.lock:
+            self.in_flight += 1
+        try:
+            # The slot is freed when the pool is done with the job, even if
+            # the client was already answered with a 504, so the pool never
+            # holds more than workers + queue_limit jobs.
+            pending = self.pool.apply_async(run_request, (request,), callback=self.finish, error_callback=self.finish)
+        except Exception as e:
+            self.finish()
+            with self.lock:
+                self.failed += 1
+            return 500, {'error': f"Execution error: {str(e)}"}
+        try:
+            reply = pending.get(request['timeout'] + self.answer_margin)  # The worker stops itself at the timeout
+        except multiprocessing.TimeoutError:
+            with self.lock:
+                self.failed += 1
+            return 504, {'error': "Worker did not answer in time."}
+        except Exception as e:
+            with self.lock:
+                self.failed += 1
+            return 500, {'error': f"Execution error: {str(e)}"}
+        with self.lock:
+            self.completed += 1
+            self.instructions += reply['instruction_count']
+        return 200, reply
+
+    def finish(self, result=None):
+        """
+        Frees the slot of a job the pool has finished with.
+        """
+        with self.lock:
+            self.in_flight -= 1
+        self.slots.release()
+
+    def health(self):
+        with self.lock:
+            return {
+                'status': 'ok',
+                'workers': self.workers,
+                'queue_limit': self.queue_limit,
+                'in_flight': self.in_flight,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'failed': self.failed,
+                'instructions': self.instructions,
+                'uptime': round(time.time() - self.started, 3),
+            }
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    def send_json(self, status, body, headers=()):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path in ("/health", "/metrics"):
+            self.send_json(200, self.server.service.health())
+        else:
+            self.send_json(404, {'error': "Not found."})
+
+    def do_POST(self):
+        if self.path != "/run":
+            self.send_json(404, {'error': "Not found."})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.send_json(400, {'error': "Content-Length must be a whole number of bytes."})
+            return
+        if length > MAX_BODY:
+            self.send_json(413, {'error': f"Request is larger than {MAX_BODY} bytes."})
+            return
+        try:
+            request = self.server.service.check_request(json.loads(self.rfile.read(length)))
+        except ValueError as e:  # Also covers malformed JSON
+            self.send_json(400, {'error': str(e)})
+            return
+        status, reply = self.server.service.submit(request)
+        self.send_json(status, reply, [("Retry-After", "1")] if status == 503 else ())
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(port=0, verbose=False, **options):
+    """
+    Starts the worker pool and returns a server bound to localhost; call
+    serve_forever() on it. Port 0 picks a free port (see server_address).
+    The options are passed to SimulationService.
+    """
+    service = SimulationService(**options)
+    try:
+        server = ThreadingHTTPServer((HOST, port), RequestHandler)
+    except OSError:
+        service.close()
+        raise
+    server.service = service
+    server.verbose = verbose
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="uvsim-server", description="Serve BasicML program runs on localhost.")
+    parser.add_argument("--port", type=int, default=8450)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--queue", type=int, default=64, help="requests allowed to wait for a worker (default: 64)")
+    parser.add_argument("--max-instructions", type=int, default=10_000_000, help="largest instruction budget per request")
+    parser.add_argument("--max-seconds", type=float, default=10.0, help="largest time budget per request")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.port, args.verbose, workers=args.workers, queue_limit=args.queue,
+                         max_instructions=args.max_instructions, max_seconds=args.max_seconds)
+    print(f"Serving on http://{HOST}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""
+Time-travel debugging for UVSim.
+
+A History records a run so it can be stepped backwards and forwards again.
+Every interval steps it takes a snapshot of memory and the registers, and
+for every STORE or READ that changed memory it keeps a write record of the
+cell and its new value. Memory cost therefore grows with the writes a
+program makes and the snapshots, not with the number of steps. Any step is
+rebuilt by replaying forward from the nearest snapshot before it with the
+simulator's own handlers, taking READ values from the write records, so a
+move costs at most interval replayed steps.
+
+    history = History()
+    simulator.attach(history)
+    simulator.execute()
+    history.back(simulator, 10)         # Ten instructions back
+    history.reverse_continue(simulator, {12})  # Back to the last time 012 was about to run
+    history.forward(simulator)
+
+Moving through the history only changes the simulator's registers and
+memory; output already written stays written. Running the simulator again
+from an earlier step drops the steps that followed it, since the new run
+may take another path.
+"""
+import bisect
+from array import array
+
+
+class Snapshot:
+    def __init__(self, step, memory, accumulator, program_counter, writes):
+        self.step = step        # Machine state as it was before this step ran
+        self.memory = memory
+        self.accumulator = accumulator
+        self.program_counter = program_counter
+        self.writes = writes    # Write records of the steps before it
+
+
+class History:
+    def __init__(self, interval=1024, max_steps=1_000_000):
+        if interval < 1:
+            raise ValueError("Snapshot interval must be at least 1 step.")
+        self.interval = interval
+        self.max_steps = max_steps
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets the recorded run. Call between runs of the same simulator.
+        """
+        self.first = 0              # Oldest step still recorded
+        self.position = 0           # Step the simulator is about to run
+        self.end = 0                # Steps recorded
+        self.write_steps = array('q')       # Per write record, in step order
+        self.write_addresses = array('q')
+        self.new_values = array('q')
+        self.write_base = 0         # Write records dropped with old steps
+        self.writes = 0             # Write records of the steps before position
+        self.snapshots = []
+        self.snapshot_steps = array('q')    # Step of each snapshot, sorted, for bisect
+        self.head = None            # (accumulator, program counter, running, halt reason) after the last step
+        self.pending_value = None   # Value of the cell the current STORE or READ overwrites
+
+    # Recording
+
+    def before_step(self, simulator, address, opcode, operand):
+        if self.position < self.end:
+            self.truncate()
+        self.head = None
+        if not self.snapshots or self.snapshot_steps[-1] + self.interval <= self.position:
+            self.snapshots.append(Snapshot(self.position, simulator.snapshot_memory(),
+                                           simulator.accumulator, address, self.writes))
+            self.snapshot_steps.append(self.position)
+        if (opcode == 10 or opcode == 21) and operand < len(simulator.memory):
+            self.pending_value = simulator.memory[operand]
+
+    def after_step(self, simulator, address, opcode, operand):
+        # Recorded here, not in before_step, since a READ waiting for input
+        # gets before_step again when it is retried
+        if (opcode == 10 or opcode == 21) and operand < len(simulator.memory):
+            value = simulator.memory[operand]
+            if value != self.pending_value:
+                self.write_steps.append(self.position)
+                self.write_addresses.append(operand)
+                self.new_values.append(value)
+                self.writes += 1
+        self.position += 1
+        self.end = self.position
+        if self.max_steps is not None and self.end - self.first > self.max_steps + self.max_steps // 2:
+            self.drop_oldest()
+
+    def truncate(self):
+        """
+        Drops the steps after position, when a run carries on from an
+        earlier step.
+        """
+        kept = self.writes - self.write_base
+        for values in (self.write_steps, self.write_addresses, self.new_values):
+            del values[kept:]
+        kept = bisect.bisect_right(self.snapshot_steps, self.position)
+        del self.snapshots[kept:]
+        del self.snapshot_steps[kept:]
+        self.end = self.position
+        self.head = None
+
+    def drop_oldest(self):
+        """
+        Drops steps from the start so that about max_steps remain. The
+        history always starts at a snapshot.
+        """
+        index = bisect.bisect_right(self.snapshot_steps, self.end - self.max_steps) - 1
+        if index <= 0:
+            return
+        oldest = self.snapshots[index]
+        for values in (self.write_steps, self.write_addresses, self.new_values):
+            del values[:oldest.writes - self.write_base]
+        del self.snapshots[:index]
+        del self.snapshot_steps[:index]
+        self.first = oldest.step
+        self.write_base = oldest.writes
+
+    # Moving
+
+    def back(self, simulator, steps=1):
+        """
+        Undoes up to steps instructions and returns how many were undone.
+        """
+        start = self.position
+        self.goto(simulator, max(self.first, start - steps))
+        return start - self.position
+
+    def forward(self, simulator, steps=1):
+        """
+        Redoes up to steps recorded instructions and returns how many were
+        redone. Nothing runs past the last recorded step.
+        """
+        start = self.position
+        self.goto(simulator, min(self.end, start + steps))
+        return self.position - start
+
+    def reverse_continue(self, simulator, breakpoints):
+        """
+        Goes back, at least one step, to the latest recorded step about to
+        run an address in breakpoints, or to the oldest step when none is.
+        Returns the number of steps undone.
+        """
+        start = self.position
+        if start <= self.first:
+            return 0
+        found = self.first
+        index = bisect.bisect_right(self.snapshot_steps, start - 1) - 1
+        while index >= 0 and found == self.first:
+            # Replay one snapshot interval, newest first, noting the steps
+            # that were about to run a breakpoint address
+            self.goto(simulator, self.snapshot_steps[index])
+            last = min(self.snapshot_steps[index + 1] if index + 1 < len(self.snapshots) else start, start) - 1
+            while True:
+                if self.position > self.first and simulator.program_counter in breakpoints:
+                    found = self.position
+                if self.position >= last:
+                    break
+                self.replay(simulator, self.position + 1)
+            index -= 1
+        self.goto(simulator, found)
+        return start - found
+
+    def goto(self, simulator, step):
+        """
+        Puts the simulator in the state it had before the given recorded
+        step ran. Replays from the current step when moving forward within
+        its snapshot interval, and from the nearest snapshot otherwise.
+        """
+        if not self.first <= step <= self.end:
+            raise ValueError(f"Step {step} is not recorded. Choose one between {self.first} and {self.end}.")
+        if self.position == self.end and self.head is None:
+            self.head = (simulator.accumulator, simulator.program_counter, simulator.running, simulator.halt_reason)
+        index = bisect.bisect_right(self.snapshot_steps, step) - 1
+        if index >= 0 and not self.snapshot_steps[index] <= self.position <= step:
+            snapshot = self.snapshots[index]
+            simulator.restore_memory(snapshot.memory)
+            simulator.accumulator = snapshot.accumulator
+            simulator.program_counter = snapshot.program_counter
+            self.position = snapshot.step
+            self.writes = snapshot.writes
+
+        if step < self.end:
+            self.replay(simulator, step)
+            simulator.running = True
+            simulator.halt_reason = None
+        else:
+            # The last step may have stopped the machine; its writes are
+            # applied, not run, and the registers are the ones it left
+            self.replay(simulator, step - 1)
+            if self.position < step:
+                self.apply_writes(simulator)
+                self.position = step
+            simulator.accumulator, simulator.program_counter, simulator.running, simulator.halt_reason = self.head
+        simulator.instruction_count = step
+
+    def replay(self, simulator, step):
+        """
+        Runs the recorded steps from position up to the given step. READ and
+        STORE take their effect from the write records and WRITE prints
+        nothing again; every other instruction runs its own handler.
+        """
+        memory = simulator.memory
+        decode = simulator.decode
+        handler_for = simulator.handler_for
+        while self.position < step:
+            address = simulator.program_counter
+            opcode, operand = decode(address)
+            simulator.program_counter = address + 1
+            if opcode != 10 and opcode != 11 and opcode != 21:
+                handler_for(opcode)(operand)
+            self.apply_writes(simulator)
+            self.position += 1
+
+    def apply_writes(self, simulator):
+        """
+        Applies the write record of the step at position, if it has one.
+        """
+        index = self.writes - self.write_base
+        if index < len(self.write_steps) and self.write_steps[index] == self.position:
+            address = self.write_addresses[index]
+            simulator.memory[address] = self.new_values[index]
+            simulator.decoded[address] = None
+            self.writes += 1
+
+    def memory_bytes(self):
+        """
+        Returns the bytes held by the write records and snapshots.
+        """
+        arrays = (self.write_steps, self.write_addresses, self.new_values, self.snapshot_steps)
+        return (sum(values.itemsize * len(values) for values in arrays)
+                + sum(snapshot.memory.itemsize * len(snapshot.memory) for snapshot in self.snapshots))
@@ -0,0 +1,157 @@
+"""
+Instruction trace recorder for UVSim.
+
+A Tracer keeps the last capacity instructions a program ran as
+(address, opcode, operand, accumulator) entries, where accumulator is the
+value after the instruction. Entries are written into one preallocated
+array used as a ring buffer, so tracing does not allocate while the
+program runs. Attach a tracer to turn it on:
+
+    tracer = Tracer(capacity=4096, dump_path="crash.trace")
+    simulator.attach(tracer)
+    simulator.execute()
+
+With a dump_path, the trace is saved as soon as an instruction stops the
+machine with an error, such as an overflow or a division by zero. Errors
+that raise, such as invalid input, leave the trace in memory for the
+caller to dump(). A dump_path ending in .csv is written as CSV, anything
+else in the binary format:
+
+    offset  size  field
+    0       4     magic, b"UVST"
+    4       2     format version (1)
+    6       2     reserved, 0
+    8       4     capacity in entries
+    12      4     number of entries stored
+    16      8     number of instructions traced in total
+    24      32    first entry: address, opcode, operand and accumulator as
+                  little-endian 64-bit integers, oldest entry first
+
+Read either format back with read_trace().
+"""
+import csv
+import struct
+import sys
+from array import array
+
+MAGIC = b"UVST"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIQ")
+FIELDS = 4  # Array items per entry
+CSV_COLUMNS = ('step', 'address', 'opcode', 'operand', 'accumulator')
+
+
+class TraceError(ValueError):
+    pass
+
+
+class Tracer:
+    def __init__(self, capacity=4096, dump_path=None):
+        if capacity < 1:
+            raise ValueError("Trace capacity must be at least 1 entry.")
+        self.capacity = capacity
+        self.dump_path = dump_path
+        self.buffer = array('q', bytes(8 * FIELDS * capacity))
+        self.end = FIELDS * capacity
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets every entry. Call between runs to trace each on its own.
+        """
+        self.next = 0     # Index in buffer of the entry the next step writes
+        self.last = 0     # Index in buffer of the entry of the current step
+        self.steps = 0    # Instructions traced since the last reset
+        self.dumped = None
+
+    def before_step(self, simulator, address, opcode, operand):
+        buffer = self.buffer
+        slot = self.next
+        buffer[slot] = address
+        buffer[slot + 1] = opcode
+        buffer[slot + 2] = operand
+        buffer[slot + 3] = simulator.accumulator  # Kept if the instruction raises
+        self.last = slot
+        slot += FIELDS
+        self.next = slot if slot < self.end else 0
+        self.steps += 1
+
+    def after_step(self, simulator, address, opcode, operand):
+        self.buffer[self.last + 3] = simulator.accumulator
+        if not simulator.running and self.dump_path is not None and simulator.halt_reason != 'halt':
+            self.dump(self.dump_path)
+
+    def __len__(self):
+        return min(self.steps, self.capacity)
+
+    def ordered(self):
+        """
+        Returns a copy of the stored entries' array items, oldest first.
+        """
+        if self.steps < self.capacity:
+            return self.buffer[:FIELDS * self.steps]
+        return self.buffer[self.next:] + self.buffer[:self.next]
+
+    def entries(self):
+        """
+        Returns the stored entries as (step, address, opcode, operand,
+        accumulator) tuples, oldest first. Steps count from 0 at the
+        first instruction traced.
+        """
+        return rows(self.ordered(), self.steps - len(self))
+
+    def dump(self, filename):
+        """
+        Saves the stored entries, as CSV when the filename ends in .csv and
+        in the binary format otherwise.
+        """
+        if filename.lower().endswith('.csv'):
+            self.dump_csv(filename)
+        else:
+            self.dump_binary(filename)
+        self.dumped = filename
+
+    def dump_binary(self, filename):
+        items = self.ordered()
+        if sys.byteorder != 'little':
+            items.byteswap()
+        with open(filename, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, 0, self.capacity, len(self), self.steps))
+            file.write(items.tobytes())
+
+    def dump_csv(self, filename):
+        with open(filename, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(CSV_COLUMNS)
+            writer.writerows(self.entries())
+
+
+def rows(items, first_step):
+    return [(first_step + index,) + tuple(items[FIELDS * index:FIELDS * index + FIELDS])
+            for index in range(len(items) // FIELDS)]
+
+
+def read_trace(filename):
+    """
+    Reads a trace saved by Tracer.dump in either format and returns its
+    (step, address, opcode, operand, accumulator) tuples, oldest first.
+    """
+    with open(filename, 'rb') as file:
+        data = file.read()
+    if not data.startswith(MAGIC):
+        lines = data.decode().splitlines()
+        if not lines or tuple(lines[0].split(',')) != CSV_COLUMNS:
+            raise TraceError(f"{filename} is not a UVSim trace.")
+        return [tuple(int(value) for value in row) for row in csv.reader(lines[1:])]
+    if len(data) < HEADER.size:
+        raise TraceError("Trace is too short to hold a header.")
+    _, version, _, _, count, steps = HEADER.unpack_from(data)
+    if version != VERSION:
+        raise TraceError(f"Unsupported trace version {version}.")
+    items = array('q')
+    items.frombytes(data[HEADER.size:HEADER.size + 8 * FIELDS * count])
+    if len(items) != FIELDS * count:
+        raise TraceError(f"Trace is truncated: expected {count} entries.")
+    if sys.byteorder != 'little':
+        items.byteswap()
+    return rows(items, steps - count)
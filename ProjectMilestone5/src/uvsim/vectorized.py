@@ -0,0 +1,195 @@
+"""
+NumPy lockstep engine for UVSim.
+
+Runs one BasicML program over many input sequences at once. The
+accumulator, program counter and memory are NumPy arrays with one row per
+instance. Every step decodes the word at each instance's program counter
+and applies each opcode to all the instances that fetched it. Instances
+that halt, overflow or fail are masked out, so they keep their final state
+while the rest carry on.
+
+Requires NumPy (pip install numpy).
+"""
+import numpy as np
+
+from .core import UVSim
+
+
+class LockstepUVSim:
+    def __init__(self, memory_size=250):
+        self.program = [0] * memory_size
+        self.file_format = None
+
+    def load_program_from_file(self, filename):
+        """
+        Loads a program with UVSim.load_program_from_file so both engines
+        accept exactly the same files.
+        """
+        simulator = UVSim(memory_size=len(self.program))
+        if not simulator.load_program_from_file(filename):
+            return False
+        self.load_memory(simulator.memory, simulator.file_format)
+        return True
+
+    def load_memory(self, memory, file_format):
+        """
+        Uses an already loaded memory image and its word format.
+        """
+        self.program = list(memory)
+        self.file_format = file_format
+
+    def prepare_inputs(self, input_sequences, word_limit):
+        """
+        Converts the input sequences into a padded array. Values that READ
+        would reject (not an integer or out of range) are flagged so the
+        instance stops with 'invalid_input' when it reaches them.
+        """
+        width = max((len(sequence) for sequence in input_sequences), default=0)
+        values = np.zeros((len(input_sequences), width), dtype=np.int64)
+        valid = np.zeros((len(input_sequences), width), dtype=bool)
+        for row, sequence in enumerate(input_sequences):
+            for column, raw in enumerate(sequence):
+                try:
+                    value = int(raw)
+                except ValueError:
+                    continue
+                if -word_limit <= value <= word_limit:
+                    values[row, column] = value
+                    valid[row, column] = True
+        lengths = np.array([len(sequence) for sequence in input_sequences], dtype=np.int64)
+        return values, valid, lengths
+
+    def run(self, input_sequences, max_steps=None):
+        """
+        Runs the loaded program once per input sequence and returns one
+        result per sequence. Each result is a dictionary with the WRITE
+        outputs, final accumulator, program counter, instruction count and
+        halt reason, matching what UVSim.execute leaves behind. Running out
+        of input counts as invalid input, and max_steps stops any instance
+        still running with 'step_limit'.
+        """
+        if self.file_format != 'old' and self.file_format != 'new':
+            raise ValueError("File format not recognized. Load a program first.")
+
+        count = len(input_sequences)
+        size = len(self.program)
+        divisor = 100 if self.file_format == 'old' else 1000
+        word_limit = 9999 if self.file_format == 'old' else 99999
+        inputs, input_valid, input_lengths = self.prepare_inputs(input_sequences, word_limit)
+
+        memory = np.tile(np.array(self.program, dtype=np.int64), (count, 1))
+        accumulator = np.zeros(count, dtype=np.int64)
+        program_counter = np.zeros(count, dtype=np.int64)
+        instruction_count = np.zeros(count, dtype=np.int64)
+        input_position = np.zeros(count, dtype=np.int64)
+        active = np.ones(count, dtype=bool)
+        halt_reason = np.full(count, None, dtype=object)
+        written_rows = []    # WRITE events, in execution order
+        written_values = []
+
+        def stop(rows, reason):
+            active[rows] = False
+            halt_reason[rows] = reason
+
+        steps = 0
+        while active.any():
+            if max_steps is not None and steps >= max_steps:
+                stop(np.flatnonzero(active), 'step_limit')
+                break
+            steps += 1
+
+            rows = np.flatnonzero(active)
+            words = np.abs(memory[rows, program_counter[rows]])
+            opcodes = words // divisor
+            operands = words % divisor
+
+            # An invalid address stops the instance before its counter moves on
+            bad_address = operands >= size
+            if bad_address.any():
+                stop(rows[bad_address], 'invalid_address')
+                rows = rows[~bad_address]
+                opcodes = opcodes[~bad_address]
+                operands = operands[~bad_address]
+
+            program_counter[rows] += 1
+            instruction_count[rows] += 1
+
+            for opcode in np.unique(opcodes):
+                selected = opcodes == opcode
+                group = rows[selected]
+                addresses = operands[selected]
+
+                if opcode == 10:  # READ
+                    position = input_position[group]
+                    available = position < input_lengths[group]
+                    ok = available.copy()
+                    ok[available] = input_valid[group[available], position[available]]
+                    stop(group[~ok], 'invalid_input')
+                    group, addresses, position = group[ok], addresses[ok], position[ok]
+                    memory[group, addresses] = inputs[group, position]
+                    input_position[group] += 1
+
+                elif opcode == 11:  # WRITE
+                    written_rows.append(group)
+                    written_values.append(memory[group, addresses])
+
+                elif opcode == 20:  # LOAD
+                    accumulator[group] = memory[group, addresses]
+
+                elif opcode == 21:  # STORE
+                    memory[group, addresses] = accumulator[group]
+
+                elif opcode in (30, 31, 33):  # ADD, SUBTRACT, MULTIPLY
+                    if opcode == 30:
+                        accumulator[group] += memory[group, addresses]
+                    elif opcode == 31:
+                        accumulator[group] -= memory[group, addresses]
+                    else:
+                        accumulator[group] *= memory[group, addresses]
+                    result = accumulator[group]
+                    stop(group[(result < -word_limit) | (result > word_limit)], 'overflow')
+
+                elif opcode == 32:  # DIVIDE
+                    divisors = memory[group, addresses]
+                    zero = divisors == 0
+                    stop(group[zero], 'divide_by_zero')
+                    accumulator[group[~zero]] //= divisors[~zero]
+
+                elif opcode == 40:  # BRANCH
+                    program_counter[group] = addresses
+
+                elif opcode == 41 or opcode == 42:  # BRANCHNEG, BRANCHZERO
+                    values = accumulator[group]
+                    taken = values < 0 if opcode == 41 else values == 0
+                    program_counter[group[taken]] = addresses[taken]
+
+                elif opcode == 43:  # HALT
+                    stop(group, 'halt')
+
+                else:
+                    stop(group, 'invalid_opcode')
+
+            # Instances that walked off the end of memory stop there
+            stop(np.flatnonzero(active & (program_counter >= size)), 'end_of_memory')
+
+        self.memory = memory
+        outputs = [[] for _ in range(count)]
+        if written_rows:
+            event_rows = np.concatenate(written_rows)
+            event_values = np.concatenate(written_values)
+            order = np.argsort(event_rows, kind='stable')
+            boundaries = np.searchsorted(event_rows[order], np.arange(count + 1))
+            sorted_values = event_values[order].tolist()
+            for row in range(count):
+                outputs[row] = sorted_values[boundaries[row]:boundaries[row + 1]]
+
+        return [
+            {
+                'outputs': outputs[row],
+                'accumulator': int(accumulator[row]),
+                'program_counter': int(program_counter[row]),
+                'instruction_count': int(instruction_count[row]),
+                'halt_reason': halt_reason[row],
+            }
+            for row in range(count)
+        ]
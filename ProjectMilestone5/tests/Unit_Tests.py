@@ -1,6 +1,53 @@
+import asyncio
+import base64
+import contextlib
+import io
+import json
+import os
+import queue
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 import unittest
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
 from uvsim import UVSim
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class TempFolderTest:
+    """
+    Mixin giving each test its own temporary folder, removed afterwards.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.folder.name, name)
+
+    def write(self, name, text):
+        """
+        Writes text, or a list of lines, to a file in the folder and returns
+        its path.
+        """
+        if not isinstance(text, str):
+            text = "\n".join(text) + "\n"
+        with open(self.path(name), 'w') as file:
+            file.write(text)
+        return self.path(name)
+
+
 class TestUVSim(unittest.TestCase):
 
     def setUp(self):
@@ -55,5 +102,1562 @@ class TestUVSim(unittest.TestCase):
             self.sim.execute()
         self.assertEqual(len(captured.output), 0)
 
+class TestDecodedCache(unittest.TestCase):
+
+    def setUp(self):
+        self.sim = UVSim()
+        self.sim.file_format = 'old'
+
+    def run_quietly(self):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            self.sim.execute()
+        return output.getvalue()
+
+    def test_store_redecodes_cached_instruction(self):
+        self.sim.load_words([4003, 2010, 2103, 4001])  # BRANCH 03, LOAD 10, STORE 03, BRANCH 01
+        self.sim.memory[10] = 4300
+        self.run_quietly()
+        self.assertEqual(self.sim.memory[3], 4300)
+        self.assertEqual(self.sim.program_counter, 4)
+
+    def test_read_redecodes_cached_instruction(self):
+        self.sim.load_words([4002, 1002, 4001])  # BRANCH 02, READ 02, BRANCH 01
+        self.sim.get_input = lambda: "4300"
+        self.run_quietly()
+        self.assertEqual(self.sim.program_counter, 3)
+
+    def test_memory_edited_between_runs(self):
+        self.sim.load_words([2005, 4300])
+        self.sim.memory[5] = 7
+        self.run_quietly()
+        self.sim.memory[0] = 2006
+        self.sim.memory[6] = 9
+        self.sim.program_counter = 0
+        self.sim.running = True
+        self.run_quietly()
+        self.assertEqual(self.sim.accumulator, 9)
+
+class TestDispatchEngines(unittest.TestCase):
+
+    PROGRAMS = [
+        ([2020, 3121, 2120, 4205, 4001, 4300], {20: 5, 21: 1}),   # countdown loop
+        ([2020, 3321, 4300], {20: 999, 21: 999}),                  # multiply overflow
+        ([2020, 3221, 4300], {20: 10, 21: 0}),                     # divide by zero
+        ([2020, 5021, 4300], {20: 1}),                             # invalid opcode
+        ([2010, 2102, 3011], {10: 4300, 11: 1}),                   # store ahead into own block
+        ([4003, 2010, 2103, 4001], {10: 4300}),                    # store into a compiled branch
+        ([2010, 1111, 2012, 4100, 4300], {10: -3, 11: 7, 12: 0}),  # write, then branch on zero
+        ([2020, 3021, 2122, 4300], {20: 9000, 21: 1000}),         # fused ADD overflows before its STORE
+        ([4002, 2020, 3021, 2122, 1122, 4300], {20: 5, 21: 6}),   # jump into the middle of a fused sequence
+        ([2020, 3121, 4104, 4300, 1120, 4300], {20: 1, 21: 5}),   # LOAD, SUBTRACT, BRANCHNEG
+        ([2020, 3021, 2101, 2023, 4208, 1101, 4300, 0, 2024, 2123, 4000],
+         {20: 3000, 21: 122, 22: 500, 24: 1}),                    # STORE into a fused sequence, then rerun it
+    ]
+
+    def run_engine(self, engine, program, data, file_format='old'):
+        sim = UVSim(engine=engine)
+        sim.file_format = file_format
+        sim.load_words(program)
+        for address, value in data.items():
+            sim.memory[address] = value
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            sim.execute()
+        return output.getvalue(), sim.accumulator, sim.program_counter, sim.instruction_count
+
+    def test_engines_agree(self):
+        for engine in ('table', 'compiled', 'fused'):
+            for program, data in self.PROGRAMS:
+                with self.subTest(engine=engine, program=program):
+                    self.assertEqual(self.run_engine(engine, program, data),
+                                     self.run_engine('reference', program, data))
+
+    def test_invalid_address_stops_before_advancing(self):
+        for engine in UVSim.ENGINES:
+            output, _, pc, count = self.run_engine(engine, [20300], {}, file_format='new')
+            self.assertIn("Invalid memory address 300", output)
+            self.assertEqual((pc, count), (0, 0))
+
+    def test_opcode_past_the_table(self):
+        for engine in UVSim.ENGINES:
+            for file_format, word in (('old', 12345), ('new', 999000)):
+                with self.subTest(engine=engine, word=word):
+                    output, _, pc, count = self.run_engine(engine, [word], {}, file_format=file_format)
+                    self.assertIn(f"Invalid opcode {word // (100 if file_format == 'old' else 1000)}", output)
+                    self.assertEqual((pc, count), (1, 1))
+
+    def test_compiled_read_error_keeps_state(self):
+        sim = UVSim(engine='compiled')
+        sim.file_format = 'old'
+        sim.load_words([2005, 1006, 4300])
+        sim.memory[5] = 42
+        sim.get_input = lambda: "abc"
+        with contextlib.redirect_stdout(io.StringIO()):
+            with self.assertRaises(ValueError):
+                sim.execute()
+        self.assertEqual((sim.accumulator, sim.program_counter, sim.instruction_count), (42, 2, 2))
+
+    def test_fused_sequences_are_found(self):
+        from uvsim.peephole import FusedEngine
+        sim = UVSim(output_sink=[])
+        sim.file_format = 'old'
+        sim.load_words([2020, 3121, 2120, 2020, 4206, 4000, 4300])
+        sim.memory[20] = 3
+        sim.memory[21] = 1
+        sim.start()
+        engine = FusedEngine(sim)
+        engine.run()
+        self.assertEqual(engine.fused, 2)
+        self.assertEqual((sim.halt_reason, sim.instruction_count), ('halt', 18))
+
+    def test_written_sequences_are_not_fused_again(self):
+        from uvsim.peephole import FusedEngine
+        # Counts 30 down from 5, rewriting the LOAD at 00 on every pass
+        program = [2030, 3131, 2130, 4207, 2032, 2100, 4000, 4300]
+        data = {30: 5, 31: 1, 32: 2030}
+        sim = UVSim(output_sink=[])
+        sim.file_format = 'old'
+        sim.load_words(program)
+        for address, value in data.items():
+            sim.memory[address] = value
+        sim.start()
+        engine = FusedEngine(sim)
+        engine.run()
+        self.assertEqual((engine.fused, engine.written[0]), (1, 1))
+        self.assertEqual(self.run_engine('fused', program, data), self.run_engine('reference', program, data))
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            UVSim(engine='fastest')
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestLockstepEngine(unittest.TestCase):
+
+    # Reads two numbers, writes their sum and halts; negative sums loop back once.
+    PROGRAM = [1020, 1021, 2020, 3021, 2122, 1122, 4107, 4300, 4000]
+
+    def run_scalar(self, inputs):
+        sim = UVSim()
+        sim.file_format = 'old'
+        sim.load_words(self.PROGRAM)
+        remaining = iter(inputs)
+        sim.get_input = lambda: next(remaining, "end")
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            try:
+                sim.execute()
+            except ValueError:
+                pass
+        outputs = [int(line.split(": ")[1]) for line in output.getvalue().splitlines()
+                   if line.startswith("Output: ")]
+        return {'outputs': outputs, 'accumulator': sim.accumulator,
+                'program_counter': sim.program_counter,
+                'instruction_count': sim.instruction_count, 'halt_reason': sim.halt_reason}
+
+    def test_matches_scalar_runs(self):
+        from uvsim.vectorized import LockstepUVSim
+        sequences = [["1", "2"], ["-5", "1", "3", "4"], ["9999", "1"], ["7"], ["abc", "1"], ["-3", "2", "0", "0"]]
+        engine = LockstepUVSim()
+        engine.load_memory(self.PROGRAM + [0] * (250 - len(self.PROGRAM)), 'old')
+        results = engine.run(sequences)
+        for sequence, result in zip(sequences, results):
+            with self.subTest(inputs=sequence):
+                self.assertEqual(result, self.run_scalar(sequence))
+
+    def test_step_limit(self):
+        from uvsim.vectorized import LockstepUVSim
+        engine = LockstepUVSim()
+        engine.load_memory([4000] + [0] * 249, 'old')
+        result, = engine.run([[]], max_steps=10)
+        self.assertEqual((result['halt_reason'], result['instruction_count']), ('step_limit', 10))
+
+class TestBatchRunner(TempFolderTest, unittest.TestCase):
+
+    def test_run_job_record(self):
+        from uvsim.batch import Job, find_input_file, run_job
+        program = self.write("sum.txt", ["1020", "1021", "2020", "3021", "2122", "1122", "4300"])
+        self.write("sum.in", ["3", "4"])
+        record = run_job(Job(program, find_input_file(program, None, ".in")))
+        self.assertEqual(record['halt_reason'], 'halt')
+        self.assertEqual(record['outputs'], [7])
+        self.assertEqual((record['accumulator'], record['instruction_count']), (7, 7))
+
+    def test_run_job_timeout(self):
+        from uvsim.batch import Job, run_job
+        program = self.write("loop.txt", ["4000"])
+        record = run_job(Job(program, timeout=0.05))
+        self.assertEqual(record['halt_reason'], 'timeout')
+        self.assertGreater(record['instruction_count'], 0)
+
+    def test_run_job_load_error(self):
+        from uvsim.batch import run_job
+        record = run_job((self.write("bad.txt", ["12345"]), None, 'table', None))  # A plain tuple is a Job too
+        self.assertEqual(record['halt_reason'], 'load_error')
+
+    def test_find_programs(self):
+        from uvsim.batch import find_programs
+        paths = [self.write(name, ["4300"]) for name in ("b.txt", "a.txt")]
+        self.write("a.in", ["1"])
+        self.assertEqual(find_programs([self.folder.name], ".txt"), sorted(paths))
+
+class TestChannels(unittest.TestCase):
+
+    # Reads two numbers and writes both back.
+    ECHO = [1010, 1011, 1110, 1111, 4300]
+
+    def make_sim(self, **channels):
+        sim = UVSim(**channels)
+        sim.file_format = 'old'
+        sim.load_words(self.ECHO)
+        return sim
+
+    def test_list_sink_and_iterator_source(self):
+        values = []
+        sim = self.make_sim(input_source=["12", "-7"], output_sink=values)
+        sim.execute()
+        self.assertEqual(values, [12, -7])
+        self.assertIn("*** Program terminated normally ***", sim.output_sink.messages)
+
+    def test_exhausted_input_is_invalid(self):
+        sim = self.make_sim(input_source=["12"], output_sink=[])
+        with self.assertRaises(ValueError):
+            sim.execute()
+        self.assertEqual(sim.halt_reason, 'invalid_input')
+
+    def test_queue_source_and_callback_sink(self):
+        from uvsim.channels import CallbackOutput
+        inputs = queue.Queue()
+        inputs.put("5")
+        inputs.put("6")
+        batches = []
+        sink = CallbackOutput(lambda values, messages: batches.append(values), threshold=1000)
+        self.make_sim(input_source=inputs, output_sink=sink).execute()
+        self.assertEqual([value for batch in batches for value in batch], [5, 6])
+
+    def test_file_sink_batches_until_flush(self):
+        from uvsim.channels import FileOutput
+        file = io.StringIO()
+        sink = FileOutput(file, threshold=3)
+        sink.write(1)
+        sink.write(2)
+        self.assertEqual(file.getvalue(), "")
+        sink.write(3)
+        sink.message("done")
+        sink.flush()
+        self.assertEqual(file.getvalue(), "1\n2\n3\n")
+        self.assertEqual(sink.messages, ["done"])
+
+    def test_console_sink_keeps_output_format(self):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            self.make_sim(input_source=["1", "2"]).execute()
+        self.assertIn("Output: 1\nOutput: 2\n*** Program terminated normally ***", output.getvalue())
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        from uvsim.profiler import Profiler
+        self.sim = UVSim(output_sink=[])
+        self.sim.file_format = 'old'
+        # Counts down from 3: the BRANCHZERO at 03 falls through twice, then is taken.
+        self.sim.load_words([2020, 3121, 2120, 4205, 4001, 4300])
+        self.sim.memory[20] = 3
+        self.sim.memory[21] = 1
+        self.profiler = Profiler(len(self.sim.memory))
+        self.sim.attach(self.profiler)
+
+    def test_counts(self):
+        self.sim.execute()
+        report = self.profiler.report()
+        self.assertEqual(report['instructions'], self.sim.instruction_count)
+        self.assertEqual(report['opcodes']['SUBTRACT'], 3)
+        self.assertEqual(report['addresses'][3], {'count': 3, 'taken': 1, 'not_taken': 2, 'taken_ratio': 1 / 3})
+        self.assertEqual(report['classes']['control']['count'], 6)
+
+    def test_same_result_as_engine(self):
+        self.sim.execute()
+        plain = UVSim(output_sink=[])
+        plain.file_format = 'old'
+        plain.memory[:] = self.sim.memory
+        plain.memory[20] = 3
+        plain.execute()
+        self.assertEqual((plain.accumulator, plain.program_counter, plain.instruction_count),
+                         (self.sim.accumulator, self.sim.program_counter, self.sim.instruction_count))
+
+    def test_exports(self):
+        self.sim.execute()
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "profile.json")
+            self.profiler.to_json(path)
+            with open(path) as file:
+                self.assertEqual(json.load(file)['instructions'], self.sim.instruction_count)
+        self.assertIn("BRANCHZERO", self.profiler.format_text())
+
+    def test_sizes_itself_to_the_simulator(self):
+        from uvsim.profiler import Profiler
+        sim = UVSim(output_sink=[], memory_size=1000)
+        sim.file_format = 'new'
+        sim.load_words([40999])
+        sim.memory[999] = 123000  # Opcode 123, past the 250 cells a profiler used to assume
+        profiler = Profiler()
+        sim.attach(profiler)
+        sim.execute()
+        self.assertEqual(sim.halt_reason, 'invalid_opcode')
+        report = profiler.report()
+        self.assertEqual(report['opcodes'], {'BRANCH': 1, 'INVALID 100+': 1})
+        self.assertEqual(report['classes']['invalid']['count'], 1)
+        self.assertEqual(report['addresses'][999], {'count': 1})
+
+class TestMemorySize(unittest.TestCase):
+
+    def test_large_memory_is_compact(self):
+        sim = UVSim(memory_size=1_000_000)
+        self.assertEqual(len(sim.memory), 1_000_000)
+        self.assertEqual(sim.memory.itemsize, 4)
+
+    def test_addresses_checked_against_memory_size(self):
+        for engine in UVSim.ENGINES:
+            sim = UVSim(engine=engine, output_sink=[], memory_size=100)
+            sim.file_format = 'new'
+            sim.load_words([20150])
+            sim.execute()
+            self.assertEqual(sim.halt_reason, 'invalid_address')
+            self.assertIn("Must be between 000 and 099.", sim.output_sink.messages[1])
+
+    def test_runs_off_end_of_small_memory(self):
+        for engine in UVSim.ENGINES:
+            sim = UVSim(engine=engine, output_sink=[], memory_size=3)
+            sim.file_format = 'old'
+            sim.load_words([2000, 3000, 2000])
+            sim.execute()
+            self.assertEqual((sim.halt_reason, sim.program_counter), ('end_of_memory', 3))
+
+    def test_loader_respects_memory_size(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "long.txt")
+            with open(path, 'w') as file:
+                file.write("4300\n" * 11)
+            sim = UVSim(output_sink=[], memory_size=10)
+            self.assertFalse(sim.load_program_from_file(path))
+            self.assertIn("maximum program size of 10 lines", sim.output_sink.messages[-1])
+
+    def test_snapshot_and_restore(self):
+        sim = UVSim(output_sink=[])
+        sim.load_words([2005, 2106, 4300, 0, 0, 77])
+        sim.file_format = 'old'
+        snapshot = sim.snapshot_memory()
+        sim.execute()
+        self.assertEqual(sim.memory[6], 77)
+        sim.restore_memory(snapshot)
+        self.assertEqual(sim.memory[6], 0)
+
+class TestFastLoader(TempFolderTest, unittest.TestCase):
+
+    def test_matches_line_by_line_loader(self):
+        path = self.write("program.txt", "1007\n\n  1008 \n-207\n-9999\n4300\n")
+        legacy = UVSim(output_sink=[])
+        fast = UVSim(output_sink=[])
+        self.assertTrue(legacy.load_program_from_file(path))
+        self.assertTrue(fast.load_program_fast(path))
+        self.assertEqual(list(fast.memory), list(legacy.memory))
+        self.assertEqual(fast.file_format, 'old')
+
+    def test_reports_every_problem(self):
+        from uvsim.loader import load_program
+        result = load_program(self.write("program.txt", "012345\n1234\n12a456\n999999\n12345\n"))
+        self.assertFalse(result.ok)
+        self.assertEqual([line for line, _ in result.errors], [2, 3, 5])
+        self.assertEqual([line for line, _ in result.warnings], [4])
+
+    def test_program_too_large(self):
+        from uvsim.loader import load_program
+        result = load_program(self.write("program.txt", "4300\n" * 4), memory_size=3)
+        self.assertEqual(len(result.errors), 1)
+        self.assertIn("maximum program size of 3 lines", result.errors[0][1])
+
+    def test_large_fixed_width_file(self):
+        from uvsim.loader import load_program
+        words = [(index * 7919) % 100000 for index in range(20000)]
+        path = self.write("program.txt", "".join(f"{word:06d}\n" for word in words))
+        result = load_program(path, memory_size=len(words))
+        self.assertTrue(result.ok)
+        self.assertEqual(result.file_format, 'new')
+        self.assertEqual(list(result.words), words)
+
+class TestProgramImage(TempFolderTest, unittest.TestCase):
+    def test_text_image_round_trip(self):
+        from uvsim.image import image_to_text, read_image, text_to_image
+        text = self.write("program.txt", "1007\n-207\n1107\n4300\n-9999\n")
+        result = text_to_image(text, self.path("program.uvsi"))
+        self.assertTrue(result.ok)
+        header, words = read_image(self.path("program.uvsi"))
+        self.assertEqual(header.file_format, 'old')
+        self.assertEqual(header.memory_size, 250)
+        self.assertEqual(list(words), [1007, -207, 1107, 4300])
+        image_to_text(self.path("program.uvsi"), self.path("back.txt"))
+        with open(self.path("back.txt")) as file:
+            self.assertEqual(file.read(), "1007\n-207\n1107\n4300\n")
+
+    def test_negative_words_round_trip(self):
+        from uvsim.image import ImageError, image_to_text, read_image, text_to_image, write_image
+        for file_format, words in (('old', [1007, -7, -207, -999, 0, 4300]),
+                                   ('new', [10007, -7, -207, -99998, 0, 43000])):
+            with self.subTest(file_format=file_format):
+                write_image(self.path("program.uvsi"), words, file_format)
+                image_to_text(self.path("program.uvsi"), self.path("program.txt"))
+                self.assertTrue(text_to_image(self.path("program.txt"), self.path("back.uvsi")).ok)
+                header, back = read_image(self.path("back.uvsi"))
+                self.assertEqual((header.file_format, list(back)), (file_format, words))
+        # Four characters cannot hold a sign and four digits
+        write_image(self.path("program.uvsi"), [-1234], 'old')
+        self.assertRaises(ImageError, image_to_text, self.path("program.uvsi"), self.path("wide.txt"))
+        self.assertFalse(os.path.exists(self.path("wide.txt")))
+
+    def test_memory_size_is_bounded(self):
+        from uvsim.image import MAX_MEMORY_SIZE, ImageError, parse_image, write_image
+        write_image(self.path("huge.uvsi"), [4300], 'old', memory_size=MAX_MEMORY_SIZE + 1)
+        with open(self.path("huge.uvsi"), 'rb') as file:
+            self.assertRaises(ImageError, parse_image, file.read())
+        simulator = UVSim(output_sink=[])
+        self.assertFalse(simulator.load_image(self.path("huge.uvsi")))
+        self.assertIn("larger than", simulator.output_sink.messages[-1])
+        self.assertEqual(simulator.memory_size, 250)
+        write_image(self.path("largest.uvsi"), [4300], 'old', memory_size=MAX_MEMORY_SIZE)
+        self.assertTrue(simulator.load_image(self.path("largest.uvsi")))
+        self.assertEqual(len(simulator.memory), MAX_MEMORY_SIZE)
+
+    def test_load_image_matches_text_load(self):
+        from uvsim.image import text_to_image
+        text = self.write("program.txt", "010007\n011007\n043000\n")
+        text_to_image(text, self.path("program.uvsi"))
+        from_text = UVSim(input_source=[5], output_sink=[])
+        from_text.load_program_from_file(text)
+        from_image = UVSim(input_source=[5], output_sink=[])
+        from_image.memory[20] = 1234
+        self.assertTrue(from_image.load_image(self.path("program.uvsi")))
+        self.assertEqual(list(from_image.memory), list(from_text.memory))
+        self.assertEqual(from_image.file_format, 'new')
+        from_image.execute()
+        self.assertEqual(from_image.output_sink.values, [5])
+
+    def test_image_sets_memory_size_and_entry_point(self):
+        from uvsim.image import write_image
+        write_image(self.path("big.uvsi"), [0, 4300, 1100], 'old', memory_size=500, entry_point=1)
+        simulator = UVSim(output_sink=[])
+        self.assertTrue(simulator.load_image(self.path("big.uvsi")))
+        self.assertEqual(simulator.memory_size, 500)
+        self.assertEqual(len(simulator.memory), 500)
+        self.assertEqual(simulator.program_counter, 1)
+
+    def test_bad_images_are_rejected(self):
+        from uvsim.image import write_image
+        not_image = self.write("program.txt", "1007\n")
+        write_image(self.path("wide.uvsi"), [12345], 'old')
+        with open(self.path("short.uvsi"), 'wb') as file:
+            file.write(b"UVSI")
+        for name in (not_image, self.path("wide.uvsi"), self.path("short.uvsi"), self.path("missing.uvsi")):
+            simulator = UVSim(output_sink=[])
+            self.assertFalse(simulator.load_image(name))
+            self.assertTrue(simulator.output_sink.messages[-1].startswith("Error loading image"))
+            self.assertEqual(list(simulator.memory), [0] * 250)
+
+    def test_batch_runs_images(self):
+        from uvsim.batch import Job, run_job
+        from uvsim.image import text_to_image
+        text = self.write("program.txt", "1007\n1107\n4300\n")
+        text_to_image(text, self.path("program.uvsi"))
+        self.write("program.in", "42\n")
+        record = run_job(Job(self.path("program.uvsi"), self.path("program.in")))
+        self.assertEqual(record['halt_reason'], 'halt')
+        self.assertEqual(record['outputs'], [42])
+
+class TestProgramCache(TempFolderTest, unittest.TestCase):
+    def test_hits_by_path_and_by_content(self):
+        from uvsim.programcache import ProgramCache
+        cache = ProgramCache()
+        first = self.write("a.txt", "1007\n1107\n4300\n")
+        copy = self.write("b.txt", "1007\n1107\n4300\n")
+        self.assertEqual(list(cache.load(first).words), [1007, 1107, 4300])
+        self.assertEqual(cache.load(first).filename, first)
+        result = cache.load(copy)
+        self.assertEqual(result.filename, copy)
+        self.assertEqual(list(result.words), [1007, 1107, 4300])
+        self.assertEqual((cache.misses, cache.hits), (1, 2))
+
+    def test_changed_file_is_parsed_again(self):
+        from uvsim.programcache import ProgramCache
+        cache = ProgramCache()
+        path = self.write("a.txt", "1007\n4300\n")
+        cache.load(path)
+        self.write("a.txt", "1008\n1108\n4300\n")
+        self.assertEqual(list(cache.load(path).words), [1008, 1108, 4300])
+        self.assertEqual(cache.misses, 2)
+
+    def test_least_recently_used_is_evicted(self):
+        from uvsim.programcache import ProgramCache
+        cache = ProgramCache(max_entries=2)
+        paths = [self.write(f"{n}.txt", f"10{n:02d}\n4300\n") for n in range(3)]
+        cache.load(paths[0])
+        cache.load(paths[1])
+        cache.load(paths[0])
+        cache.load(paths[2])
+        self.assertEqual(cache.evictions, 1)
+        cache.load(paths[0])
+        self.assertEqual(cache.stats()['hits'], 2)
+        cache.load(paths[1])
+        self.assertEqual(cache.stats()['misses'], 4)
+
+    def test_disk_cache_is_shared(self):
+        from uvsim.programcache import ProgramCache
+        disk = self.path("cache")
+        path = self.write("a.txt", "010007\n011007\n043000\n")
+        ProgramCache(disk_dir=disk).load(path)
+        other = ProgramCache(disk_dir=disk)
+        result = other.load(path)
+        self.assertEqual((other.disk_hits, other.misses), (1, 0))
+        self.assertEqual(result.file_format, 'new')
+        self.assertEqual(list(result.words), [10007, 11007, 43000])
+
+    def test_errors_are_cached_in_memory_only(self):
+        from uvsim.programcache import ProgramCache
+        disk = self.path("cache")
+        cache = ProgramCache(disk_dir=disk)
+        path = self.write("bad.txt", "1007\n010007\n")
+        self.assertFalse(cache.load(path).ok)
+        self.assertFalse(cache.load(path).ok)
+        self.assertEqual(os.listdir(disk), [])
+        self.assertFalse(cache.load(self.path("missing.txt")).ok)
+
+    def test_simulator_loads_through_cache(self):
+        from uvsim.programcache import ProgramCache
+        cache = ProgramCache()
+        path = self.write("echo.txt", "1007\n1107\n4300\n")
+        for _ in range(2):
+            sim = UVSim(input_source=[9], output_sink=[])
+            self.assertTrue(sim.load_program_fast(path, cache=cache))
+            sim.execute()
+            self.assertEqual(sim.output_sink.values, [9])
+        self.assertEqual(cache.stats()['hit_ratio'], 0.5)
+
+class TestAsyncExecution(unittest.TestCase):
+
+    # Reads two numbers and writes their sum.
+    SUM = [1020, 1021, 2020, 3021, 2122, 1122, 4300]
+
+    def make_sim(self, words=SUM):
+        sim = UVSim()
+        sim.file_format = 'old'
+        sim.load_words(words)
+        return sim
+
+    def test_read_suspends_until_input(self):
+        from uvsim.asyncsim import AsyncSession
+
+        async def scenario():
+            session = AsyncSession(self.make_sim())
+            task = asyncio.ensure_future(session.run())
+            await asyncio.sleep(0)
+            self.assertTrue(session.waiting)
+            self.assertEqual(session.simulator.program_counter, 0)
+            await session.send(3)
+            await session.send(4)
+            values = [value async for value in session.outputs()]
+            return await task, values, session.simulator
+
+        halt_reason, values, sim = asyncio.run(scenario())
+        self.assertEqual((halt_reason, values), ('halt', [7]))
+        self.assertEqual(sim.instruction_count, 7)
+
+    def test_matches_execute(self):
+        from uvsim.asyncsim import run_program
+        from uvsim.channels import IteratorInput, ListOutput
+        for inputs in ([9000, 1000], [3, 4], [5]):
+            with self.subTest(inputs=inputs):
+                expected = self.make_sim()
+                expected.input_source = IteratorInput(inputs)
+                expected.output_sink = ListOutput()
+                sim = self.make_sim()
+                if len(inputs) < 2:
+                    self.assertRaises(ValueError, expected.execute)
+                    self.assertRaises(ValueError, asyncio.run, run_program(sim, inputs))
+                else:
+                    expected.execute()
+                    halt_reason, values = asyncio.run(run_program(sim, inputs))
+                    self.assertEqual(values, expected.output_sink.values)
+                self.assertEqual(sim.halt_reason, expected.halt_reason)
+                self.assertEqual(sim.instruction_count, expected.instruction_count)
+
+    def test_sessions_share_the_loop(self):
+        from uvsim.asyncsim import AsyncSession
+
+        # Counts down from 3000 before reading, so it needs many slices.
+        countdown = [2010, 3111, 2110, 4205, 4000, 1012, 1112, 4300] + [0] * 2 + [3000, 1]
+
+        async def scenario():
+            sessions = [AsyncSession(self.make_sim(countdown), slice_steps=100) for _ in range(50)]
+            tasks = [asyncio.ensure_future(session.run()) for session in sessions]
+            for number, session in enumerate(sessions):
+                await session.send(number)
+            results = await asyncio.gather(*tasks)
+            values = [[value async for value in session.outputs()] for session in sessions]
+            return results, values
+
+        results, values = asyncio.run(scenario())
+        self.assertEqual(results, ['halt'] * 50)
+        self.assertEqual(values, [[number] for number in range(50)])
+
+class TestSimulationServer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        from uvsim.server import make_server
+        cls.server = make_server(workers=2, queue_limit=2, max_instructions=100_000, max_seconds=2.0)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.server.service.close()
+
+    def post(self, body):
+        request = urllib.request.Request(self.url + "/run", data=json.dumps(body).encode(),
+                                         headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def test_run_text_program(self):
+        status, reply = self.post({'program': "1020\n1021\n2020\n3021\n2122\n1122\n4300\n", 'inputs': [3, 4]})
+        self.assertEqual(status, 200)
+        self.assertEqual(reply['halt_reason'], 'halt')
+        self.assertEqual((reply['outputs'], reply['accumulator'], reply['instruction_count']), ([7], 7, 7))
+
+    def test_run_image(self):
+        from uvsim.image import write_image
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "echo.uvsi")
+            write_image(path, [10007, 11007, 43000], 'new')
+            with open(path, 'rb') as file:
+                data = base64.b64encode(file.read()).decode()
+        status, reply = self.post({'image': data, 'inputs': [12345]})
+        self.assertEqual((status, reply['outputs'], reply['halt_reason']), (200, [12345], 'halt'))
+
+    def test_budgets(self):
+        status, reply = self.post({'program': "4000\n", 'max_instructions': 500})
+        self.assertEqual((reply['halt_reason'], reply['instruction_count']), ('step_limit', 500))
+        status, reply = self.post({'program': "4000\n", 'max_instructions': 10 ** 12})
+        self.assertEqual(reply['halt_reason'], 'step_limit')
+        self.assertEqual(reply['instruction_count'], 100_000)
+
+    def test_bad_requests(self):
+        self.assertEqual(self.post({'inputs': []})[0], 400)
+        self.assertEqual(self.post({'program': "4300\n", 'timeout': -1})[0], 400)
+        self.assertEqual(self.post({'program': "4300\n", 'max_instructions': True})[0], 400)
+        for inputs in ([None], [[1]], [3.9], [True]):
+            with self.subTest(inputs=inputs):
+                self.assertEqual(self.post({'program': "1020\n4300\n", 'inputs': inputs})[0], 400)
+        status, reply = self.post({'program': "12345\n"})
+        self.assertEqual((status, reply['halt_reason']), (200, 'load_error'))
+        status, reply = self.post({'image': base64.b64encode(b"not an image").decode()})
+        self.assertEqual(reply['halt_reason'], 'load_error')
+
+    def test_backpressure(self):
+        service = self.server.service
+        taken = 0
+        while service.slots.acquire(blocking=False):
+            taken += 1
+        try:
+            self.assertEqual(taken, 4)
+            status, reply = self.post({'program': "4300\n"})
+            self.assertEqual(status, 503)
+        finally:
+            for _ in range(taken):
+                service.slots.release()
+        self.assertEqual(self.post({'program': "4300\n"})[0], 200)
+
+    def test_bad_content_length(self):
+        import http.client
+        for length in ("abc", "-1"):
+            with self.subTest(length=length):
+                connection = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=10)
+                try:
+                    connection.putrequest("POST", "/run")
+                    connection.putheader("Content-Length", length)
+                    connection.endheaders()
+                    response = connection.getresponse()
+                    self.assertEqual(response.status, 400)
+                    self.assertIn("Content-Length", json.loads(response.read())['error'])
+                finally:
+                    connection.close()
+
+    def test_timeout_must_be_finite(self):
+        for timeout in (float('nan'), float('inf'), True):
+            with self.subTest(timeout=timeout):
+                # Sent raw, since json.dumps writes NaN and Infinity as bare words
+                body = '{"program": "4300\\n", "timeout": %s}' % json.dumps(timeout)
+                request = urllib.request.Request(self.url + "/run", data=body.encode())
+                with self.assertRaises(urllib.error.HTTPError) as raised:
+                    urllib.request.urlopen(request, timeout=10)
+                self.assertEqual(raised.exception.code, 400)
+                raised.exception.close()
+        request = self.server.service.check_request({'program': "4300\n", 'inputs': ["7", 7]})
+        self.assertEqual(request['inputs'], ["7", 7])
+
+    def test_slot_held_until_worker_finishes(self):
+        from uvsim.server import SimulationService
+        service = SimulationService(workers=1, queue_limit=0, max_instructions=10 ** 12, max_seconds=1.0)
+        self.addCleanup(service.close)
+        service.answer_margin = -0.8  # Give up on the worker long before it stops itself
+        status, _ = service.submit(service.check_request({'program': "4000\n"}))
+        self.assertEqual(status, 504)
+        self.assertFalse(service.slots.acquire(blocking=False))  # The loop still runs on the only worker
+        self.assertEqual(service.submit(service.check_request({'program': "4300\n"}))[0], 503)
+        for _ in range(100):
+            if service.health()['in_flight'] == 0:
+                break
+            time.sleep(0.05)
+        self.assertEqual(service.health()['in_flight'], 0)
+        self.assertEqual(service.submit(service.check_request({'program': "4300\n"}))[0], 200)
+
+    def test_health(self):
+        with urllib.request.urlopen(self.url + "/health", timeout=10) as response:
+            health = json.loads(response.read())
+        self.assertEqual((health['status'], health['workers']), ('ok', 2))
+        self.assertIn('rejected', health)
+
+class TestBackgroundRun(unittest.TestCase):
+
+    # Reads two numbers and writes their sum.
+    SUM = [1020, 1021, 2020, 3021, 2122, 1122, 4300]
+
+    def make_run(self, words):
+        from uvsim.background import BackgroundRun
+        sim = UVSim()
+        sim.file_format = 'old'
+        sim.load_words(words)
+        return BackgroundRun(sim, slice_steps=1000)
+
+    def wait_for(self, run, kind):
+        events = []
+        while not events or events[-1][0] != kind:
+            events.append(run.events.get(timeout=10))
+        return events
+
+    def test_streams_output_and_asks_for_input(self):
+        run = self.make_run(self.SUM)
+        run.start()
+        self.assertEqual(self.wait_for(run, 'input')[-1], ('input', 20))
+        run.send("3")
+        self.assertEqual(self.wait_for(run, 'input')[-1], ('input', 21))
+        run.send("4")
+        events = self.wait_for(run, 'done')
+        run.thread.join(10)
+        values = [value for event in events if event[0] == 'output' for value in event[1]]
+        self.assertEqual(values, [7])
+        self.assertEqual(events[-2], ('state', 7, 7, 7))
+        self.assertEqual(events[-1], ('done', 'halt'))
+
+    def test_pause_and_stop(self):
+        run = self.make_run([4000])
+        run.start()
+        run.pause()
+        self.wait_for(run, 'paused')
+        count = run.simulator.instruction_count
+        threading.Event().wait(0.05)
+        self.assertEqual(run.simulator.instruction_count, count)
+        run.resume()
+        self.wait_for(run, 'state')
+        run.stop()
+        events = self.wait_for(run, 'done')
+        run.thread.join(10)
+        self.assertEqual(events[-1], ('done', 'stopped'))
+        self.assertGreater(run.simulator.instruction_count, count)
+
+    def test_stop_while_waiting_for_input(self):
+        run = self.make_run(self.SUM)
+        run.start()
+        self.wait_for(run, 'input')
+        run.stop()
+        self.assertEqual(self.wait_for(run, 'done')[-1], ('done', 'stopped'))
+
+    def test_invalid_input_is_reported(self):
+        run = self.make_run(self.SUM)
+        run.start()
+        self.wait_for(run, 'input')
+        run.send("abc")
+        events = self.wait_for(run, 'done')
+        self.assertIn('error', [event[0] for event in events])
+        self.assertEqual(events[-1], ('done', 'invalid_input'))
+
+class TestOutputPane(unittest.TestCase):
+    class FakeText:
+        """Stands in for a Tk Text widget, one entry per line."""
+
+        def __init__(self):
+            self.lines = []
+            self.callbacks = []
+            self.inserts = 0
+
+        def after(self, delay, callback):
+            self.callbacks.append(callback)
+            return len(self.callbacks)
+
+        def config(self, **options):
+            pass
+
+        def insert(self, index, text):
+            self.inserts += 1
+            self.lines.extend(text.split("\n")[:-1])
+
+        def delete(self, start, end):
+            if end == "end":
+                self.lines = []
+            else:
+                del self.lines[:int(end.split(".")[0]) - 1]
+
+        def see(self, index):
+            pass
+
+        def run_callbacks(self):
+            callbacks, self.callbacks = self.callbacks, []
+            for callback in callbacks:
+                callback()
+
+    def test_lines_are_batched(self):
+        from uvsim.outputpane import OutputPane
+        widget = self.FakeText()
+        pane = OutputPane(widget, max_lines=100)
+        for number in range(10):
+            pane.write(f"Output: {number}")
+        self.assertEqual(len(widget.callbacks), 1)
+        self.assertEqual(widget.lines, [])
+        widget.run_callbacks()
+        self.assertEqual(widget.inserts, 1)
+        self.assertEqual(widget.lines, [f"Output: {number}" for number in range(10)])
+
+    def test_scrollback_is_bounded(self):
+        from uvsim.outputpane import OutputPane
+        widget = self.FakeText()
+        pane = OutputPane(widget, max_lines=50)
+        for flush in range(3):
+            pane.write("\n".join(str(number) for number in range(flush * 1000, flush * 1000 + 1000)))
+            widget.run_callbacks()
+        self.assertEqual(widget.lines, [str(number) for number in range(2950, 3000)])
+        self.assertEqual(len(pane.buffer.lines), 50)
+        self.assertEqual(pane.buffer.written, 3000)
+        pane.write("last")
+        widget.run_callbacks()
+        self.assertEqual(widget.lines[-2:], ["2999", "last"])
+        self.assertEqual(len(widget.lines), 50)
+
+class TestCycleDetector(unittest.TestCase):
+    def make_sim(self, words, inputs=()):
+        from uvsim.channels import ListOutput
+        from uvsim.cycledetector import CycleDetector
+        sim = UVSim(input_source=list(inputs), output_sink=ListOutput())
+        sim.file_format = 'old'
+        sim.load_words(words)
+        sim.attach(CycleDetector())
+        return sim
+
+    def run_program(self, words):
+        sim = self.make_sim(words)
+        sim.execute()
+        return sim
+
+    def test_infinite_loops_are_stopped(self):
+        for words in ([4000], [1199, 4000], [2099, 2198, 4000]):
+            with self.subTest(words=words):
+                sim = self.run_program(words)
+                self.assertEqual(sim.halt_reason, 'non_terminating')
+                self.assertLess(sim.instruction_count, 20)
+
+    def test_loop_through_memory_state(self):
+        # Flips address 10 between 0 and 1 forever.
+        sim = self.run_program([2010, 4205, 2012, 2110, 4000, 2011, 2110, 4000, 0, 0, 0, 1, 0])
+        self.assertEqual(sim.halt_reason, 'non_terminating')
+        self.assertIn("repeats the same 10 instructions", sim.output_sink.messages[-2])
+
+    def test_terminating_programs_are_untouched(self):
+        # Counts address 20 up to 500, then halts.
+        sim = self.run_program([2020, 3021, 2120, 3022, 4100, 4300] + [0] * 14 + [0, 1, -500])
+        self.assertEqual(sim.halt_reason, 'halt')
+        self.assertEqual(sim.memory[20], 500)
+        # Counting up without a limit ends in overflow, never a false alarm.
+        sim = self.run_program([2020, 3021, 2120, 4000] + [0] * 16 + [0, 1])
+        self.assertEqual(sim.halt_reason, 'overflow')
+
+    def test_read_restarts_detection(self):
+        # Reads and echoes forever; repeated input must not count as a loop.
+        sim = self.make_sim([1010, 1110, 4000], inputs=[3, 3, 3, 3])
+        self.assertRaises(ValueError, sim.execute)
+        self.assertEqual(sim.halt_reason, 'invalid_input')
+        self.assertEqual(sim.output_sink.values, [3, 3, 3, 3])
+
+    def test_batch_flag(self):
+        from uvsim.batch import Job, run_job
+        with tempfile.TemporaryDirectory() as folder:
+            program = os.path.join(folder, "loop.txt")
+            with open(program, 'w') as file:
+                file.write("4000\n")
+            record = run_job(Job(program, timeout=5, detect_loops=True))
+        self.assertEqual(record['halt_reason'], 'non_terminating')
+
+class TestAnalysis(unittest.TestCase):
+
+    # Reads a count into 30 and writes 31 that many times, then halts.
+    # 00 READ 30; 01 LOAD 30; 02 BRANCHZERO 08; 03 WRITE 31; 04 LOAD 30;
+    # 05 SUBTRACT 32; 06 STORE 30; 07 BRANCH 01; 08 HALT; 09 unreachable WRITE 33
+    COUNTDOWN = [1030, 2030, 4208, 1131, 2030, 3132, 2130, 4001, 4300, 1133] + [0] * 20 + [0, 7, 1]
+
+    def test_blocks_and_cells(self):
+        from uvsim.analysis import analyze
+        result = analyze(self.COUNTDOWN, 'old')
+        self.assertEqual([(block.start, block.end, block.successors) for block in result.blocks.values()],
+                         [(0, 0, [1]), (1, 2, [3, 8]), (3, 7, [1]), (8, 8, [])])
+        self.assertEqual(result.code, list(range(9)))
+        self.assertEqual(result.data, [30, 31, 32])
+        self.assertEqual(result.unreachable, [9])
+        self.assertEqual(result.self_modifying, [])
+        self.assertFalse(result.falls_off_end)
+        self.assertIs(result.block_of(5), result.blocks[3])
+
+    def test_loops_and_nesting(self):
+        from uvsim.analysis import analyze
+        # 00 LOAD 20; 01 BRANCHNEG 03; 02 BRANCH 01; 03 BRANCHZERO 00; 04 HALT
+        result = analyze([2020, 4103, 4001, 4200, 4300] + [0] * 16, 'old')
+        loops = {loop.header: loop for loop in result.loops}
+        self.assertEqual(sorted(loops), [0, 1])
+        self.assertEqual(loops[0].body, {0, 1, 2, 3})
+        self.assertEqual(loops[1].body, {1, 2})
+        self.assertEqual((loops[1].parent, loops[1].depth), (0, 2))
+        self.assertEqual((loops[0].parent, loops[0].depth), (None, 1))
+
+    def test_self_modifying_and_end_of_memory(self):
+        from uvsim.analysis import analyze
+        result = analyze([10001, 21002, 11000], 'new')
+        self.assertEqual(result.self_modifying, [(0, 1), (1, 2)])
+        self.assertTrue(result.falls_off_end)
+
+    def test_results_are_cached_per_image(self):
+        from uvsim.analysis import analyze, analyze_image
+        first = analyze(self.COUNTDOWN, 'old')
+        sim = UVSim()
+        sim.load_words(self.COUNTDOWN)
+        self.assertIs(analyze(sim.memory[:len(self.COUNTDOWN)], 'old'), first)
+        self.assertIsNot(analyze(self.COUNTDOWN, 'new'), first)
+        self.assertGreater(analyze_image.cache_info().hits, 0)
+        self.assertIn("Loop at 001", first.format_text())
+
+class TestResultCache(TempFolderTest, unittest.TestCase):
+
+    # Reads two numbers and writes their sum.
+    SUM = [1020, 1021, 2020, 3021, 2122, 1122, 4300]
+
+    def make_sim(self, words=SUM):
+        sim = UVSim()
+        sim.file_format = 'old'
+        sim.load_words(words)
+        return sim
+
+    def test_identical_runs_are_not_executed_again(self):
+        from uvsim.memo import ResultCache
+        cache = ResultCache()
+        first = cache.run(self.make_sim(), [3, 4])
+        sim = self.make_sim()
+        sim.execute = None  # Executing would fail
+        second = cache.run(sim, ["3", "4"])
+        self.assertEqual(second, first)
+        self.assertEqual((second['outputs'], second['halt_reason']), ([7], 'halt'))
+        self.assertEqual((sim.accumulator, sim.instruction_count), (7, 7))
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_key_covers_image_format_and_inputs(self):
+        from uvsim.memo import result_key
+        key = result_key(self.SUM, 'old', [3, 4])
+        self.assertNotEqual(key, result_key(self.SUM, 'old', [4, 3]))
+        self.assertNotEqual(key, result_key(self.SUM, 'new', [3, 4]))
+        self.assertNotEqual(key, result_key(self.SUM + [0], 'old', [3, 4]))
+        self.assertNotEqual(key, result_key(self.SUM, 'old', [3, 4], program_counter=1))
+        self.assertNotEqual(key, result_key(self.SUM, 'old', [3, 4], accumulator=1))
+        self.assertNotEqual(key, result_key(self.SUM, 'old', [3, 4], options=['detect_loops']))
+        self.assertEqual(key, result_key(self.SUM, 'old', ["3", " 4"]))
+
+    def test_starting_accumulator_is_part_of_the_key(self):
+        from uvsim.memo import ResultCache
+        cache = ResultCache()
+        results = []
+        for accumulator in (5, 9):
+            sim = self.make_sim([3010, 2111, 1111, 4300])  # ADD 10, STORE 11, WRITE 11
+            sim.accumulator = accumulator
+            results.append(cache.run(sim, []))
+        self.assertEqual([result['outputs'] for result in results], [[5], [9]])
+
+    def test_lru_is_bounded(self):
+        from uvsim.memo import ResultCache
+        cache = ResultCache(max_entries=2)
+        for inputs in ([1, 1], [2, 2], [3, 3]):
+            cache.run(self.make_sim(), inputs)
+        self.assertEqual(len(cache.entries), 2)
+        cache.run(self.make_sim(), [1, 1])
+        self.assertEqual(cache.stats()['misses'], 4)
+
+    def test_sqlite_store_is_shared(self):
+        from uvsim.memo import ResultCache
+        path = self.path("results.sqlite")
+        writer = ResultCache(db_path=path)
+        writer.run(self.make_sim(), [5, 6])
+        writer.run(self.make_sim(), [5])  # Runs out of input
+        writer.close()
+        reader = ResultCache(db_path=path)
+        self.assertEqual(reader.run(self.make_sim(), [5, 6])['outputs'], [11])
+        self.assertEqual(reader.run(self.make_sim(), [5])['halt_reason'], 'invalid_input')
+        self.assertEqual(reader.stats()['db_hits'], 2)
+        reader.close()
+
+    def test_sqlite_eviction_by_size_and_age(self):
+        from uvsim.memo import ResultCache
+        path = self.path("results.sqlite")
+        cache = ResultCache(max_entries=1, db_path=path, max_db_bytes=600)
+        for value in range(10):
+            cache.run(self.make_sim(), [value, 1])
+        cache.trim()
+        total = cache.connect().execute("SELECT SUM(size), COUNT(*) FROM results").fetchone()
+        self.assertLessEqual(total[0], 600)
+        self.assertGreater(total[1], 0)
+        cache.max_age = 0
+        cache.trim()
+        self.assertEqual(cache.connect().execute("SELECT COUNT(*) FROM results").fetchone()[0], 0)
+        cache.close()
+
+    def test_batch_reuses_results(self):
+        from uvsim.batch import Job, run_job
+        program = self.write("sum.txt", map(str, self.SUM))
+        job = Job(program, self.write("sum.in", ["3", "4"]), results_db=self.path("results.sqlite"))
+        first, second = run_job(job), run_job(job)
+        self.assertEqual((first['cached'], second['cached']), (False, True))
+        self.assertEqual(second['outputs'], [7])
+        self.assertEqual(second['instruction_count'], first['instruction_count'])
+
+    def test_batch_key_and_traces(self):
+        from uvsim.batch import Job, run_job
+        loop = self.write("loop.txt", ["4000"])
+        results_db = self.path("results.sqlite")
+        detected = run_job(Job(loop, timeout=5, detect_loops=True, results_db=results_db))
+        timed_out = run_job(Job(loop, timeout=0.05, results_db=results_db))
+        self.assertEqual((detected['halt_reason'], timed_out['halt_reason']), ('non_terminating', 'timeout'))
+        self.assertFalse(timed_out['cached'])
+        traces = self.path("traces")
+        os.mkdir(traces)
+        traced = run_job(Job(loop, timeout=5, detect_loops=True, results_db=results_db, trace_dir=traces))
+        self.assertFalse(traced['cached'])
+        self.assertTrue(os.path.isfile(traced['trace']))
+
+class TestBenchmarkCorpus(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        import importlib.util
+        path = os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'bench_corpus.py')
+        spec = importlib.util.spec_from_file_location('bench_corpus', path)
+        cls.bench = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(cls.bench)
+
+    def expected_outputs(self, name, inputs):
+        program = name[:-1]
+        if program == 'bubblesort':
+            with open(os.path.join(self.bench.CORPUS_DIR, name + '.txt')) as file:
+                words = [int(line) for line in file if line.strip()]
+            return sorted(words[-20:])
+        return {'count': [], 'multiply': [9801], 'factorial': [5040], 'echo': inputs[:-1]}[program]
+
+    def test_corpus_runs_on_every_engine(self):
+        for name, program, input_file in self.bench.corpus_files():
+            inputs = self.bench.read_inputs(input_file)
+            for engine in UVSim.ENGINES:
+                with self.subTest(program=name, engine=engine):
+                    simulator, sink, _, _ = self.bench.run_once(engine, program, inputs)
+                    self.assertEqual(simulator.halt_reason, 'halt')
+                    self.assertEqual(simulator.file_format, 'old' if name.endswith('4') else 'new')
+                    self.assertEqual(sink.values, self.expected_outputs(name, inputs))
+
+    def test_suite_reports_every_measure(self):
+        document = self.bench.run_suite(engines=('table',), names=('multiply',), repeats=1, min_time=0)
+        self.assertEqual([result['program'] for result in document['results']], ['multiply4', 'multiply6'])
+        for result in document['results']:
+            self.assertEqual(result['instructions'], 895)
+            self.assertGreater(result['instructions_per_sec'], 0)
+            self.assertGreater(result['peak_memory_bytes'], 0)
+            self.assertGreaterEqual(result['load_seconds'], 0)
+
+    def test_compare_flags_slowdowns_past_threshold(self):
+        def document(rates):
+            return {'results': [{'program': program, 'engine': 'table', 'instructions_per_sec': rate}
+                                for program, rate in rates.items()]}
+        baseline = document({'count4': 1000.0, 'echo4': 1000.0, 'gone4': 1000.0})
+        current = document({'count4': 950.0, 'echo4': 800.0, 'new4': 10.0})
+        regressions = self.bench.compare(baseline, current, threshold=0.1)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("echo4 on the table engine", regressions[0])
+        self.assertEqual(self.bench.compare(baseline, current, threshold=0.25), [])
+
+    def test_main_saves_results_and_fails_on_regression(self):
+        with tempfile.TemporaryDirectory() as folder:
+            output = os.path.join(folder, "results.json")
+            arguments = ["--engine", "table", "--program", "count", "--repeats", "1", "--min-time", "0"]
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(self.bench.main(arguments + ["--output", output]), 0)
+            with open(output) as file:
+                document = json.load(file)
+            for result in document['results']:
+                result['instructions_per_sec'] *= 100  # A baseline no machine can keep up with
+            with open(output, 'w') as file:
+                json.dump(document, file)
+            printed = io.StringIO()
+            with contextlib.redirect_stdout(printed):
+                self.assertEqual(self.bench.main(arguments + ["--baseline", output]), 1)
+            self.assertIn("Regression - count4", printed.getvalue())
+
+class TestTracer(unittest.TestCase):
+
+    def make_sim(self, words, **data):
+        sim = UVSim(output_sink=[])
+        sim.file_format = 'old'
+        sim.load_words(words)
+        for address, value in data.items():
+            sim.memory[int(address[1:])] = value
+        return sim
+
+    def countdown(self):
+        # Counts down from 3 in 13 instructions
+        return self.make_sim([2020, 3121, 2120, 4205, 4001, 4300], m20=3, m21=1)
+
+    def test_keeps_the_last_entries(self):
+        from uvsim.tracer import Tracer
+        sim = self.countdown()
+        tracer = Tracer(capacity=4)
+        buffer = tracer.buffer
+        sim.attach(tracer)
+        sim.execute()
+        self.assertEqual((tracer.steps, len(tracer)), (sim.instruction_count, 4))
+        self.assertIs(tracer.buffer, buffer)
+        self.assertEqual(len(buffer), 16)
+        self.assertEqual(tracer.entries(), [(9, 1, 31, 21, 0), (10, 2, 21, 20, 0),
+                                            (11, 3, 42, 5, 0), (12, 5, 43, 0, 0)])
+
+    def test_short_run_is_not_padded(self):
+        from uvsim.tracer import Tracer
+        sim = self.countdown()
+        tracer = Tracer(capacity=100)
+        sim.attach(tracer)
+        sim.execute()
+        entries = tracer.entries()
+        self.assertEqual(len(entries), 13)
+        self.assertEqual(entries[0], (0, 0, 20, 20, 3))  # Accumulator after LOAD 20
+        self.assertEqual(entries[1], (1, 1, 31, 21, 2))
+
+    def test_dumps_on_overflow(self):
+        from uvsim.tracer import Tracer, read_trace
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "crash.trace")
+            sim = self.make_sim([2010, 3011, 4300], m10=9000, m11=9000)
+            tracer = Tracer(dump_path=path)
+            sim.attach(tracer)
+            sim.execute()
+            self.assertEqual(sim.halt_reason, 'overflow')
+            self.assertEqual(tracer.dumped, path)
+            self.assertEqual(read_trace(path), [(0, 0, 20, 10, 9000), (1, 1, 30, 11, 18000)])
+
+    def test_no_dump_on_normal_halt(self):
+        from uvsim.tracer import Tracer
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "crash.trace")
+            sim = self.countdown()
+            sim.attach(Tracer(dump_path=path))
+            sim.execute()
+            self.assertFalse(os.path.exists(path))
+
+    def test_csv_and_binary_agree(self):
+        from uvsim.tracer import Tracer, TraceError, read_trace
+        sim = self.make_sim([2010, 3211, 4300], m10=5, m11=0)
+        tracer = Tracer(capacity=8)
+        sim.attach(tracer)
+        sim.execute()
+        self.assertEqual(sim.halt_reason, 'divide_by_zero')
+        with tempfile.TemporaryDirectory() as folder:
+            binary, text = os.path.join(folder, "run.trace"), os.path.join(folder, "run.csv")
+            tracer.dump(binary)
+            tracer.dump(text)
+            with open(text) as file:
+                self.assertEqual(file.readline().strip(), "step,address,opcode,operand,accumulator")
+            self.assertEqual(os.path.getsize(binary), 24 + 2 * 32)
+            self.assertEqual(read_trace(binary), read_trace(text))
+            self.assertEqual(read_trace(binary), tracer.entries())
+            with open(binary, 'r+b') as file:
+                file.truncate(40)
+            self.assertRaises(TraceError, read_trace, binary)
+
+    def test_batch_saves_traces_of_failed_runs(self):
+        from uvsim.batch import Job, run_job
+        with tempfile.TemporaryDirectory() as folder:
+            for name, words in (("fine", ["4300"]), ("broken", ["2003", "3204", "4300", "0007", "0000"])):
+                with open(os.path.join(folder, name + ".txt"), 'w') as file:
+                    file.write("\n".join(words) + "\n")
+            traces = os.path.join(folder, "traces")
+            os.mkdir(traces)
+            fine = run_job(Job(os.path.join(folder, "fine.txt"), trace_dir=traces))
+            broken = run_job(Job(os.path.join(folder, "broken.txt"), trace_dir=traces))
+            self.assertIsNone(fine['trace'])
+            self.assertEqual(broken['halt_reason'], 'divide_by_zero')
+            self.assertEqual(os.path.dirname(broken['trace']), traces)
+            self.assertRegex(os.path.basename(broken['trace']), r"^broken-[0-9a-f]{8}\.trace$")
+            from uvsim.tracer import read_trace
+            self.assertEqual(read_trace(broken['trace'])[-1], (1, 1, 32, 4, 7))
+            # A program of the same name in another folder keeps its own trace
+            os.mkdir(os.path.join(folder, "other"))
+            with open(os.path.join(folder, "other", "broken.txt"), 'w') as file:
+                file.write("9900\n")
+            other = run_job(Job(os.path.join(folder, "other", "broken.txt"), trace_dir=traces))
+            self.assertNotEqual(other['trace'], broken['trace'])
+            self.assertEqual(len(os.listdir(traces)), 2)
+            self.assertEqual(read_trace(broken['trace'])[-1], (1, 1, 32, 4, 7))
+
+class TestTimeTravel(unittest.TestCase):
+
+    def make_sim(self, **options):
+        # Counts down from 3 in 13 instructions, storing the counter each pass
+        sim = UVSim(output_sink=[], **options)
+        sim.file_format = 'old'
+        sim.load_words([2020, 3121, 2120, 4205, 4001, 4300])
+        sim.memory[20] = 3
+        sim.memory[21] = 1
+        return sim
+
+    def recorded(self, **options):
+        from uvsim.timetravel import History
+        sim = self.make_sim()
+        history = History(**options)
+        sim.attach(history)
+        sim.execute()
+        return sim, history
+
+    def state(self, sim):
+        return sim.accumulator, sim.program_counter, sim.instruction_count, sim.memory[20], sim.running
+
+    def state_after(self, steps):
+        sim = self.make_sim()
+        sim.start()
+        sim.run_slice(steps)
+        return self.state(sim)
+
+    def test_back_and_forward_single_steps(self):
+        sim, history = self.recorded()
+        final = self.state(sim)
+        self.assertEqual((history.end, sim.halt_reason), (13, 'halt'))
+        for step in range(12, -1, -1):
+            self.assertEqual(history.back(sim), 1)
+            self.assertEqual(self.state(sim), self.state_after(step))
+        self.assertEqual(history.back(sim), 0)
+        self.assertEqual(history.forward(sim, 100), 13)
+        self.assertEqual(self.state(sim), final)
+        self.assertEqual(sim.halt_reason, 'halt')
+
+    def test_write_records_only_for_changed_cells(self):
+        sim, history = self.recorded()
+        self.assertEqual(list(history.write_steps), [2, 6, 10])
+        self.assertEqual(list(history.new_values), [2, 1, 0])
+
+    def test_memory_does_not_grow_with_steps(self):
+        from uvsim.timetravel import History
+        sizes = []
+        for count in (1000, 4000):
+            sim = self.make_sim()
+            sim.memory[20] = count
+            history = History(interval=100_000)
+            sim.attach(history)
+            sim.execute()
+            sizes.append(history.memory_bytes())
+        self.assertEqual(sizes[0], sizes[1] - 3 * 3000 * 8)  # Only the extra STOREs cost memory
+
+    def test_every_step_in_any_order(self):
+        sim, history = self.recorded(interval=3)
+        printed = list(sim.output_sink.messages)
+        steps = list(range(14))
+        random.Random(7).shuffle(steps)
+        for step in steps:
+            history.goto(sim, step)
+            self.assertEqual(self.state(sim)[:4], self.state_after(step)[:4])
+        self.assertEqual(sim.output_sink.messages, printed)  # Replaying prints nothing again
+
+    def test_long_jumps_replay_from_snapshots(self):
+        sim, history = self.recorded(interval=4)
+        self.assertEqual([snapshot.step for snapshot in history.snapshots], [0, 4, 8, 12])
+        for step in (0, 9, 2, 13, 5):
+            history.goto(sim, step)
+            self.assertEqual(self.state(sim)[:4], self.state_after(step)[:4])
+        self.assertRaises(ValueError, history.goto, sim, 14)
+
+    def test_reverse_continue_stops_at_breakpoint(self):
+        sim, history = self.recorded()
+        self.assertEqual(history.reverse_continue(sim, {3}), 2)   # Last BRANCHZERO, then HALT
+        self.assertEqual((sim.program_counter, sim.instruction_count), (3, 11))
+        self.assertEqual(history.reverse_continue(sim, {3}), 4)   # The pass before
+        self.assertEqual((sim.program_counter, sim.memory[20]), (3, 1))
+        self.assertEqual(history.reverse_continue(sim, {99}), 7)  # No such step: the start
+        self.assertEqual(self.state(sim), self.state_after(0))
+
+    def test_running_on_from_an_earlier_step(self):
+        sim, history = self.recorded()
+        history.goto(sim, 5)
+        sim.memory[21] = 2  # Take another path from here
+        sim.run_slice()
+        self.assertEqual(sim.halt_reason, 'halt')
+        self.assertEqual(history.end, sim.instruction_count)
+        history.goto(sim, 5)
+        self.assertEqual(self.state(sim)[:4], self.state_after(5)[:4])
+
+    def test_old_steps_are_dropped(self):
+        sim, history = self.recorded(interval=2, max_steps=4)
+        self.assertGreater(history.first, 0)
+        self.assertEqual(history.first, history.snapshots[0].step)
+        history.goto(sim, history.first)
+        self.assertEqual(self.state(sim)[:4], self.state_after(history.first)[:4])
+        self.assertEqual(history.back(sim), 0)
+
+    def test_waiting_read_is_recorded_once(self):
+        from uvsim.channels import PendingInput
+        from uvsim.timetravel import History
+        sim = UVSim(input_source=PendingInput(), output_sink=[])
+        sim.file_format = 'old'
+        sim.load_words([1009, 2009, 4300])
+        history = History()
+        sim.attach(history)
+        sim.start()
+        self.assertEqual(sim.run_slice(), 'input')
+        self.assertEqual(sim.run_slice(), 'input')
+        sim.input_source.feed("42")
+        self.assertEqual(sim.run_slice(), 'stopped')
+        self.assertEqual((history.end, sim.instruction_count, sim.accumulator), (3, 3, 42))
+        history.goto(sim, 0)
+        self.assertEqual((sim.memory[9], sim.program_counter), (0, 0))
+        history.goto(sim, 2)
+        self.assertEqual((sim.memory[9], sim.accumulator, sim.program_counter), (42, 42, 2))
+
+class TestDebugger(unittest.TestCase):
+
+    def setUp(self):
+        from uvsim.debugger import Debugger
+        # Counts down from 3 in 13 instructions, storing the counter each pass
+        self.sim = UVSim(output_sink=[])
+        self.sim.file_format = 'old'
+        self.sim.load_words([2020, 3121, 2120, 4205, 4001, 4300])
+        self.sim.memory[20] = 3
+        self.sim.memory[21] = 1
+        self.debugger = Debugger(self.sim)
+
+    def run_to_stop(self):
+        state = self.sim.run_slice()
+        return state, self.sim.program_counter, self.sim.instruction_count
+
+    def test_nothing_set_keeps_the_fast_loop(self):
+        self.sim.run_observed = None  # Calling it would fail
+        self.sim.execute()
+        self.assertEqual(self.sim.halt_reason, 'halt')
+        self.debugger.add_breakpoint(3)
+        self.assertEqual(self.sim.observers, [self.debugger])
+        self.debugger.remove_breakpoint(3)
+        self.assertEqual(self.sim.observers, [])
+
+    def test_breakpoint_stops_before_the_instruction(self):
+        self.debugger.add_breakpoint(1)
+        self.sim.start()
+        self.assertEqual(self.run_to_stop(), ('break', 1, 1))
+        self.assertEqual(self.sim.accumulator, 3)
+        self.assertEqual(self.run_to_stop(), ('break', 1, 5))  # Runs on, then stops on the next pass
+        self.assertEqual(self.sim.memory[20], 2)
+        self.debugger.clear()
+        self.assertEqual(self.run_to_stop(), ('stopped', 6, 13))
+        self.assertEqual(self.debugger.hits, ["Breakpoint at 001."] * 2)
+
+    def test_conditional_breakpoint(self):
+        self.debugger.add_breakpoint(3, "== 0")
+        self.sim.start()
+        self.assertEqual(self.run_to_stop(), ('break', 3, 11))
+        self.assertEqual(self.debugger.hits, ["Breakpoint at 003 (accumulator == 0)."])
+        self.assertEqual(self.run_to_stop(), ('stopped', 6, 13))
+
+    def test_write_watchpoint_stops_after_the_write(self):
+        self.debugger.add_watchpoint(20, 'write')
+        self.sim.start()
+        self.assertEqual(self.run_to_stop(), ('break', 3, 3))
+        self.assertEqual(self.debugger.hits, ["Watchpoint - 020 written by 002: 3 -> 2."])
+        self.assertEqual(self.run_to_stop(), ('break', 3, 7))
+
+    def test_read_watchpoint(self):
+        self.debugger.add_watchpoint(21, 'read')
+        self.sim.start()
+        self.assertEqual(self.run_to_stop(), ('break', 2, 2))
+        self.assertEqual(self.debugger.hits, ["Watchpoint - 021 read by 001."])
+        self.debugger.add_watchpoint(21, 'write')  # Nothing writes 021
+        self.assertEqual(self.run_to_stop(), ('stopped', 6, 13))
+
+    def test_execute_stops_at_breakpoint(self):
+        self.debugger.add_breakpoint(5)
+        self.sim.execute()
+        self.assertEqual((self.sim.halt_reason, self.sim.program_counter), ('breakpoint', 5))
+        self.assertIn("Breakpoint at 005.", self.sim.output_sink.messages)
+        self.assertEqual(self.sim.run_slice(), 'stopped')
+        self.assertEqual(self.sim.halt_reason, 'halt')
+
+    def test_invalid_settings(self):
+        self.assertRaises(ValueError, self.debugger.add_breakpoint, 250)
+        self.assertRaises(ValueError, self.debugger.add_breakpoint, 3, "about 5")
+        self.assertRaises(ValueError, self.debugger.add_watchpoint, 20, 'execute')
+        self.assertEqual(self.sim.observers, [])
+
+    def test_background_run_pauses_at_breakpoint(self):
+        from uvsim.background import BackgroundRun
+        self.debugger.add_breakpoint(4)
+        run = BackgroundRun(self.sim)
+        run.start()
+        events = []
+        while ('paused',) not in events:
+            events.append(run.events.get(timeout=5))
+        self.assertIn(('break', 4), events)
+        self.assertTrue(run.paused)
+        self.debugger.clear()
+        run.resume()
+        run.thread.join(timeout=5)
+        self.assertEqual(run.poll()[-1], ('done', 'halt'))
+
+class TestCommandLine(TempFolderTest, unittest.TestCase):
+
+    def run_cli(self, *argv):
+        from uvsim.cli import main
+        out, err = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            status = main(list(argv))
+        return status, out.getvalue(), err.getvalue()
+
+    def sum_program(self):
+        return self.write("sum.txt", ["1020", "1021", "2020", "3021", "2122", "1122", "4300"])
+
+    def test_quiet_run_with_values(self):
+        status, out, err = self.run_cli(self.sum_program(), "5", "-7", "--quiet")
+        self.assertEqual((status, out, err), (0, "-2\n", ""))
+
+    def test_inputs_file(self):
+        inputs = self.write("sum.in", ["40", "2"])
+        status, out, _ = self.run_cli("--inputs=" + inputs, "--quiet", self.sum_program())
+        self.assertEqual((status, out), (0, "42\n"))
+
+    def test_image_program(self):
+        from uvsim.image import text_to_image
+        image = self.path("sum.uvsi")
+        text_to_image(self.sum_program(), image)
+        status, out, _ = self.run_cli(image, "1", "2", "--quiet")
+        self.assertEqual((status, out), (0, "3\n"))
+
+    def test_error_halt_exits_one(self):
+        program = self.write("divide.txt", ["1020", "3221", "4300"])
+        status, _, _ = self.run_cli(program, "5", "--quiet")
+        self.assertEqual(status, 1)
+
+    def test_load_error_exits_two(self):
+        status, out, err = self.run_cli(self.path("missing.txt"), "--quiet")
+        self.assertEqual((status, out), (2, ""))
+        self.assertIn("Error", err)
+
+    def test_usage_errors(self):
+        for argv in ([], ["--engine"], ["--verbose", "program.txt"]):
+            with self.subTest(argv=argv):
+                status, _, err = self.run_cli(*argv)
+                self.assertEqual(status, 2)
+                self.assertIn("uvsim-run: error:", err)
+        status, _, err = self.run_cli(self.sum_program(), "--engine", "warp")
+        self.assertEqual(status, 2)
+        self.assertIn("Unknown engine 'warp'", err)
+
+    def test_starts_without_tkinter(self):
+        source = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+        script = ("import sys\n"
+                  "from uvsim.cli import main\n"
+                  "status = main(sys.argv[1:])\n"
+                  "print(sorted(name for name in ('tkinter', 'argparse', 'queue', 'threading') if name in sys.modules))\n"
+                  "sys.exit(status)\n")
+        environment = dict(os.environ, PYTHONPATH=source)
+        result = subprocess.run([sys.executable, "-c", script, self.sum_program(), "2", "3", "--quiet"],
+                                capture_output=True, text=True, env=environment)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout, "5\n[]\n")
+
+class TestMemoryWindow(unittest.TestCase):
+    def setUp(self):
+        from uvsim.memorygrid import MemoryWindow
+        self.window = MemoryWindow()
+        self.window.set_values(list(range(100, 200)))
+        self.window.resize(10)
+
+    def test_scrolling_moves_the_visible_rows(self):
+        window = self.window
+        self.assertEqual(window.row(0), ("0: 100", None))
+        self.assertTrue(window.scroll(3, 'units'))
+        self.assertEqual(window.row(0), ("3: 103", None))
+        self.assertTrue(window.scroll(1, 'pages'))
+        self.assertEqual(window.top, 13)
+        self.assertEqual(window.rows_of([12, 13, 22, 23]), [0, 9])
+        self.assertEqual(window.index_at(4), 17)
+        self.assertEqual(window.scrollbar(), (0.13, 0.23))
+
+    def test_scrolling_is_clamped(self):
+        window = self.window
+        self.assertFalse(window.scroll(-1, 'units'))
+        self.assertTrue(window.scroll_to(1000))
+        self.assertEqual(window.top, 90)
+        self.assertFalse(window.scroll(1, 'pages'))
+        self.assertEqual(window.row(9), ("99: 199", None))
+
+    def test_see_scrolls_only_when_needed(self):
+        window = self.window
+        self.assertFalse(window.see(9))
+        self.assertTrue(window.see(10))
+        self.assertEqual(window.top, 1)
+        self.assertTrue(window.see(0))
+        self.assertEqual(window.top, 0)
+
+    def test_selection(self):
+        window = self.window
+        self.assertEqual(window.next_selection(1), 0)
+        window.selected = 99
+        self.assertEqual(window.next_selection(1), 99)
+        window.selected = 5
+        self.assertEqual(window.next_selection(-1), 4)
+        self.assertEqual(window.row(5), ("5: 105", 'selected'))
+
+    def test_set_values_clamps_selection_and_window(self):
+        window = self.window
+        window.scroll_to(80)
+        window.selected = 50
+        window.set_values([1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12])
+        self.assertEqual(window.top, 2)
+        self.assertIsNone(window.selected)
+        window.set_values([1, 2, 3])
+        self.assertEqual(window.top, 0)
+        self.assertEqual(window.row(3), ("", None))
+        self.assertIsNone(window.index_at(3))
+        self.assertEqual(window.scrollbar(), (0.0, 1.0))
+
+    def test_changed_rows_are_highlighted(self):
+        window = self.window
+        window.set_values(window.values, changed=[2, 4])
+        window.selected = 4
+        self.assertEqual([window.row(row)[1] for row in range(5)], [None, None, 'changed', None, 'selected'])
+        window.changed.clear()
+        self.assertEqual(window.row(2)[1], None)
+        window.set_values([], changed=[1])
+        self.assertIsNone(window.next_selection(1))
+
 if __name__ == "__main__":
     unittest.main()